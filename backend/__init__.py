@@ -1,7 +1,8 @@
+import hmac
 import os
 import logging
-from flask import Flask
-from .extensions import mongo, bcrypt, cors, jwt
+from flask import Flask, request
+from .extensions import mongo, bcrypt, cors
 from pymongo import MongoClient
 
 
@@ -32,11 +33,14 @@ def create_app(config_class="backend.config.Config"):
         logging.getLogger('gunicorn.access').setLevel(logging.WARNING)
         logging.getLogger('pymongo').setLevel(logging.WARNING)
 
+    if app.config.get("TRUSTED_PROXY_COUNT"):
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        hops = app.config["TRUSTED_PROXY_COUNT"]
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
     # Initialize extensions
-    # Set bcrypt log rounds from config (for dev speedup)
-    app.config["BCRYPT_LOG_ROUNDS"] = getattr(app.config, "BCRYPT_LOG_ROUNDS", 8)
+    # bcrypt cost comes from BCRYPT_LOG_ROUNDS in the config
     bcrypt.init_app(app)
-    jwt.init_app(app)
     
     # Configure CORS with explicit settings for Vercel frontend
     cors_origins = [origin.strip() for origin in app.config["CORS_ORIGINS"].split(",")]
@@ -75,6 +79,12 @@ def create_app(config_class="backend.config.Config"):
     # This will execute backend/models/__init__.py and register all models
     from . import models
 
+    if app.config.get('MONGO_AVAILABLE', True):
+        try:
+            models.ensure_indexes()
+        except Exception as e:
+            app.logger.error("Failed to ensure MongoDB indexes: %s", e)
+
     # Import and register blueprints
     from backend.routes.journal import journal_bp
     from backend.routes.user import user_bp
@@ -86,7 +96,9 @@ def create_app(config_class="backend.config.Config"):
     from backend.routes.chat import chat_bp
     from backend.routes.ai_chat import chat_bp as ai_chat_bp
     from backend.routes.ai_insights import insights_bp
+    from backend.routes.ai_sentiment import sentiment_bp
     from backend.routes.progress import progress_bp
+    from backend.routes.events import events_bp
 
     app.register_blueprint(journal_bp, url_prefix="/api/journal")
     app.register_blueprint(user_bp, url_prefix="/api/user")
@@ -98,7 +110,13 @@ def create_app(config_class="backend.config.Config"):
     app.register_blueprint(chat_bp)
     app.register_blueprint(ai_chat_bp, url_prefix="/api/chat")
     app.register_blueprint(insights_bp, url_prefix="/api/ai_insights")
+    app.register_blueprint(sentiment_bp, url_prefix="/api/sentiment")
     app.register_blueprint(progress_bp, url_prefix="/api/progress")
+    app.register_blueprint(events_bp, url_prefix="/api")
+
+    if app.config.get("SCHEDULER_ENABLED") and app.config.get('MONGO_AVAILABLE', True):
+        from backend.services.scheduler import init_scheduler
+        init_scheduler(app)
 
     # Groq LLM service will be initialized lazily on first use
     app.logger.info("Groq LLM service initialized and ready for chat functionality")
@@ -108,6 +126,20 @@ def create_app(config_class="backend.config.Config"):
     def health_check():
         return {"status": "healthy"}
 
+    # Per-worker metrics (LLM breaker state, retries, fallbacks, ...).
+    # Internal state: only served with `Authorization: Bearer <METRICS_TOKEN>`,
+    # and not at all while METRICS_TOKEN is unset
+    @app.route("/api/metrics")
+    def metrics_snapshot():
+        from backend.services.metrics import metrics
+        expected = app.config.get("METRICS_TOKEN")
+        supplied = request.headers.get("Authorization", "").partition(" ")[2].strip()
+        if not expected:
+            return {"message": "Not found"}, 404
+        if not hmac.compare_digest(supplied.encode(), expected.encode()):
+            return {"message": "Unauthorized"}, 401
+        return metrics.snapshot()
+
     # Homepage route
     @app.route("/")
     def home():
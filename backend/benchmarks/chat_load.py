@@ -0,0 +1,116 @@
+"""
+Chat Load Benchmark
+Fires concurrent requests at the chat endpoints and reports throughput,
+latency percentiles and errors, plus the server's /api/metrics afterwards
+(set METRICS_TOKEN to the server's value to include them).
+
+Typical offline run (three terminals):
+    python -m backend.tools.fake_groq --latency-ms 400 --tokens-per-sec 60
+    LLM_BACKEND=fake gunicorn -w 2 --threads 4 wsgi:app
+    python -m backend.benchmarks.chat_load --url http://127.0.0.1:8000 --concurrency 32 --requests 500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def _percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run(base_url, total, concurrency, stream, timeout):
+    path = "/api/chat/stream" if stream else "/api/chat"
+    latencies = []
+    first_bytes = []
+    errors = {}
+    lock = threading.Lock()
+    session = requests.Session()
+
+    def one(i):
+        payload = {"messages": [{"role": "user", "content": f"Load test message {i}: how can I relax tonight?"}]}
+        started = time.perf_counter()
+        try:
+            resp = session.post(base_url + path, json=payload, timeout=timeout, stream=stream)
+            if stream:
+                first = None
+                for _ in resp.iter_content(chunk_size=None):
+                    if first is None:
+                        first = time.perf_counter() - started
+                if first is not None:
+                    with lock:
+                        first_bytes.append(first * 1000)
+            else:
+                resp.content
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                if resp.status_code >= 400:
+                    errors[resp.status_code] = errors.get(resp.status_code, 0) + 1
+                latencies.append(elapsed)
+        except requests.RequestException as e:
+            with lock:
+                key = type(e).__name__
+                errors[key] = errors.get(key, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - started
+
+    report = {
+        "endpoint": path,
+        "requests": total,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "avg": round(statistics.mean(latencies), 1) if latencies else 0.0,
+            "p50": round(_percentile(latencies, 0.50), 1),
+            "p95": round(_percentile(latencies, 0.95), 1),
+            "p99": round(_percentile(latencies, 0.99), 1),
+        },
+        "errors": errors,
+    }
+    if stream:
+        report["first_byte_ms"] = {
+            "p50": round(_percentile(first_bytes, 0.50), 1),
+            "p95": round(_percentile(first_bytes, 0.95), 1),
+        }
+    try:
+        headers = {"Authorization": f"Bearer {os.environ['METRICS_TOKEN']}"} if os.getenv("METRICS_TOKEN") else {}
+        response = session.get(base_url + "/api/metrics", headers=headers, timeout=timeout)
+        report["server_metrics"] = response.json() if response.ok else None
+    except (requests.RequestException, ValueError):
+        report["server_metrics"] = None
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the chat pipeline.")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--stream", action="store_true", help="use /api/chat/stream")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--max-p95-ms", type=float, default=None, help="exit non-zero if p95 exceeds this")
+    args = parser.parse_args()
+
+    report = run(args.url.rstrip("/"), args.requests, args.concurrency, args.stream, args.timeout)
+    print(json.dumps(report, indent=2))
+    if args.max_p95_ms is not None and report["latency_ms"]["p95"] > args.max_p95_ms:
+        print(f"FAIL: p95 {report['latency_ms']['p95']}ms > budget {args.max_p95_ms}ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Import-Time Budget Check
+Imports `backend` and the service modules a worker loads at startup in a
+fresh interpreter, and fails if that takes longer than the budget or if any
+heavy optional dependency (NLTK, TextBlob, NumPy, SciPy, torch, ...) gets
+pulled in eagerly. Meant to run in CI after dependency installs.
+
+Run:
+    python -m backend.benchmarks.import_budget --budget-ms 1500
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+STARTUP_MODULES = [
+    "backend",
+    "backend.config",
+    "backend.journal_service",
+    "backend.services.sentiment_service",
+    "backend.services.insights_service",
+    "backend.services.llm_service",
+]
+
+# Must only ever be imported lazily, on first use
+HEAVY_MODULES = ["textblob", "nltk", "numpy", "scipy", "torch", "transformers", "sklearn"]
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = (time.perf_counter() - started) * 1000
+print(json.dumps({{"elapsed_ms": elapsed, "loaded": sorted(m for m in {heavy!r} if m in sys.modules)}}))
+"""
+
+
+def probe(runs):
+    """Best-of-N cold import time, each run in a new interpreter."""
+    repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [repo_root, os.getenv("PYTHONPATH")])))
+    code = _PROBE.format(modules=STARTUP_MODULES, heavy=HEAVY_MODULES)
+    best = None
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", code], env=env, cwd=repo_root,
+            capture_output=True, text=True, check=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        if best is None or result["elapsed_ms"] < best["elapsed_ms"]:
+            best = result
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if importing the backend is too slow or too heavy.")
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--runs", type=int, default=3, help="report the best of N cold imports")
+    args = parser.parse_args()
+
+    result = probe(args.runs)
+    report = {
+        "modules": STARTUP_MODULES,
+        "import_ms": round(result["elapsed_ms"], 1),
+        "budget_ms": args.budget_ms,
+        "heavy_modules_loaded": result["loaded"],
+    }
+    print(json.dumps(report, indent=2))
+
+    failed = False
+    if report["import_ms"] > args.budget_ms:
+        print(f"FAIL: import took {report['import_ms']}ms > budget {args.budget_ms}ms", file=sys.stderr)
+        failed = True
+    if result["loaded"]:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(result['loaded'])}", file=sys.stderr)
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Sentiment Batch Benchmark
+Compares SentimentAnalyzer.analyze_sentiment called per text against
+SentimentAnalyzer.analyze_batch on the same synthetic journal corpus, and
+fails unless both paths return identical results and the batch path is
+faster (--min-speedup, default 1.0).
+
+Run:
+    python -m backend.benchmarks.sentiment_batch --texts 5000 --words 120
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+
+from backend.services.sentiment_service import SentimentAnalyzer
+
+FILLER = (
+    "today I went to work and talked with my family about our plans for the weekend "
+    "then cooked dinner walked outside and thought about what I want next month"
+).split()
+
+FEELINGS = [
+    "happy", "good", "great", "sad", "tired", "anxious", "stressed", "lonely",
+    "excited", "glad", "angry", "down", "not happy", "self-harm", "love",
+]
+
+
+def make_corpus(count, words, seed):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        tokens = [rng.choice(FILLER) for _ in range(words)]
+        for _ in range(max(1, words // 20)):
+            tokens.insert(rng.randrange(len(tokens) + 1), rng.choice(FEELINGS))
+        corpus.append(" ".join(tokens) + ".")
+    return corpus
+
+
+def _best_of(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(count, words, repeat, seed):
+    analyzer = SentimentAnalyzer()
+    corpus = make_corpus(count, words, seed)
+    analyzer.analyze_batch(corpus[:10])  # warm up lazy imports and weight matrix
+
+    per_item_seconds, per_item = _best_of(lambda: [analyzer.analyze_sentiment(t) for t in corpus], repeat)
+    batch_seconds, batch = _best_of(lambda: analyzer.analyze_batch(corpus), repeat)
+
+    mismatches = sum(1 for a, b in zip(per_item, batch) if a != b)
+    return {
+        "texts": count,
+        "words_per_text": words,
+        "per_item": {
+            "seconds": round(per_item_seconds, 4),
+            "texts_per_sec": round(count / per_item_seconds, 1),
+        },
+        "batch": {
+            "seconds": round(batch_seconds, 4),
+            "texts_per_sec": round(count / batch_seconds, 1),
+        },
+        "speedup": round(per_item_seconds / batch_seconds, 2),
+        "mismatches": mismatches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-item vs batch sentiment scoring.")
+    parser.add_argument("--texts", type=int, default=5000)
+    parser.add_argument("--words", type=int, default=120, help="approximate words per text")
+    parser.add_argument("--repeat", type=int, default=3, help="report the best of N runs")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--min-speedup", type=float, default=1.0,
+                        help="fail unless batch is more than this many times faster")
+    args = parser.parse_args()
+
+    # The corpus contains crisis phrases on purpose; don't time warning logs
+    logging.getLogger("backend.services.sentiment_service").setLevel(logging.ERROR)
+    report = run(args.texts, args.words, args.repeat, args.seed)
+    print(json.dumps(report, indent=2))
+    failed = False
+    if report["mismatches"]:
+        print(f"FAIL: {report['mismatches']} batch results differ from per-item results", file=sys.stderr)
+        failed = True
+    if report["speedup"] <= args.min_speedup:
+        print(f"FAIL: batch speedup {report['speedup']}x <= {args.min_speedup}x", file=sys.stderr)
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
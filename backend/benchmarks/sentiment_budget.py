@@ -0,0 +1,80 @@
+"""
+Sentiment CPU Budget Check
+Measures the CPU time of single SentimentAnalyzer.analyze_sentiment calls
+and fails when the p99 exceeds the budget, so scorer changes (bigger
+lexicon, extra rules) can't silently slow down the request path.
+
+Two cases are checked: a typical journal entry (--words) and the longest
+input the analyzer accepts (SENTIMENT_MAX_CHARS, default 20000 chars).
+
+Run:
+    python -m backend.benchmarks.sentiment_budget --budget-ms 1.0 --max-input-budget-ms 25
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+
+from backend.benchmarks.sentiment_batch import make_corpus
+from backend.services.sentiment_service import SentimentAnalyzer
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(analyzer, texts):
+    """CPU milliseconds per call (thread time, so other processes don't skew it)."""
+    samples = []
+    for text in texts:
+        started = time.thread_time_ns()
+        analyzer.analyze_sentiment(text)
+        samples.append((time.thread_time_ns() - started) / 1e6)
+    return {
+        "calls": len(samples),
+        "p50_ms": round(_percentile(samples, 0.50), 4),
+        "p99_ms": round(_percentile(samples, 0.99), 4),
+        "max_ms": round(max(samples), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enforce a per-call CPU budget for sentiment scoring.")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=200, help="words in a typical entry")
+    parser.add_argument("--budget-ms", type=float, default=1.0, help="p99 budget for a typical entry")
+    parser.add_argument("--max-input-budget-ms", type=float, default=25.0,
+                        help="p99 budget for the longest accepted input")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    logging.getLogger("backend.services.sentiment_service").setLevel(logging.ERROR)
+    analyzer = SentimentAnalyzer()
+    analyzer.analyze_sentiment("warm up the lexicon and matcher")
+
+    typical = make_corpus(args.calls, args.words, args.seed)
+    longest = [(" ".join(make_corpus(1, 4000, args.seed + i)))[:analyzer.max_chars] for i in range(50)]
+
+    report = {
+        "lexicon_terms": len(analyzer.lexicon),
+        "typical": dict(measure(analyzer, typical), words=args.words, budget_ms=args.budget_ms),
+        "max_input": dict(measure(analyzer, longest), chars=analyzer.max_chars,
+                          budget_ms=args.max_input_budget_ms),
+    }
+    print(json.dumps(report, indent=2))
+
+    failed = False
+    for case in ("typical", "max_input"):
+        if report[case]["p99_ms"] > report[case]["budget_ms"]:
+            print(f"FAIL: {case} p99 {report[case]['p99_ms']}ms > budget {report[case]['budget_ms']}ms",
+                  file=sys.stderr)
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -23,13 +23,27 @@ class Config:
         "https://mindbuddy.vercel.app,http://localhost:3000,http://127.0.0.1:3000"
     )
 
-    # JWT configuration
-    JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-jwt-secret-key")
-    JWT_TOKEN_LOCATION = ['headers']
-    JWT_HEADER_NAME = 'Authorization'
-    JWT_HEADER_TYPE = 'Bearer'
+    # Bearer token that unlocks GET /api/metrics (internal breaker, queue and
+    # crisis counters). Unset keeps the endpoint disabled
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
 
-    # Bcrypt configuration (lower rounds for dev speed)
+    # Reverse proxies in front of the app (e.g. 1 on Render/Heroku) whose
+    # X-Forwarded-For is trusted, so request.remote_addr is the client IP
+    # used by the auth rate limits. 0 trusts no forwarded headers.
+    TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", 0))
+
+    # JWT configuration (backend/services/auth_tokens.py). Falls back to
+    # SECRET_KEY, which signed tokens before JWT_SECRET_KEY was used
+    JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY") or SECRET_KEY
+    # Also accept pre-refresh-token (24h) tokens signed with SECRET_KEY when
+    # JWT_SECRET_KEY differs; turn off once a day has passed since deploying
+    JWT_ACCEPT_LEGACY_SECRET = os.getenv("JWT_ACCEPT_LEGACY_SECRET", "true").lower() in ("1", "true", "yes")
+    ACCESS_TOKEN_MINUTES = int(os.getenv("ACCESS_TOKEN_MINUTES", 15))
+    REFRESH_TOKEN_DAYS = int(os.getenv("REFRESH_TOKEN_DAYS", 30))
+    TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))  # verified access tokens kept per process
+
+    # Bcrypt configuration (lower rounds for dev speed). In production set it from
+    # `python -m backend.tools.bcrypt_cost`; existing hashes are upgraded on login
     BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", 8))  # 8 is fast for dev, increase for prod
 
     # Logging configuration
@@ -39,3 +53,23 @@ class Config:
 
     # Groq API configuration
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+
+    # Chat streaming: small Groq chunks are batched into one SSE frame per
+    # SSE_COALESCE_MS window or once SSE_COALESCE_BYTES have accumulated
+    SSE_COALESCE_MS = int(os.getenv("SSE_COALESCE_MS", 50))
+    SSE_COALESCE_BYTES = int(os.getenv("SSE_COALESCE_BYTES", 256))
+
+    # GET /api/events push streams: heartbeat comment interval, lifetime after
+    # which the client reconnects, and how far back Last-Event-ID replay reaches
+    EVENTS_HEARTBEAT_SECONDS = int(os.getenv("EVENTS_HEARTBEAT_SECONDS", 15))
+    EVENTS_MAX_STREAM_SECONDS = int(os.getenv("EVENTS_MAX_STREAM_SECONDS", 1800))
+    EVENTS_REPLAY_HOURS = int(os.getenv("EVENTS_REPLAY_HOURS", 24))
+
+    # Largest number of texts accepted by POST /api/sentiment/analyze/batch
+    SENTIMENT_BATCH_MAX_TEXTS = int(os.getenv("SENTIMENT_BATCH_MAX_TEXTS", 1000))
+
+    # Background scheduler (nightly pre-generation of daily tips and check-ins).
+    # Safe on every worker: jobs take a cluster-wide lock (backend/services/scheduler.py)
+    SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "false").lower() == "true"
+    PREGENERATION_HOUR = int(os.getenv("PREGENERATION_HOUR", 4))  # UTC
+    MAINTENANCE_HOUR = int(os.getenv("MAINTENANCE_HOUR", 3))  # UTC, auto-read of stale insights and retention
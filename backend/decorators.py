@@ -1,41 +1,67 @@
 import logging
+import math
 from functools import wraps
-from flask import request, jsonify, g, current_app
+from flask import request, jsonify, current_app
 import jwt
 from backend.models import User
-from .config import Config
+from backend.services.auth_tokens import verify_access_token
+from backend.services.rate_limit import get_auth_limiter
 
 logger = logging.getLogger(__name__)
 
 def token_required(f):
+    """
+    Authenticate the request's Bearer access token (services/auth_tokens.py)
+    and pass the User as the view's first argument. Works for async views too.
+    """
     @wraps(f)
     def decorated(*args, **kwargs):
         token = None
         if 'Authorization' in request.headers:
-            token = request.headers['Authorization'].split(" ")[1]
+            parts = request.headers['Authorization'].split()
+            if len(parts) == 2:
+                token = parts[1]
 
         if not token:
             logger.warning("Token missing for request: %s %s", request.method, request.path)
             return jsonify({'message': 'Token is missing!'}), 401
 
         try:
-            data = jwt.decode(token, Config.SECRET_KEY, algorithms=["HS256"])
-            user_id = data.get('user_id')
-            logger.info("Token decoded for user_id: %s, request: %s %s", user_id, request.method, request.path)
+            user_id = verify_access_token(token)
             user_data = User.find_by_id(user_id)
             if not user_data:
                 logger.warning("User not found for user_id: %s, request: %s %s", user_id, request.method, request.path)
-                logger.info("Available user data: %s", user_data)
                 return jsonify({'message': 'User not found!'}), 401
             current_user = User.from_dict(user_data)
-            logger.info("Token validation successful for user_id: %s (%s %s)", user_id, current_user.email, request.method, request.path)
+            logger.debug("Token validation successful for user_id: %s (%s %s)", user_id, request.method, request.path)
         except jwt.ExpiredSignatureError:
-            logger.warning("Token expired for request: %s %s", request.method, request.path)
+            logger.info("Token expired for request: %s %s", request.method, request.path)
             return jsonify({'message': 'Token has expired!'}), 401
         except jwt.InvalidTokenError:
             logger.warning("Invalid token for request: %s %s", request.method, request.path)
             return jsonify({'message': 'Token is invalid!'}), 401
 
-        return f(current_user, *args, **kwargs)
+        return current_app.ensure_sync(f)(current_user, *args, **kwargs)
 
     return decorated
+
+
+def rate_limited(action):
+    """
+    Throttle `action` per client IP and per submitted email before the view
+    runs, answering 429 with Retry-After once a bucket is empty.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            data = request.get_json(silent=True) or request.form or {}
+            email = data.get("email") if hasattr(data, "get") else None
+            retry_after = get_auth_limiter().check(action, request.remote_addr, email)
+            if retry_after:
+                logger.warning("Rate limited %s from %s", action, request.remote_addr)
+                return (jsonify({"message": "Too many attempts, please try again later"}), 429,
+                        {"Retry-After": str(math.ceil(retry_after))})
+            return f(*args, **kwargs)
+
+        return decorated
+    return decorator
@@ -1,13 +1,43 @@
-from textblob import TextBlob
+"""
+Journal helpers: sentiment label, canned insight and tags for an entry.
+Sentiment goes through the shared SentimentAnalyzer; JOURNAL_SENTIMENT_BACKEND=textblob
+switches to TextBlob polarity, imported on first use only (it pulls in NLTK).
+"""
+
+import logging
+import os
 import random
 
+from backend.services.keyword_engine import scan
+from backend.services.sentiment_service import get_sentiment_analyzer
+
+logger = logging.getLogger(__name__)
+
+_textblob = None
+
+def _load_textblob():
+    """Import TextBlob on first use; None if it isn't installed."""
+    global _textblob
+    if _textblob is None:
+        try:
+            from textblob import TextBlob
+            _textblob = TextBlob
+        except ImportError:
+            logger.warning("JOURNAL_SENTIMENT_BACKEND=textblob but textblob is not installed; using SentimentAnalyzer")
+            _textblob = False
+    return _textblob or None
+
 def analyze_sentiment(text: str) -> str:
-    analysis = TextBlob(text)
-    if analysis.sentiment.polarity > 0.1:
-        return 'positive'
-    elif analysis.sentiment.polarity < -0.1:
-        return 'negative'
-    return 'neutral'
+    if os.getenv("JOURNAL_SENTIMENT_BACKEND", "").lower() == "textblob":
+        TextBlob = _load_textblob()
+        if TextBlob is not None:
+            polarity = TextBlob(text).sentiment.polarity
+            if polarity > 0.1:
+                return 'positive'
+            elif polarity < -0.1:
+                return 'negative'
+            return 'neutral'
+    return get_sentiment_analyzer().analyze_sentiment(text)['sentiment_label']
 
 def generate_ai_insights(sentiment: str) -> str:
     insights = {
@@ -31,10 +61,6 @@ def generate_ai_insights(sentiment: str) -> str:
     return random.choice(options)
 
 def extract_tags(content: str) -> list:
-    common_tags = ['work', 'family', 'health', 'stress', 'happiness', 'goals', 'relationships', 'anxiety', 'accomplishment']
-    found_tags = set()
-    text = content.lower()
-    for tag in common_tags:
-        if tag in text:
-            found_tags.add(tag)
-    return list(found_tags)[:3]
\ No newline at end of file
+    # Tag keywords live in keyword_engine.LEXICONS ("tag:<name>")
+    hits = scan(content)
+    return [category.split(":", 1)[1] for category in hits.categories("tag:")][:3]
\ No newline at end of file
@@ -16,18 +16,45 @@ from .user_settings import UserSettings
 from .mood_entry import MoodEntry
 from .journal_entry import JournalEntry
 from .sentiment_history import SentimentHistory
+from .sentiment_trend import SentimentTrend
+from .sentiment_summary import SentimentMonthlySummary
 from .chat_log import ChatLog
 from .wellness_insight import WellnessInsight
+from .insight_counter import InsightCounter
+from .crisis_alert import CrisisAlert
+from .check_in_message import CheckInMessage
+from .task import Task
+from .job_lock import JobLock
+from .rate_limit_bucket import RateLimitBucket
+from .refresh_token import RefreshToken
+
+
+def ensure_indexes():
+    """Create the indexes the model queries rely on (no-op when they already exist)."""
+    for model in (User, JournalEntry, SentimentHistory, ChatLog, WellnessInsight, CrisisAlert, CheckInMessage, Task,
+                  JobLock, RateLimitBucket, RefreshToken, SentimentMonthlySummary):
+        model.ensure_indexes()
+
 
 # Export all models
 __all__ = [
+    "ensure_indexes",
     "User",
     "JournalEntry",
     "UserSettings",
     "MoodEntry",
     "SentimentHistory",
+    "SentimentTrend",
+    "SentimentMonthlySummary",
     "ChatLog",
     "WellnessInsight",
+    "InsightCounter",
+    "CrisisAlert",
+    "CheckInMessage",
+    "Task",
+    "JobLock",
+    "RateLimitBucket",
+    "RefreshToken",
     "SubscribeRequest",
     "SubscribeResponse",
     "WebhookResponse",
@@ -1,14 +1,23 @@
 from backend import mongo
-from datetime import datetime
+from datetime import datetime, timedelta
+import os
 from bson import ObjectId
+from pymongo.errors import OperationFailure
+from backend.models.ids import id_filter, isoformat, parse_datetime, to_object_id
 
 class ChatLog:
     """
     Model to store chat conversations with the AI assistant (Sereni).
     Maintains conversation context and history.
+
+    Raw turns expire RETENTION_DAYS after creation through a TTL index on
+    created_at (CHAT_LOG_RETENTION_DAYS, default 180; 0 keeps them forever).
     """
     collection = mongo.mindbuddy.chat_logs
 
+    RETENTION_DAYS = int(os.getenv("CHAT_LOG_RETENTION_DAYS", 180))
+    TTL_INDEX = "created_at_ttl"
+
     def __init__(self, user_id, message, role='user', ai_response=None, 
                  conversation_id=None, context_summary=None):
         self._id = ObjectId()
@@ -31,8 +40,7 @@ class ChatLog:
     @classmethod
     def find_by_user(cls, user_id, limit=50):
         """Find recent chat messages for a user"""
-        user_oid = ObjectId(user_id) if isinstance(user_id, str) else user_id
-        return list(cls.collection.find({"user_id": user_oid})
+        return list(cls.collection.find({"user_id": id_filter(user_id)})
                    .sort("created_at", -1)
                    .limit(limit))
 
@@ -45,15 +53,13 @@ class ChatLog:
 
     @classmethod
     def find_by_id(cls, chat_id):
-        return cls.collection.find_one({"_id": ObjectId(chat_id)})
+        return cls.collection.find_one({"_id": id_filter(chat_id)})
     
     @classmethod
     def get_recent_conversations(cls, user_id, limit=10):
         """Get recent unique conversations for a user"""
-        user_oid = ObjectId(user_id) if isinstance(user_id, str) else user_id
-        
         pipeline = [
-            {"$match": {"user_id": user_oid}},
+            {"$match": {"user_id": id_filter(user_id)}},
             {"$sort": {"created_at": -1}},
             {
                 "$group": {
@@ -67,7 +73,10 @@ class ChatLog:
             {"$limit": limit}
         ]
         
-        return list(cls.collection.aggregate(pipeline))
+        conversations = list(cls.collection.aggregate(pipeline))
+        for conversation in conversations:
+            conversation["last_updated"] = isoformat(conversation.get("last_updated"))
+        return conversations
     
     @classmethod
     def get_conversation_context(cls, conversation_id, limit=5):
@@ -84,19 +93,68 @@ class ChatLog:
         
         return context
 
+    @classmethod
+    def ensure_indexes(cls):
+        cls.collection.create_index([("user_id", 1), ("created_at", -1)])
+        cls.collection.create_index([("conversation_id", 1), ("created_at", 1)])
+        if cls.RETENTION_DAYS <= 0:
+            try:
+                cls.collection.drop_index(cls.TTL_INDEX)
+            except OperationFailure:
+                pass  # no TTL index to drop
+            return
+        ttl_seconds = cls.RETENTION_DAYS * 86400
+        try:
+            cls.collection.create_index([("created_at", 1)], name=cls.TTL_INDEX, expireAfterSeconds=ttl_seconds)
+        except OperationFailure:
+            # The index exists with another retention; change it in place
+            cls.collection.database.command(
+                "collMod", cls.collection.name,
+                index={"name": cls.TTL_INDEX, "expireAfterSeconds": ttl_seconds}
+            )
+
+    @classmethod
+    def delete_expired_legacy(cls):
+        """
+        Delete turns older than RETENTION_DAYS whose created_at is a legacy
+        ISO string, which the TTL index ignores. Returns the number deleted.
+        """
+        if cls.RETENTION_DAYS <= 0:
+            return 0
+        cutoff = datetime.utcnow() - timedelta(days=cls.RETENTION_DAYS)
+        # isoformat strings sort chronologically, so a string range works
+        result = cls.collection.delete_many({"created_at": {"$type": "string", "$lt": cutoff.isoformat()}})
+        return result.deleted_count
+
     def save(self):
         self.updated_at = datetime.utcnow()
-        result = self.collection.insert_one(self.to_dict())
+        result = self.collection.insert_one(self.to_document())
         self._id = result.inserted_id
         return result
 
     def update(self, data):
         self.updated_at = datetime.utcnow()
         data["updated_at"] = self.updated_at
-        return self.collection.update_one({"_id": self._id}, {"$set": data})
+        return self.collection.update_one({"_id": id_filter(self._id)}, {"$set": data})
 
     def delete(self):
-        return self.collection.delete_one({"_id": self._id})
+        return self.collection.delete_one({"_id": id_filter(self._id)})
+
+    def to_document(self):
+        """Storage form: native ObjectId/datetime so queries, indexes and the TTL index match."""
+        return {
+            "_id": self._id,
+            "user_id": self.user_id,
+            "conversation_id": self.conversation_id,
+            "message": self.message,
+            "role": self.role,
+            "ai_response": self.ai_response,
+            "context_summary": self.context_summary,
+            "sentiment": self.sentiment,
+            "tokens_used": self.tokens_used,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        }
 
     def to_dict(self):
         return {
@@ -109,15 +167,15 @@ class ChatLog:
             "context_summary": self.context_summary,
             "sentiment": self.sentiment,
             "tokens_used": self.tokens_used,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+            "created_at": isoformat(self.created_at),
+            "updated_at": isoformat(self.updated_at)
         }
 
     @classmethod
     def from_dict(cls, data):
         chat = cls.__new__(cls)
-        chat._id = data.get("_id")
-        chat.user_id = data.get("user_id")
+        chat._id = to_object_id(data.get("_id"))
+        chat.user_id = to_object_id(data.get("user_id"))
         chat.conversation_id = data.get("conversation_id")
         chat.message = data.get("message")
         chat.role = data.get("role", "user")
@@ -125,8 +183,8 @@ class ChatLog:
         chat.context_summary = data.get("context_summary")
         chat.sentiment = data.get("sentiment")
         chat.tokens_used = data.get("tokens_used", 0)
-        chat.created_at = data.get("created_at")
-        chat.updated_at = data.get("updated_at")
+        chat.created_at = parse_datetime(data.get("created_at"))
+        chat.updated_at = parse_datetime(data.get("updated_at"))
         return chat
 
     def __repr__(self):
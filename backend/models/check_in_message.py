@@ -0,0 +1,97 @@
+from backend import mongo
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+from backend.models.ids import isoformat, to_object_id
+from backend.services.events import publish
+
+class CheckInMessage:
+    """
+    Proactive check-in message for a user and day, pre-generated overnight or
+    cached by the first request, so later opens that day are a single read.
+    """
+    collection = mongo.mindbuddy.check_in_messages
+
+    def __init__(self, user_id, message, day, trend=None, source="canned"):
+        self._id = ObjectId()
+        self.user_id = ObjectId(user_id) if isinstance(user_id, str) else user_id
+        self.message = message
+        self.day = day  # 'YYYY-MM-DD' (UTC)
+        self.trend = trend  # trend the message was written for, None for the welcome message
+        self.source = source  # 'llm', 'canned', or 'fallback' (LLM unavailable, not cached)
+        self.created_at = datetime.utcnow()
+
+    @classmethod
+    def find_for_day(cls, user_id, day):
+        return cls.collection.find_one({"user_id": to_object_id(user_id), "day": day})
+
+    @classmethod
+    def find_since(cls, user_id, after_id, since, limit=50):
+        """Messages with _id after after_id for days since `since`, oldest first (event replay)"""
+        return list(cls.collection.find({
+            "user_id": to_object_id(user_id),
+            "day": {"$gte": since.strftime("%Y-%m-%d")},
+            "_id": {"$gt": after_id}
+        }).sort("_id", 1).limit(limit))
+
+    @classmethod
+    def from_dict(cls, data):
+        message = cls.__new__(cls)
+        message._id = data.get("_id")
+        message.user_id = data.get("user_id")
+        message.message = data.get("message")
+        message.day = data.get("day")
+        message.trend = data.get("trend")
+        message.source = data.get("source", "canned")
+        message.created_at = data.get("created_at")
+        return message
+
+    @classmethod
+    def users_with_day(cls, user_ids, day):
+        """Ids (as stored) of the given users that already have a message for `day`"""
+        cursor = cls.collection.find({"user_id": {"$in": list(user_ids)}, "day": day}, {"user_id": 1})
+        return {doc["user_id"] for doc in cursor}
+
+    @classmethod
+    def bulk_create(cls, messages):
+        """Store messages in one round trip, never replacing one that already exists for its day."""
+        if not messages:
+            return None
+        operations = []
+        for message in messages:
+            document = message.to_document()
+            key = {"user_id": document.pop("user_id"), "day": document.pop("day")}
+            operations.append(UpdateOne(key, {"$setOnInsert": document}, upsert=True))
+        result = cls.collection.bulk_write(operations, ordered=False)
+        for i in result.upserted_ids:
+            publish(messages[i].user_id, "check_in", messages[i]._id, messages[i].to_dict())
+        return result
+
+    @classmethod
+    def ensure_indexes(cls):
+        cls.collection.create_index([("user_id", 1), ("day", 1)], unique=True)
+
+    def to_document(self):
+        return {
+            "_id": self._id,
+            "user_id": self.user_id,
+            "message": self.message,
+            "day": self.day,
+            "trend": self.trend,
+            "source": self.source,
+            "created_at": self.created_at
+        }
+
+    def to_dict(self):
+        return {
+            "_id": str(self._id),
+            "user_id": str(self.user_id),
+            "message": self.message,
+            "day": self.day,
+            "trend": self.trend,
+            "source": self.source,
+            "created_at": isoformat(self.created_at)
+        }
+
+    def __repr__(self):
+        return f"<CheckInMessage {self.day} for User {self.user_id}>"
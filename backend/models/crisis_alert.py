@@ -0,0 +1,86 @@
+from backend import mongo
+from datetime import datetime
+from bson import ObjectId
+from backend.models.ids import id_filter, isoformat
+
+class CrisisAlert:
+    """
+    Alert event recorded whenever crisis keywords are detected, so follow-up
+    (support staff, notifications) has one place to look.
+    """
+    collection = mongo.mindbuddy.crisis_alerts
+
+    def __init__(self, user_id, source, crisis_keywords=None, reference_id=None, insight_id=None):
+        self._id = ObjectId()
+        self.user_id = ObjectId(user_id) if isinstance(user_id, str) else user_id
+        self.source = source  # 'chat', 'sentiment', 'journal'
+        self.crisis_keywords = crisis_keywords or []
+        self.reference_id = reference_id  # journal entry / chat log / sentiment record
+        self.insight_id = insight_id  # urgent WellnessInsight written with the alert
+        self.detected_at = datetime.utcnow()
+        self.created_at = datetime.utcnow()
+
+    @classmethod
+    def find_by_user(cls, user_id, limit=20):
+        return list(cls.collection.find({"user_id": id_filter(user_id)})
+                    .sort("created_at", -1)
+                    .limit(limit))
+
+    @classmethod
+    def find_since(cls, user_id, after_id, since, limit=50):
+        """Alerts with _id after after_id created since `since`, oldest first (event replay)"""
+        return list(cls.collection.find({
+            "user_id": id_filter(user_id),
+            "created_at": {"$gte": since},
+            "_id": {"$gt": after_id}
+        }).sort("_id", 1).limit(limit))
+
+    @classmethod
+    def ensure_indexes(cls):
+        cls.collection.create_index([("user_id", 1), ("created_at", -1)])
+
+    def save(self):
+        self.created_at = datetime.utcnow()
+        result = self.collection.insert_one(self.to_document())
+        self._id = result.inserted_id
+        return result
+
+    def to_document(self):
+        return {
+            "_id": self._id,
+            "user_id": self.user_id,
+            "source": self.source,
+            "crisis_keywords": self.crisis_keywords,
+            "reference_id": self.reference_id,
+            "insight_id": self.insight_id,
+            "detected_at": self.detected_at,
+            "created_at": self.created_at
+        }
+
+    def to_dict(self):
+        return {
+            "_id": str(self._id),
+            "user_id": str(self.user_id),
+            "source": self.source,
+            "crisis_keywords": self.crisis_keywords,
+            "reference_id": str(self.reference_id) if self.reference_id else None,
+            "insight_id": str(self.insight_id) if self.insight_id else None,
+            "detected_at": isoformat(self.detected_at),
+            "created_at": isoformat(self.created_at)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        alert = cls.__new__(cls)
+        alert._id = data.get("_id")
+        alert.user_id = data.get("user_id")
+        alert.source = data.get("source")
+        alert.crisis_keywords = data.get("crisis_keywords", [])
+        alert.reference_id = data.get("reference_id")
+        alert.insight_id = data.get("insight_id")
+        alert.detected_at = data.get("detected_at")
+        alert.created_at = data.get("created_at")
+        return alert
+
+    def __repr__(self):
+        return f"<CrisisAlert {self._id}: {self.source} for User {self.user_id}>"
@@ -0,0 +1,53 @@
+"""
+Id, date and content-fingerprint helpers shared by the models.
+
+Older documents were written with string ids and ISO-string dates; current
+ones store native ObjectId/datetime so indexes and range queries work.
+These helpers let lookups match both.
+"""
+
+import hashlib
+from datetime import datetime
+from bson import ObjectId
+
+
+def to_object_id(value):
+    """ObjectId for a valid id string, anything else unchanged."""
+    if isinstance(value, str) and ObjectId.is_valid(value):
+        return ObjectId(value)
+    return value
+
+
+def id_filter(value):
+    """Query value matching an id stored as ObjectId or as its legacy string form."""
+    oid = to_object_id(value)
+    if isinstance(oid, ObjectId):
+        return {"$in": [oid, str(oid)]}
+    return value
+
+
+def parse_datetime(value):
+    """datetime for an ISO string (legacy documents), anything else unchanged."""
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return value
+
+
+def isoformat(value):
+    if value is None:
+        return None
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def utc_day(value=None):
+    """'YYYY-MM-DD' of a datetime (default: now), the key for per-day documents."""
+    return (value or datetime.utcnow()).strftime("%Y-%m-%d")
+
+
+def content_hash(text):
+    """Fingerprint of text, ignoring surrounding and repeated whitespace."""
+    normalized = " ".join((text or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
@@ -0,0 +1,43 @@
+from backend import mongo
+from datetime import datetime
+from pymongo import UpdateOne
+from backend.models.ids import to_object_id
+
+class InsightCounter:
+    """
+    Per-user counts of unread (and not dismissed) insights, one document per
+    user keyed by the user's ObjectId, so badge polling is a single tiny read.
+
+    WellnessInsight keeps them current with $inc when an insight is created,
+    read, dismissed or deleted, and recounts (WellnessInsight.refresh_counters)
+    after bulk changes or for a user who has no counter document yet.
+    """
+    collection = mongo.mindbuddy.insight_counters
+
+    @classmethod
+    def find_by_user(cls, user_id):
+        return cls.collection.find_one({"_id": to_object_id(user_id)})
+
+    @classmethod
+    def increment(cls, user_id, unread, urgent):
+        """Apply a change to an existing counter. False if the user has none yet."""
+        result = cls.collection.update_one(
+            {"_id": to_object_id(user_id)},
+            {"$inc": {"unread": unread, "urgent": urgent}, "$set": {"updated_at": datetime.utcnow()}}
+        )
+        return result.matched_count == 1
+
+    @classmethod
+    def set_many(cls, counts):
+        """Overwrite counters from a recount: {user_id: {"unread": n, "urgent": n}}"""
+        if not counts:
+            return None
+        now = datetime.utcnow()
+        return cls.collection.bulk_write([
+            UpdateOne(
+                {"_id": to_object_id(user_id)},
+                {"$set": {"unread": c["unread"], "urgent": c["urgent"], "updated_at": now}},
+                upsert=True
+            )
+            for user_id, c in counts.items()
+        ], ordered=False)
@@ -0,0 +1,60 @@
+from backend import mongo
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError
+
+class JobLock:
+    """
+    Cluster-wide lease lock, one document per job name, so a scheduled job
+    started by every process runs in only one of them.
+
+    The holder renews expires_at while it works (heartbeat). A holder that
+    dies simply stops renewing: once expires_at passes, anyone may take the
+    lock, and the TTL index removes the abandoned document. Releasing keeps
+    the document (without expires_at) to remember last_completed_at.
+    """
+    collection = mongo.mindbuddy.job_locks
+
+    @classmethod
+    def acquire(cls, name, owner, ttl_seconds):
+        """The lock document if `owner` now holds the lock, None if someone else does."""
+        now = datetime.utcnow()
+        try:
+            cls.collection.update_one(
+                {"_id": name, "$or": [
+                    {"expires_at": None},
+                    {"expires_at": {"$lt": now}},
+                    {"owner": owner}
+                ]},
+                {"$set": {
+                    "owner": owner,
+                    "acquired_at": now,
+                    "heartbeat_at": now,
+                    "expires_at": now + timedelta(seconds=ttl_seconds)
+                }},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # The document exists and is held by another owner, so the upsert tried to insert
+            return None
+        return cls.collection.find_one({"_id": name, "owner": owner})
+
+    @classmethod
+    def renew(cls, name, owner, ttl_seconds):
+        """Heartbeat: extend the lease. False if the lock was lost."""
+        now = datetime.utcnow()
+        result = cls.collection.update_one(
+            {"_id": name, "owner": owner, "expires_at": {"$gte": now}},
+            {"$set": {"heartbeat_at": now, "expires_at": now + timedelta(seconds=ttl_seconds)}}
+        )
+        return result.matched_count == 1
+
+    @classmethod
+    def release(cls, name, owner, completed=False):
+        change = {"$set": {"owner": None}, "$unset": {"expires_at": ""}}
+        if completed:
+            change["$set"]["last_completed_at"] = datetime.utcnow()
+        return cls.collection.update_one({"_id": name, "owner": owner}, change)
+
+    @classmethod
+    def ensure_indexes(cls):
+        cls.collection.create_index([("expires_at", 1)], expireAfterSeconds=0)
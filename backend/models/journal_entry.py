@@ -1,6 +1,8 @@
 from backend import mongo
 from datetime import datetime
 from bson import ObjectId
+from pymongo import UpdateOne
+from backend.models.ids import content_hash, id_filter, isoformat
 
 class JournalEntry:
     collection = mongo.mindbuddy.journal_entries
@@ -10,6 +12,7 @@ class JournalEntry:
         self.user_id = ObjectId(user_id) if isinstance(user_id, str) else user_id
         self.title = title or ""
         self.content = content or ""
+        self.content_hash = content_hash(self.content)
         self.created_at = datetime.utcnow()
         self.updated_at = datetime.utcnow()
         self.is_private = is_private
@@ -19,26 +22,64 @@ class JournalEntry:
 
     @classmethod
     def find_by_user(cls, user_id):
-        user_oid = ObjectId(user_id) if isinstance(user_id, str) else user_id
-        return list(cls.collection.find({"user_id": user_oid}))
+        return list(cls.collection.find({"user_id": id_filter(user_id)}))
 
     @classmethod
     def find_by_id(cls, entry_id):
-        return cls.collection.find_one({"_id": ObjectId(entry_id)})
+        return cls.collection.find_one({"_id": id_filter(entry_id)})
+
+    @classmethod
+    def find_by_content_hash(cls, user_id, fingerprint):
+        """Most recent entry of this user whose text has the given fingerprint"""
+        return cls.collection.find_one(
+            {"user_id": id_filter(user_id), "content_hash": fingerprint},
+            sort=[("updated_at", -1)]
+        )
+
+    @classmethod
+    def ensure_indexes(cls):
+        cls.collection.create_index([("user_id", 1), ("created_at", -1)])
+        cls.collection.create_index([("user_id", 1), ("content_hash", 1)])
+
+    @classmethod
+    def bulk_update(cls, updates):
+        """Apply many {"$set": fields} updates in one round trip. updates: [(entry_id, fields)]"""
+        if not updates:
+            return None
+        return cls.collection.bulk_write(
+            [UpdateOne({"_id": id_filter(entry_id)}, {"$set": fields}) for entry_id, fields in updates],
+            ordered=False,
+        )
 
     def save(self):
         self.updated_at = datetime.utcnow()
-        result = self.collection.insert_one(self.to_dict())
+        result = self.collection.insert_one(self.to_document())
         self._id = result.inserted_id
         return result
 
     def update(self, data):
         self.updated_at = datetime.utcnow()
         data["updated_at"] = self.updated_at
-        return self.collection.update_one({"_id": self._id}, {"$set": data})
+        return self.collection.update_one({"_id": id_filter(self._id)}, {"$set": data})
 
     def delete(self):
-        return self.collection.delete_one({"_id": self._id})
+        return self.collection.delete_one({"_id": id_filter(self._id)})
+
+    def to_document(self):
+        """Storage form: native ObjectId/datetime so queries and indexes match."""
+        return {
+            "_id": self._id,
+            "user_id": self.user_id,
+            "title": self.title,
+            "content": self.content,
+            "content_hash": self.content_hash,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "is_private": self.is_private,
+            "sentiment": self.sentiment,
+            "ai_insights": self.ai_insights,
+            "tags": self.tags
+        }
 
     def to_dict(self):
         # return both snake_case (for backward compatibility) and camelCase (for React)
@@ -49,10 +90,10 @@ class JournalEntry:
             "userId": str(self.user_id),
             "title": self.title,
             "content": self.content,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "createdAt": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-            "updatedAt": self.updated_at.isoformat() if self.updated_at else None,
+            "created_at": isoformat(self.created_at),
+            "createdAt": isoformat(self.created_at),
+            "updated_at": isoformat(self.updated_at),
+            "updatedAt": isoformat(self.updated_at),
             "is_private": self.is_private,
             "isPrivate": self.is_private,
             "sentiment": self.sentiment,
@@ -73,6 +114,7 @@ class JournalEntry:
 
         entry.title = data.get("title", "")
         entry.content = data.get("content", "")
+        entry.content_hash = data.get("content_hash") or content_hash(entry.content)
         entry.is_private = data.get("is_private", data.get("isPrivate", False))
         entry.sentiment = data.get("sentiment")
         entry.ai_insights = data.get("ai_insights") or data.get("aiInsights")
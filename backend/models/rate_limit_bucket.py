@@ -0,0 +1,41 @@
+from backend import mongo
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+
+class RateLimitBucket:
+    """
+    Token bucket state shared by every process and instance (RATE_LIMIT_STORE=mongo),
+    one document per limited key. Refill and take happen in one atomic
+    pipeline update; idle buckets are removed by a TTL index once they would
+    be full again anyway.
+    """
+    collection = mongo.mindbuddy.rate_limits
+
+    @classmethod
+    def take(cls, key, rate, capacity, tokens=1):
+        """Take tokens from the key's bucket. Returns (acquired, seconds until they would be)."""
+        now = datetime.utcnow()
+        elapsed_seconds = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        refilled = {"$min": [capacity, {"$add": [{"$ifNull": ["$tokens", capacity]}, {"$multiply": [elapsed_seconds, rate]}]}]}
+        has_tokens = {"$gte": ["$tokens", tokens]}
+        bucket = cls.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updated_at": now}},
+                # Both fields read the refilled value from the stage above
+                {"$set": {
+                    "acquired": has_tokens,
+                    "tokens": {"$cond": [has_tokens, {"$subtract": ["$tokens", tokens]}, "$tokens"]},
+                    "expires_at": now + timedelta(seconds=capacity / rate)
+                }}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if bucket["acquired"]:
+            return True, 0.0
+        return False, (tokens - bucket["tokens"]) / rate
+
+    @classmethod
+    def ensure_indexes(cls):
+        cls.collection.create_index([("expires_at", 1)], expireAfterSeconds=0)
@@ -0,0 +1,98 @@
+from backend import mongo
+from datetime import datetime, timedelta
+import hashlib
+import os
+import secrets
+from bson import ObjectId
+from pymongo import ReturnDocument
+from backend.models.ids import id_filter
+
+class RefreshToken:
+    """
+    Opaque, single-use refresh tokens. Only a SHA-256 of the token is
+    stored (as _id), so a database leak does not leak sessions.
+
+    Every refresh marks the presented token used and issues a new one in the
+    same family (one family per login). Presenting a used token again means
+    it was stolen or replayed, so the whole family is revoked and that
+    session must log in again. The one exception is a single replay within
+    REUSE_GRACE_SECONDS of the first use (two tabs refreshing at once, a
+    retry after a lost response), which gets one more successor; a token
+    can never fan out into more than two. Expired documents are removed by
+    a TTL index.
+    """
+    collection = mongo.mindbuddy.refresh_tokens
+
+    REUSE_GRACE_SECONDS = int(os.getenv("REFRESH_TOKEN_REUSE_GRACE_SECONDS", 10))
+
+    @staticmethod
+    def _digest(token):
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def issue(cls, user_id, lifetime_days, family_id=None):
+        """Store a new refresh token for the user and return it (the only time it is seen in clear)."""
+        token = secrets.token_urlsafe(32)
+        now = datetime.utcnow()
+        cls.collection.insert_one({
+            "_id": cls._digest(token),
+            "user_id": user_id,
+            "family_id": family_id or ObjectId(),
+            "created_at": now,
+            "expires_at": now + timedelta(days=lifetime_days),
+            "used_at": None,
+            "revoked": False
+        })
+        return token
+
+    @classmethod
+    def spend(cls, token):
+        """
+        Mark `token` used and return its document (user_id, family_id), or None
+        if it is unknown, expired, revoked or was already used (apart from one
+        replay within the grace window). The caller issues the successor in
+        the same family.
+        """
+        digest = cls._digest(token)
+        now = datetime.utcnow()
+        spent = cls.collection.find_one_and_update(
+            {"_id": digest, "used_at": None, "revoked": False, "expires_at": {"$gt": now}},
+            {"$set": {"used_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+        if spent is None and cls.REUSE_GRACE_SECONDS > 0:
+            # One replay within the grace window gets a successor too; any other reuse is theft
+            spent = cls.collection.find_one_and_update(
+                {"_id": digest, "revoked": False, "expires_at": {"$gt": now}, "reissued": {"$ne": True},
+                 "used_at": {"$gte": now - timedelta(seconds=cls.REUSE_GRACE_SECONDS)}},
+                {"$set": {"reissued": True}},
+                return_document=ReturnDocument.AFTER
+            )
+        if spent is None:
+            existing = cls.collection.find_one({"_id": digest}, {"family_id": 1, "used_at": 1})
+            if existing and existing.get("used_at"):
+                cls.revoke_family(existing["family_id"])
+        return spent
+
+    @classmethod
+    def revoke(cls, token):
+        """Log out the session the token belongs to."""
+        existing = cls.collection.find_one({"_id": cls._digest(token)}, {"family_id": 1})
+        if existing:
+            cls.revoke_family(existing["family_id"])
+        return existing is not None
+
+    @classmethod
+    def revoke_family(cls, family_id):
+        return cls.collection.update_many({"family_id": family_id}, {"$set": {"revoked": True}})
+
+    @classmethod
+    def revoke_user(cls, user_id):
+        """Log out every session of the user (e.g. after a password change)."""
+        return cls.collection.update_many({"user_id": id_filter(user_id)}, {"$set": {"revoked": True}})
+
+    @classmethod
+    def ensure_indexes(cls):
+        cls.collection.create_index([("family_id", 1)])
+        cls.collection.create_index([("user_id", 1)])
+        cls.collection.create_index([("expires_at", 1)], expireAfterSeconds=0)
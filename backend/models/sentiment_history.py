@@ -1,16 +1,28 @@
 from backend import mongo
-from datetime import datetime
+from datetime import datetime, timedelta
+import os
 from bson import ObjectId
+from pymongo import DeleteMany, UpdateOne
+from backend.models.ids import id_filter, isoformat, parse_datetime, to_object_id
+from backend.models.sentiment_summary import SentimentMonthlySummary
+from backend.models.sentiment_trend import LABELS, SentimentTrend
 
 class SentimentHistory:
     """
     Model to store sentiment analysis results from journal entries.
     Tracks emotional patterns over time for insights and crisis detection.
+
+    Records are kept for RETENTION_DAYS (SENTIMENT_HISTORY_RETENTION_DAYS,
+    default 400; 0 keeps them forever). Older whole months are rolled up into
+    SentimentMonthlySummary and deleted by archive_expired. Keep it above
+    365 so the history and trend endpoints (at most a year) see every record.
     """
     collection = mongo.mindbuddy.sentiment_history
 
+    RETENTION_DAYS = int(os.getenv("SENTIMENT_HISTORY_RETENTION_DAYS", 400))
+
     def __init__(self, user_id, journal_entry_id=None, sentiment_label=None, 
-                 sentiment_scores=None, detected_emotions=None, crisis_flag=False):
+                 sentiment_scores=None, detected_emotions=None, crisis_flag=False, content_hash=None):
         self._id = ObjectId()
         self.user_id = ObjectId(user_id) if isinstance(user_id, str) else user_id
         self.journal_entry_id = ObjectId(journal_entry_id) if isinstance(journal_entry_id, str) and journal_entry_id else journal_entry_id
@@ -23,6 +35,9 @@ class SentimentHistory:
         # Crisis detection
         self.crisis_flag = crisis_flag
         self.crisis_keywords = []  # Keywords that triggered crisis detection
+
+        # Fingerprint of the analyzed text, to skip re-analysis of unchanged content
+        self.content_hash = content_hash
         
         self.created_at = datetime.utcnow()
         self.updated_at = datetime.utcnow()
@@ -30,8 +45,7 @@ class SentimentHistory:
     @classmethod
     def find_by_user(cls, user_id, limit=None, days=None):
         """Find sentiment history for a user, optionally limited or filtered by days"""
-        user_oid = ObjectId(user_id) if isinstance(user_id, str) else user_id
-        query = {"user_id": user_oid}
+        query = {"user_id": id_filter(user_id)}
         
         if days:
             from datetime import timedelta
@@ -46,18 +60,42 @@ class SentimentHistory:
 
     @classmethod
     def find_by_id(cls, sentiment_id):
-        return cls.collection.find_one({"_id": ObjectId(sentiment_id)})
+        return cls.collection.find_one({"_id": id_filter(sentiment_id)})
     
     @classmethod
     def find_by_journal_entry(cls, journal_entry_id):
         """Find sentiment for a specific journal entry"""
-        entry_oid = ObjectId(journal_entry_id) if isinstance(journal_entry_id, str) else journal_entry_id
-        return cls.collection.find_one({"journal_entry_id": entry_oid})
+        return cls.collection.find_one({"journal_entry_id": id_filter(journal_entry_id)})
     
+    @classmethod
+    def find_by_content_hash(cls, user_id, fingerprint):
+        """Most recent analysis of this user's text with the given fingerprint"""
+        return cls.collection.find_one(
+            {"user_id": id_filter(user_id), "content_hash": fingerprint},
+            sort=[("created_at", -1)]
+        )
+
+    @classmethod
+    def content_hashes_for_entries(cls, journal_entry_ids):
+        """{journal_entry_id: content_hash} for entries that were already analyzed"""
+        ids = [to_object_id(i) for i in journal_entry_ids]
+        cursor = cls.collection.find(
+            {"journal_entry_id": {"$in": ids}},
+            {"journal_entry_id": 1, "content_hash": 1}
+        )
+        return {str(doc["journal_entry_id"]): doc.get("content_hash") for doc in cursor}
+
+    @classmethod
+    def ensure_indexes(cls):
+        cls.collection.create_index([("user_id", 1), ("created_at", -1)])
+        cls.collection.create_index([("journal_entry_id", 1)])
+        cls.collection.create_index([("user_id", 1), ("content_hash", 1)])
+        cls.collection.create_index([("created_at", 1)])  # archive_expired
+
     @classmethod
     def get_recent_crisis_flags(cls, user_id, days=7):
         """Get recent crisis flags for a user"""
-        user_oid = ObjectId(user_id) if isinstance(user_id, str) else user_id
+        user_oid = id_filter(user_id)
         from datetime import timedelta
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
@@ -70,7 +108,7 @@ class SentimentHistory:
     @classmethod
     def get_sentiment_trends(cls, user_id, days=30):
         """Get sentiment trends for analytics"""
-        user_oid = ObjectId(user_id) if isinstance(user_id, str) else user_id
+        user_oid = id_filter(user_id)
         from datetime import timedelta
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
@@ -92,19 +130,142 @@ class SentimentHistory:
         
         return list(cls.collection.aggregate(pipeline))
 
+    @classmethod
+    def bulk_upsert_for_entries(cls, histories):
+        """
+        Write one sentiment record per journal entry in a single round trip,
+        replacing the scores of an entry that was analyzed before.
+        """
+        if not histories:
+            return None
+        operations = []
+        for history in histories:
+            document = history.to_document()
+            created_at = document.pop("created_at")
+            _id = document.pop("_id")
+            operations.append(UpdateOne(
+                {"journal_entry_id": history.journal_entry_id},
+                {"$set": document, "$setOnInsert": {"_id": _id, "created_at": created_at}},
+                upsert=True,
+            ))
+        result = cls.collection.bulk_write(operations, ordered=False)
+
+        # Only entries analyzed for the first time are new observations for the
+        # trend state; a re-analyzed edit replaces its record and is not counted again
+        SentimentTrend.record_many([
+            (h.user_id, h.sentiment_label, h.sentiment_scores, h.created_at)
+            for i, h in enumerate(histories) if i in result.upserted_ids
+        ])
+        return result
+
+    @classmethod
+    def archive_expired(cls, batch_size=500):
+        """
+        Roll up whole months older than RETENTION_DAYS into one summary per
+        user and month, then delete their records. Summaries are written
+        with $setOnInsert before the delete, so a run interrupted in between
+        is finished by the next one without counting anything twice.
+        Returns (months archived, records deleted).
+        """
+        if cls.RETENTION_DAYS <= 0:
+            return 0, 0
+        now = datetime.utcnow()
+        cutoff = (now - timedelta(days=cls.RETENTION_DAYS)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+        group = {
+            "_id": {"user_id": "$user_id", "year": {"$year": "$created_at"}, "month": {"$month": "$created_at"}},
+            "count": {"$sum": 1},
+            "crisis_count": {"$sum": {"$cond": [{"$eq": ["$crisis_flag", True]}, 1, 0]}},
+            "first_at": {"$min": "$created_at"},
+            "last_at": {"$max": "$created_at"},
+        }
+        for label in LABELS:
+            is_label = {"$eq": ["$sentiment_label", label]}
+            group[f"{label}_count"] = {"$sum": {"$cond": [is_label, 1, 0]}}
+            for score in ("positive", "negative"):
+                group[f"{label}_{score}_sum"] = {
+                    "$sum": {"$cond": [is_label, {"$ifNull": [f"$sentiment_scores.{score}", 0]}, 0]}
+                }
+        cursor = cls.collection.aggregate(
+            [{"$match": {"created_at": {"$lt": cutoff}}}, {"$group": group}],
+            allowDiskUse=True
+        )
+
+        months = records = 0
+        batch = []
+        for row in cursor:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                records += cls._archive_months(batch, now)
+                months += len(batch)
+                batch = []
+        if batch:
+            records += cls._archive_months(batch, now)
+            months += len(batch)
+        return months, records
+
+    @classmethod
+    def _archive_months(cls, rows, now):
+        summaries = []
+        deletes = []
+        for row in rows:
+            key = row["_id"]
+            start = datetime(key["year"], key["month"], 1)
+            end = datetime(key["year"] + key["month"] // 12, key["month"] % 12 + 1, 1)
+            summary = {
+                "count": row["count"],
+                "labels": {
+                    label: {
+                        "count": row[f"{label}_count"],
+                        "positive_sum": row[f"{label}_positive_sum"],
+                        "negative_sum": row[f"{label}_negative_sum"]
+                    }
+                    for label in LABELS if row[f"{label}_count"]
+                },
+                "crisis_count": row["crisis_count"],
+                "first_at": row["first_at"],
+                "last_at": row["last_at"],
+                "archived_at": now
+            }
+            summaries.append(UpdateOne(
+                {"user_id": key["user_id"], "month": start.strftime("%Y-%m")},
+                {"$setOnInsert": summary},
+                upsert=True
+            ))
+            deletes.append(DeleteMany({"user_id": key["user_id"], "created_at": {"$gte": start, "$lt": end}}))
+        SentimentMonthlySummary.collection.bulk_write(summaries, ordered=False)
+        return cls.collection.bulk_write(deletes, ordered=False).deleted_count
+
     def save(self):
         self.updated_at = datetime.utcnow()
-        result = self.collection.insert_one(self.to_dict())
+        result = self.collection.insert_one(self.to_document())
         self._id = result.inserted_id
+        SentimentTrend.record(self.user_id, self.sentiment_label, self.sentiment_scores, self.created_at)
         return result
 
     def update(self, data):
         self.updated_at = datetime.utcnow()
         data["updated_at"] = self.updated_at
-        return self.collection.update_one({"_id": self._id}, {"$set": data})
+        return self.collection.update_one({"_id": id_filter(self._id)}, {"$set": data})
 
     def delete(self):
-        return self.collection.delete_one({"_id": self._id})
+        return self.collection.delete_one({"_id": id_filter(self._id)})
+
+    def to_document(self):
+        """Storage form: native ObjectId/datetime so queries and indexes match."""
+        return {
+            "_id": self._id,
+            "user_id": self.user_id,
+            "journal_entry_id": self.journal_entry_id,
+            "sentiment_label": self.sentiment_label,
+            "sentiment_scores": self.sentiment_scores,
+            "detected_emotions": self.detected_emotions,
+            "crisis_flag": self.crisis_flag,
+            "crisis_keywords": self.crisis_keywords,
+            "content_hash": self.content_hash,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        }
 
     def to_dict(self):
         return {
@@ -116,23 +277,24 @@ class SentimentHistory:
             "detected_emotions": self.detected_emotions,
             "crisis_flag": self.crisis_flag,
             "crisis_keywords": self.crisis_keywords,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+            "created_at": isoformat(self.created_at),
+            "updated_at": isoformat(self.updated_at)
         }
 
     @classmethod
     def from_dict(cls, data):
         sentiment = cls.__new__(cls)
-        sentiment._id = data.get("_id")
-        sentiment.user_id = data.get("user_id")
-        sentiment.journal_entry_id = data.get("journal_entry_id")
+        sentiment._id = to_object_id(data.get("_id"))
+        sentiment.user_id = to_object_id(data.get("user_id"))
+        sentiment.journal_entry_id = to_object_id(data.get("journal_entry_id"))
         sentiment.sentiment_label = data.get("sentiment_label")
         sentiment.sentiment_scores = data.get("sentiment_scores", {})
         sentiment.detected_emotions = data.get("detected_emotions", [])
         sentiment.crisis_flag = data.get("crisis_flag", False)
         sentiment.crisis_keywords = data.get("crisis_keywords", [])
-        sentiment.created_at = data.get("created_at")
-        sentiment.updated_at = data.get("updated_at")
+        sentiment.content_hash = data.get("content_hash")
+        sentiment.created_at = parse_datetime(data.get("created_at"))
+        sentiment.updated_at = parse_datetime(data.get("updated_at"))
         return sentiment
 
     def __repr__(self):
@@ -0,0 +1,46 @@
+from backend import mongo
+from pymongo.errors import CollectionInvalid, OperationFailure
+from backend.models.ids import id_filter, isoformat
+
+class SentimentMonthlySummary:
+    """
+    Archived sentiment history: one compact document per user and month,
+    rolled up from sentiment_history records older than the retention window
+    before they are deleted (SentimentHistory.archive_expired).
+
+    Label stats have the same shape as SentimentTrend's day buckets:
+    {label: {count, positive_sum, negative_sum}}. The collection is created
+    with zstd block compression since it is written once and rarely read.
+    """
+    collection = mongo.mindbuddy.sentiment_monthly_summaries
+
+    @classmethod
+    def find_by_user(cls, user_id, limit=12):
+        """Most recent archived months first"""
+        return list(cls.collection.find({"user_id": id_filter(user_id)})
+                   .sort("month", -1)
+                   .limit(limit))
+
+    @classmethod
+    def ensure_indexes(cls):
+        try:
+            cls.collection.database.create_collection(
+                cls.collection.name,
+                storageEngine={"wiredTiger": {"configString": "block_compressor=zstd"}}
+            )
+        except (CollectionInvalid, OperationFailure):
+            pass  # already exists
+        cls.collection.create_index([("user_id", 1), ("month", -1)], unique=True)
+
+    @staticmethod
+    def to_dict(document):
+        return {
+            "user_id": str(document["user_id"]),
+            "month": document["month"],
+            "count": document.get("count", 0),
+            "labels": document.get("labels", {}),
+            "crisis_count": document.get("crisis_count", 0),
+            "first_at": isoformat(document.get("first_at")),
+            "last_at": isoformat(document.get("last_at")),
+            "archived_at": isoformat(document.get("archived_at"))
+        }
@@ -0,0 +1,191 @@
+from backend import mongo
+from datetime import datetime, timedelta
+import os
+from bson import ObjectId
+from pymongo import UpdateOne
+from backend.models.ids import to_object_id
+from backend.services.sentiment_service import negative_intensity
+
+LABELS = ("positive", "negative", "neutral")
+
+
+class SentimentTrend:
+    """
+    Rolling sentiment state, one document per user, so trend lookups are a
+    single fetch instead of re-scanning sentiment_history.
+
+    Each new sentiment record updates it in O(1) with one atomic pipeline
+    update: an exponentially weighted negative intensity, the current streak of
+    negative records, the latest record, and per-day label buckets (count and
+    score sums) keyed by date. Buckets older than WINDOW_DAYS are pruned when
+    the state is read.
+    """
+    collection = mongo.mindbuddy.sentiment_trends
+
+    EWMA_ALPHA = float(os.getenv("SENTIMENT_EWMA_ALPHA", 0.3))
+    WINDOW_DAYS = int(os.getenv("SENTIMENT_TREND_WINDOW_DAYS", 90))
+
+    @classmethod
+    def find_by_user(cls, user_id):
+        return cls.collection.find_one({"_id": to_object_id(user_id)})
+
+    @classmethod
+    def find_by_users(cls, user_ids):
+        """{user _id: state} for the given users (one query)"""
+        ids = [to_object_id(i) for i in user_ids]
+        return {doc["_id"]: doc for doc in cls.collection.find({"_id": {"$in": ids}})}
+
+    @staticmethod
+    def recent_records(state, days=7):
+        """[latest sentiment record] if it is from the last `days` days, else []"""
+        last = (state or {}).get("last")
+        if last and last.get("created_at", datetime.min) >= datetime.utcnow() - timedelta(days=days):
+            return [last]
+        return []
+
+    @classmethod
+    def record(cls, user_id, sentiment_label, sentiment_scores, created_at=None):
+        """Fold one sentiment record into the user's trend state."""
+        return cls.collection.update_one(*cls._update_args(user_id, sentiment_label, sentiment_scores, created_at))
+
+    @classmethod
+    def record_many(cls, records):
+        """records: [(user_id, sentiment_label, sentiment_scores, created_at)], applied in order."""
+        if not records:
+            return None
+        operations = [UpdateOne(*cls._update_args(*record)) for record in records]
+        return cls.collection.bulk_write(operations, ordered=True)
+
+    @classmethod
+    def rebuild(cls, user_id, attempts=3):
+        """
+        Recreate a user's state from sentiment_history (users with history from
+        before trend state existed). The window is replayed in chronological
+        order, through the same pipeline update as record(), into a scratch
+        document that is then inserted only if the user still has no state.
+        If a record() created one meanwhile, it is replaced only while no
+        further record lands, so a concurrent record is never lost. Users
+        without history get an empty state, so the scan happens only once.
+        """
+        user_oid = to_object_id(user_id)
+        current = None
+        for _ in range(attempts):
+            state = cls._replay(user_oid)
+            if current is None:
+                result = cls.collection.update_one({"_id": user_oid}, {"$setOnInsert": state}, upsert=True)
+                written = result.upserted_id is not None
+            else:
+                written = cls.collection.replace_one(
+                    {"_id": user_oid, "total_records": current.get("total_records")}, state
+                ).matched_count
+            if written:
+                return cls.find_by_user(user_oid)
+            current = cls.find_by_user(user_oid)
+            if current is not None and current.get("rebuilt_at"):
+                return current  # another request rebuilt it first
+        return current
+
+    @classmethod
+    def _replay(cls, user_oid):
+        """The user's state rebuilt from sentiment_history (without _id)."""
+        from backend.models.sentiment_history import SentimentHistory
+        history = SentimentHistory.find_by_user(user_oid, days=cls.WINDOW_DAYS)
+        scratch = ObjectId()
+        try:
+            cls.record_many([
+                (scratch, h.get("sentiment_label"), h.get("sentiment_scores") or {}, h.get("created_at"))
+                for h in reversed(history)
+                if isinstance(h.get("created_at"), datetime)
+            ])
+        finally:
+            state = cls.collection.find_one_and_delete({"_id": scratch}) or {}
+        state.pop("_id", None)
+        now = datetime.utcnow()
+        state.update({
+            "user_id": user_oid,
+            "total_records": state.get("total_records", 0),
+            "days": state.get("days", {}),
+            "rebuilt_at": now,
+            "updated_at": now,
+        })
+        return state
+
+    @classmethod
+    def find_or_rebuild(cls, user_id):
+        state = cls.find_by_user(user_id)
+        if state is None:
+            state = cls.rebuild(user_id)
+        return cls._prune(state) if state else state
+
+    @classmethod
+    def _update_args(cls, user_id, sentiment_label, sentiment_scores, created_at=None):
+        user_oid = to_object_id(user_id)
+        created_at = created_at or datetime.utcnow()
+        label = sentiment_label if sentiment_label in LABELS else "neutral"
+        scores = sentiment_scores or {}
+        positive = float(scores.get("positive", 0) or 0)
+        # -compound rather than the word-share 'negative' score, so averages
+        # and the EWMA are on the scale NEGATIVE_HIGH_INTENSITY is set for
+        negative = negative_intensity(scores)
+        alpha = cls.EWMA_ALPHA
+
+        # Today's bucket for this label; dotted paths so the other days are untouched
+        bucket = f"days.{cls._day(created_at)}.{label}"
+        counters = {"count": 1, "positive_sum": positive, "negative_sum": negative}
+
+        pipeline = [{"$set": {
+            "user_id": user_oid,
+            "ewma_negative": {"$add": [
+                alpha * negative,
+                {"$multiply": [1 - alpha, {"$ifNull": ["$ewma_negative", negative]}]},
+            ]},
+            "consecutive_negative": (
+                {"$add": [{"$ifNull": ["$consecutive_negative", 0]}, 1]} if label == "negative" else 0
+            ),
+            "total_records": {"$add": [{"$ifNull": ["$total_records", 0]}, 1]},
+            "last": {"$literal": {"sentiment_label": label, "sentiment_scores": scores, "created_at": created_at}},
+            "updated_at": datetime.utcnow(),
+            **{
+                f"{bucket}.{name}": {"$add": [{"$ifNull": [f"${bucket}.{name}", 0]}, value]}
+                for name, value in counters.items()
+            },
+        }}]
+        return {"_id": user_oid}, pipeline, True
+
+    @classmethod
+    def window_counts(cls, state, days):
+        """Label counts and score sums over the last `days` days of a state document."""
+        totals = {name: {"count": 0, "positive_sum": 0.0, "negative_sum": 0.0} for name in LABELS}
+        if not state:
+            return totals
+        cutoff = cls._day(datetime.utcnow() - timedelta(days=days - 1))
+        for day, bucket in (state.get("days") or {}).items():
+            if day < cutoff:
+                continue
+            for name, values in bucket.items():
+                for key in totals.get(name, {}):
+                    totals[name][key] += values.get(key, 0)
+        return totals
+
+    @classmethod
+    def distribution(cls, state, days):
+        """Per-label counts over the last `days` days, shaped like SentimentHistory.get_sentiment_trends."""
+        return [
+            {"_id": name, "count": c["count"], "avg_score": c["positive_sum"] / c["count"]}
+            for name, c in cls.window_counts(state, days).items() if c["count"]
+        ]
+
+    @classmethod
+    def _prune(cls, state):
+        """Drop day buckets that fell out of the window."""
+        cutoff = cls._day(datetime.utcnow() - timedelta(days=cls.WINDOW_DAYS - 1))
+        expired = [day for day in (state.get("days") or {}) if day < cutoff]
+        if expired:
+            cls.collection.update_one({"_id": state["_id"]}, {"$unset": {f"days.{day}": "" for day in expired}})
+            for day in expired:
+                del state["days"][day]
+        return state
+
+    @staticmethod
+    def _day(value):
+        return value.strftime("%Y-%m-%d")
@@ -0,0 +1,164 @@
+from backend import mongo
+from datetime import datetime, timedelta
+from bson import ObjectId
+import random
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from backend.models.ids import id_filter
+
+class Task:
+    """
+    Durable background task, run by `python -m backend.worker`.
+
+    Lifecycle: queued -> running -> done, or back to queued with a backoff
+    delay after a failure, or dead once max_attempts is used up. A worker
+    claims a task with one atomic find_one_and_update and holds a lease on
+    it, renewed while the task runs; a task whose lease expired (worker
+    crashed) is claimed again, or dead-lettered if that was its last attempt.
+    """
+    collection = mongo.mindbuddy.tasks
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    DEAD = "dead"
+
+    BACKOFF_BASE_SECONDS = 5
+    BACKOFF_MAX_SECONDS = 3600
+
+    @classmethod
+    def enqueue(cls, name, payload=None, priority=0, delay_seconds=0, max_attempts=5, dedupe_key=None):
+        """
+        Queue a task; higher priority runs first. With dedupe_key, a task
+        that is still queued or running under the same key is not queued twice.
+        Returns the task id.
+        """
+        now = datetime.utcnow()
+        document = {
+            "_id": ObjectId(),
+            "name": name,
+            "payload": payload or {},
+            "status": cls.QUEUED,
+            "priority": priority,
+            "run_at": now + timedelta(seconds=delay_seconds),
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "last_error": None,
+            "worker": None,
+            "lease_expires_at": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        if dedupe_key:
+            document["dedupe_key"] = dedupe_key
+        try:
+            return cls.collection.insert_one(document).inserted_id
+        except DuplicateKeyError:
+            existing = cls.collection.find_one({"dedupe_key": dedupe_key}, {"_id": 1})
+            return existing["_id"] if existing else None
+
+    @classmethod
+    def claim(cls, worker_id, lease_seconds, names=None):
+        """
+        Atomically take the next runnable task (or one whose lease expired). None if idle.
+        A task reclaimed after its last attempt's lease expired (its worker
+        kept crashing on it) is dead-lettered instead of being run again.
+        """
+        while True:
+            now = datetime.utcnow()
+            query = {"$or": [
+                {"status": cls.QUEUED, "run_at": {"$lte": now}},
+                {"status": cls.RUNNING, "lease_expires_at": {"$lt": now}},
+            ]}
+            if names:
+                query["name"] = {"$in": list(names)}
+            task = cls.collection.find_one_and_update(
+                query,
+                {
+                    "$set": {
+                        "status": cls.RUNNING,
+                        "worker": worker_id,
+                        "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                        "updated_at": now
+                    },
+                    "$inc": {"attempts": 1}
+                },
+                sort=[("priority", -1), ("run_at", 1)],
+                return_document=ReturnDocument.AFTER
+            )
+            if task is None or task["attempts"] <= task.get("max_attempts", 1):
+                return task
+            cls.collection.update_one(
+                {"_id": task["_id"], "worker": worker_id},
+                {"$set": {"status": cls.DEAD, "lease_expires_at": None, "finished_at": now, "updated_at": now,
+                          "last_error": task.get("last_error") or "Lease expired on the final attempt"},
+                 "$unset": {"dedupe_key": ""}}
+            )
+
+    @classmethod
+    def _lease(cls, task):
+        """Matches the task only while this claim of it (worker and attempt) still holds the lease."""
+        return {"_id": task["_id"], "worker": task["worker"], "attempts": task["attempts"], "status": cls.RUNNING}
+
+    @classmethod
+    def extend_lease(cls, task, lease_seconds):
+        """Keep a long-running task from being reclaimed. False if another worker took it over."""
+        result = cls.collection.update_one(
+            cls._lease(task),
+            {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=lease_seconds)}}
+        )
+        return result.modified_count == 1
+
+    @classmethod
+    def complete(cls, task):
+        now = datetime.utcnow()
+        # dedupe_key is dropped so the same key can be queued again
+        return cls.collection.update_one(
+            cls._lease(task),
+            {"$set": {"status": cls.DONE, "lease_expires_at": None, "finished_at": now, "updated_at": now},
+             "$unset": {"dedupe_key": ""}}
+        )
+
+    @classmethod
+    def fail(cls, task, error):
+        """Schedule a retry with exponential backoff and jitter, or dead-letter the task."""
+        now = datetime.utcnow()
+        update = {"last_error": str(error)[:2000], "lease_expires_at": None, "updated_at": now}
+        unset = {}
+        if task["attempts"] >= task.get("max_attempts", 1):
+            update.update(status=cls.DEAD, finished_at=now)
+            unset["dedupe_key"] = ""
+        else:
+            backoff = min(cls.BACKOFF_MAX_SECONDS, cls.BACKOFF_BASE_SECONDS * 2 ** (task["attempts"] - 1))
+            update.update(status=cls.QUEUED, run_at=now + timedelta(seconds=backoff * random.uniform(0.5, 1.0)))
+        change = {"$set": update}
+        if unset:
+            change["$unset"] = unset
+        cls.collection.update_one(cls._lease(task), change)
+        return update["status"]
+
+    @classmethod
+    def requeue_dead(cls, task_id):
+        """Give a dead-lettered task a fresh set of attempts."""
+        now = datetime.utcnow()
+        return cls.collection.update_one(
+            {"_id": id_filter(task_id), "status": cls.DEAD},
+            {"$set": {"status": cls.QUEUED, "attempts": 0, "run_at": now, "updated_at": now}}
+        )
+
+    @classmethod
+    def counts(cls):
+        """{status: number of tasks}"""
+        return {doc["_id"]: doc["count"] for doc in cls.collection.aggregate([
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ])}
+
+    @classmethod
+    def ensure_indexes(cls):
+        cls.collection.create_index([("status", 1), ("priority", -1), ("run_at", 1)])
+        cls.collection.create_index([("status", 1), ("lease_expires_at", 1)])
+        cls.collection.create_index(
+            [("dedupe_key", 1)],
+            unique=True,
+            partialFilterExpression={"dedupe_key": {"$type": "string"}}
+        )
@@ -1,4 +1,4 @@
-from backend import mongo, bcrypt
+from backend import mongo
 from datetime import datetime
 from bson import ObjectId
 
@@ -43,6 +43,27 @@ class User:
         logger.debug("find_by_id result (string): %s", result)
         return result
 
+    @classmethod
+    def record_login(cls, user_id):
+        return cls.collection.update_one({"_id": user_id}, {"$set": {"last_login_at": datetime.utcnow()}})
+
+    @classmethod
+    def iter_active_ids(cls, since, batch_size=500):
+        """Yield lists of ids of users who logged in since `since`, batch_size at a time"""
+        cursor = cls.collection.find({"last_login_at": {"$gte": since}}, {"_id": 1}).batch_size(batch_size)
+        batch = []
+        for doc in cursor:
+            batch.append(doc["_id"])
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @classmethod
+    def ensure_indexes(cls):
+        cls.collection.create_index([("last_login_at", -1)])
+
     def save(self):
         self.updated_at = datetime.utcnow()
         result = self.collection.insert_one(self.to_dict())
@@ -58,10 +79,35 @@ class User:
         return self.collection.delete_one({"_id": self._id})
 
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode("utf-8")
+        from backend.services.passwords import get_password_hasher
+        self.password_hash = get_password_hasher().hash(password)
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        from backend.services.passwords import get_password_hasher
+        return get_password_hasher().check(self.password_hash, password)
+
+    def rehash_password_if_needed(self, password):
+        """
+        After a successful check: re-hash with the current BCRYPT_LOG_ROUNDS if
+        the stored hash used another cost. Best effort: the hash runs in the
+        background, and is skipped when the hashing pool is busy (the next
+        login tries again). The write only applies while the stored hash is
+        unchanged, so a concurrent password change wins. True if scheduled.
+        """
+        from backend.services.passwords import get_password_hasher
+        hasher = get_password_hasher()
+        if not hasher.needs_rehash(self.password_hash):
+            return False
+        old_hash = self.password_hash
+        user_id = self._id
+
+        def store(new_hash):
+            self.collection.update_one(
+                {"_id": user_id, "password_hash": old_hash},
+                {"$set": {"password_hash": new_hash}}
+            )
+
+        return hasher.hash_in_background(password, store)
 
     def to_dict(self):
         return {
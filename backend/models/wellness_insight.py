@@ -1,6 +1,9 @@
 from backend import mongo
-from datetime import datetime
+from datetime import datetime, timezone
 from bson import ObjectId
+from backend.models.ids import id_filter, isoformat, parse_datetime, to_object_id, utc_day
+from backend.models.insight_counter import InsightCounter
+from backend.services.events import publish
 
 class WellnessInsight:
     """
@@ -9,6 +12,8 @@ class WellnessInsight:
     """
     collection = mongo.mindbuddy.wellness_insights
 
+    URGENT_PRIORITIES = ("high", "urgent")
+
     def __init__(self, user_id, insight_type, insight_text, 
                  recommendation=None, activity_suggestion=None, priority='normal'):
         self._id = ObjectId()
@@ -28,6 +33,7 @@ class WellnessInsight:
         # Context for generation
         self.based_on_sentiment = None  # Sentiment that triggered this insight
         self.based_on_pattern = None  # Pattern detected (e.g., "3 consecutive negative days")
+        self.day = None  # 'YYYY-MM-DD' (UTC) for daily tips, unique per user
         
         self.created_at = datetime.utcnow()
         self.updated_at = datetime.utcnow()
@@ -36,8 +42,7 @@ class WellnessInsight:
     @classmethod
     def find_by_user(cls, user_id, limit=10, unread_only=False):
         """Find insights for a user"""
-        user_oid = ObjectId(user_id) if isinstance(user_id, str) else user_id
-        query = {"user_id": user_oid, "is_dismissed": False}
+        query = {"user_id": id_filter(user_id), "is_dismissed": False}
         
         if unread_only:
             query["is_read"] = False
@@ -46,43 +51,146 @@ class WellnessInsight:
                    .sort("created_at", -1)
                    .limit(limit))
 
+    @classmethod
+    def find_unread_since(cls, user_id, after_id, since, limit=50):
+        """Unread insights with _id after after_id created since `since`, oldest first (event replay)"""
+        return list(cls.collection.find({
+            "user_id": id_filter(user_id),
+            "is_read": False,
+            "is_dismissed": False,
+            "created_at": {"$gte": since},
+            "_id": {"$gt": after_id}
+        }).sort("_id", 1).limit(limit))
+
+    @classmethod
+    def last_created_at(cls, user_id, insight_type):
+        """When the user's latest insight of this type was created (dismissed ones included), or None"""
+        doc = cls.collection.find_one(
+            {"user_id": id_filter(user_id), "insight_type": insight_type},
+            {"created_at": 1},
+            sort=[("created_at", -1)]
+        )
+        if not doc:
+            return None
+        created_at = parse_datetime(doc.get("created_at"))
+        if created_at is not None and created_at.tzinfo is not None:
+            # Legacy ISO strings may carry an offset; compare as naive UTC like utcnow()
+            created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+        return created_at
+
+    @classmethod
+    def ensure_indexes(cls):
+        cls.collection.create_index([("user_id", 1), ("is_dismissed", 1), ("created_at", -1)])
+        cls.collection.create_index([("user_id", 1), ("insight_type", 1), ("created_at", -1)])
+        # Only unread insights: the per-user unread queries and the auto-read sweep
+        # scan these small ranges instead of each user's full history
+        cls.collection.create_index(
+            [("user_id", 1), ("created_at", -1)],
+            name="unread_by_user",
+            partialFilterExpression={"is_read": False}
+        )
+        cls.collection.create_index(
+            [("created_at", 1)],
+            name="unread_by_age",
+            partialFilterExpression={"is_read": False}
+        )
+        # One daily tip per user and day; only daily tips carry a day
+        cls.collection.create_index(
+            [("user_id", 1), ("day", 1)],
+            unique=True,
+            partialFilterExpression={"day": {"$type": "string"}}
+        )
+
     @classmethod
     def find_by_id(cls, insight_id):
-        return cls.collection.find_one({"_id": ObjectId(insight_id)})
+        return cls.collection.find_one({"_id": id_filter(insight_id)})
     
     @classmethod
     def get_urgent_insights(cls, user_id):
         """Get urgent/high priority insights for a user"""
-        user_oid = ObjectId(user_id) if isinstance(user_id, str) else user_id
+        user_oid = id_filter(user_id)
         return list(cls.collection.find({
             "user_id": user_oid,
-            "priority": {"$in": ["high", "urgent"]},
+            "priority": {"$in": list(cls.URGENT_PRIORITIES)},
             "is_read": False,
             "is_dismissed": False
         }).sort("created_at", -1))
     
     @classmethod
     def get_daily_insight(cls, user_id):
-        """Get the most recent daily insight for a user"""
-        user_oid = ObjectId(user_id) if isinstance(user_id, str) else user_id
-        from datetime import timedelta
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        
+        """Get today's daily insight for a user"""
         return cls.collection.find_one({
-            "user_id": user_oid,
-            "insight_type": "daily_tip",
-            "created_at": {"$gte": today_start},
-            "is_dismissed": False
+            "user_id": id_filter(user_id),
+            "day": cls.today()
         })
+
+    @classmethod
+    def get_or_create_daily(cls, insight):
+        """
+        Today's daily insight for insight.user_id: the existing one, or `insight`
+        stored atomically as the day's tip. Concurrent callers all get the same
+        document. Returns (document, created).
+        """
+        from pymongo import ReturnDocument
+        from pymongo.errors import DuplicateKeyError
+        insight.day = insight.day or cls.today()
+        document = insight.to_document()
+        key = {"user_id": document.pop("user_id"), "day": document.pop("day")}
+        for attempt in range(2):
+            try:
+                stored = cls.collection.find_one_and_update(
+                    key,
+                    {"$setOnInsert": document},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+                created = stored["_id"] == insight._id
+                if created:
+                    cls._count(insight.user_id, insight.priority, 1)
+                    publish(insight.user_id, "insight", stored["_id"], cls.from_dict(stored).to_dict())
+                return stored, created
+            except DuplicateKeyError:
+                # Lost an insert race on the unique (user_id, day) index; the winner's doc exists now
+                if attempt:
+                    raise
+
+    @classmethod
+    def users_with_daily(cls, user_ids, day):
+        """Ids (as stored) of the given users that already have a daily tip for `day`"""
+        cursor = cls.collection.find({"user_id": {"$in": list(user_ids)}, "day": day}, {"user_id": 1})
+        return {doc["user_id"] for doc in cursor}
+
+    @classmethod
+    def bulk_create_daily(cls, insights):
+        """get_or_create_daily for many users in one round trip (existing tips are kept)."""
+        if not insights:
+            return None
+        from pymongo import UpdateOne
+        operations = []
+        for insight in insights:
+            insight.day = insight.day or cls.today()
+            document = insight.to_document()
+            key = {"user_id": document.pop("user_id"), "day": document.pop("day")}
+            operations.append(UpdateOne(key, {"$setOnInsert": document}, upsert=True))
+        result = cls.collection.bulk_write(operations, ordered=False)
+        if result.upserted_ids:
+            cls.refresh_counters({insights[i].user_id for i in result.upserted_ids})
+            for i in result.upserted_ids:
+                publish(insights[i].user_id, "insight", insights[i]._id, insights[i].to_dict())
+        return result
+
+    @staticmethod
+    def today():
+        return utc_day()
     
     @classmethod
     def mark_old_insights_as_read(cls, user_id, days=7):
         """Mark old insights as read automatically"""
-        user_oid = ObjectId(user_id) if isinstance(user_id, str) else user_id
+        user_oid = id_filter(user_id)
         from datetime import timedelta
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
-        return cls.collection.update_many(
+        result = cls.collection.update_many(
             {
                 "user_id": user_oid,
                 "created_at": {"$lte": cutoff_date},
@@ -95,34 +203,147 @@ class WellnessInsight:
                 }
             }
         )
+        if result.modified_count:
+            cls.refresh_counters([user_id])
+        return result
+
+    @classmethod
+    def mark_stale_as_read(cls, days=7, batch_size=1000):
+        """
+        Mark every user's unread insights older than `days` as read, in batches
+        of at most batch_size documents so no single update holds the
+        collection for long. Returns the number of insights marked.
+        """
+        from datetime import timedelta
+        now = datetime.utcnow()
+        query = {"is_read": False, "created_at": {"$lte": now - timedelta(days=days)}}
+        marked = 0
+        while True:
+            docs = list(cls.collection.find(query, {"_id": 1, "user_id": 1})
+                        .sort("created_at", 1)
+                        .limit(batch_size))
+            if not docs:
+                return marked
+            ids = [doc["_id"] for doc in docs]
+            result = cls.collection.update_many(
+                {"_id": {"$in": ids}, "is_read": False},
+                {"$set": {"is_read": True, "read_at": now}}
+            )
+            marked += result.modified_count
+            cls.refresh_counters({doc["user_id"] for doc in docs})
+            if len(ids) < batch_size:
+                return marked
+
+    @classmethod
+    def unread_counts(cls, user_id):
+        """{"unread": n, "urgent": n} from the user's InsightCounter (recounted if missing)"""
+        counter = InsightCounter.find_by_user(user_id)
+        if counter is None:
+            counter = cls.refresh_counters([user_id])[to_object_id(user_id)]
+        return {"unread": counter.get("unread", 0), "urgent": counter.get("urgent", 0)}
+
+    @classmethod
+    def refresh_counters(cls, user_ids):
+        """Recount unread and urgent insights of the given users into their InsightCounters."""
+        oids = {to_object_id(user_id) for user_id in user_ids}
+        counts = {oid: {"unread": 0, "urgent": 0} for oid in oids}
+        cursor = cls.collection.aggregate([
+            {"$match": {
+                "user_id": {"$in": list(oids) + [str(oid) for oid in oids]},
+                "is_read": False,
+                "is_dismissed": False
+            }},
+            {"$group": {
+                "_id": "$user_id",
+                "unread": {"$sum": 1},
+                "urgent": {"$sum": {"$cond": [{"$in": ["$priority", list(cls.URGENT_PRIORITIES)]}, 1, 0]}}
+            }}
+        ])
+        for row in cursor:
+            # Legacy string user ids are counted together with the ObjectId form
+            count = counts[to_object_id(row["_id"])]
+            count["unread"] += row["unread"]
+            count["urgent"] += row["urgent"]
+        InsightCounter.set_many(counts)
+        return counts
+
+    @classmethod
+    def _count(cls, user_id, priority, delta):
+        """Add delta to the user's unread counts for an insight of this priority."""
+        urgent = delta if priority in cls.URGENT_PRIORITIES else 0
+        if not InsightCounter.increment(user_id, delta, urgent):
+            cls.refresh_counters([user_id])
 
     def save(self):
         self.updated_at = datetime.utcnow()
-        result = self.collection.insert_one(self.to_dict())
+        result = self.collection.insert_one(self.to_document())
         self._id = result.inserted_id
+        if not self.is_read and not self.is_dismissed:
+            self._count(self.user_id, self.priority, 1)
+        publish(self.user_id, "insight", self._id, self.to_dict())
         return result
 
     def update(self, data):
         self.updated_at = datetime.utcnow()
         data["updated_at"] = self.updated_at
-        return self.collection.update_one({"_id": self._id}, {"$set": data})
+        return self.collection.update_one({"_id": id_filter(self._id)}, {"$set": data})
     
     def mark_as_read(self):
         """Mark insight as read"""
         self.is_read = True
         self.read_at = datetime.utcnow()
-        return self.update({
-            "is_read": True,
-            "read_at": self.read_at
-        })
+        self.updated_at = datetime.utcnow()
+        # Conditional on the stored state, so reading twice counts once
+        before = self.collection.find_one_and_update(
+            {"_id": id_filter(self._id), "is_read": False},
+            {"$set": {"is_read": True, "read_at": self.read_at, "updated_at": self.updated_at}},
+            projection={"user_id": 1, "priority": 1, "is_dismissed": 1}
+        )
+        if before and not before.get("is_dismissed"):
+            self._count(before["user_id"], before.get("priority"), -1)
+        return before
     
     def dismiss(self):
         """Dismiss/hide insight"""
         self.is_dismissed = True
-        return self.update({"is_dismissed": True})
+        self.updated_at = datetime.utcnow()
+        before = self.collection.find_one_and_update(
+            {"_id": id_filter(self._id), "is_dismissed": False},
+            {"$set": {"is_dismissed": True, "updated_at": self.updated_at}},
+            projection={"user_id": 1, "priority": 1, "is_read": 1}
+        )
+        if before and not before.get("is_read"):
+            self._count(before["user_id"], before.get("priority"), -1)
+        return before
 
     def delete(self):
-        return self.collection.delete_one({"_id": self._id})
+        before = self.collection.find_one_and_delete(
+            {"_id": id_filter(self._id)},
+            projection={"user_id": 1, "priority": 1, "is_read": 1, "is_dismissed": 1}
+        )
+        if before and not before.get("is_read") and not before.get("is_dismissed"):
+            self._count(before["user_id"], before.get("priority"), -1)
+        return before
+
+    def to_document(self):
+        """Storage form: native ObjectId/datetime so queries and indexes match."""
+        return {
+            "_id": self._id,
+            "user_id": self.user_id,
+            "insight_type": self.insight_type,
+            "insight_text": self.insight_text,
+            "recommendation": self.recommendation,
+            "activity_suggestion": self.activity_suggestion,
+            "priority": self.priority,
+            "is_read": self.is_read,
+            "is_dismissed": self.is_dismissed,
+            "based_on_sentiment": self.based_on_sentiment,
+            "based_on_pattern": self.based_on_pattern,
+            "day": self.day,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "read_at": self.read_at
+        }
 
     def to_dict(self):
         return {
@@ -137,16 +358,17 @@ class WellnessInsight:
             "is_dismissed": self.is_dismissed,
             "based_on_sentiment": self.based_on_sentiment,
             "based_on_pattern": self.based_on_pattern,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-            "read_at": self.read_at.isoformat() if self.read_at else None
+            "day": self.day,
+            "created_at": isoformat(self.created_at),
+            "updated_at": isoformat(self.updated_at),
+            "read_at": isoformat(self.read_at)
         }
 
     @classmethod
     def from_dict(cls, data):
         insight = cls.__new__(cls)
-        insight._id = data.get("_id")
-        insight.user_id = data.get("user_id")
+        insight._id = to_object_id(data.get("_id"))
+        insight.user_id = to_object_id(data.get("user_id"))
         insight.insight_type = data.get("insight_type")
         insight.insight_text = data.get("insight_text")
         insight.recommendation = data.get("recommendation")
@@ -156,9 +378,10 @@ class WellnessInsight:
         insight.is_dismissed = data.get("is_dismissed", False)
         insight.based_on_sentiment = data.get("based_on_sentiment")
         insight.based_on_pattern = data.get("based_on_pattern")
-        insight.created_at = data.get("created_at")
-        insight.updated_at = data.get("updated_at")
-        insight.read_at = data.get("read_at")
+        insight.day = data.get("day")
+        insight.created_at = parse_datetime(data.get("created_at"))
+        insight.updated_at = parse_datetime(data.get("updated_at"))
+        insight.read_at = parse_datetime(data.get("read_at"))
         return insight
 
     def __repr__(self):
@@ -5,8 +5,13 @@ Conversational AI assistant (Sereni) endpoints.
 
 from flask import Blueprint, request, jsonify, current_app
 from backend.decorators import token_required
-from backend.models import ChatLog, SentimentHistory
+from backend.models import ChatLog, CheckInMessage, SentimentTrend
+from backend.models.ids import utc_day
+from backend.services.check_ins import compose_check_in
+from backend.services.crisis_lane import get_crisis_lane
 from backend.services.llm_service import get_llm_service
+from backend.services.prompts import CRISIS_RESPONSE
+from backend.services.keyword_engine import scan
 from backend.services.sentiment_service import get_sentiment_analyzer
 import traceback
 
@@ -35,6 +40,10 @@ def send_message(current_user):
         message_sentiment = analyzer.analyze_sentiment(message)
         sentiment_label = message_sentiment.get('sentiment_label', 'neutral')
         
+        # Crisis: answer with the crisis protocol right away, never behind the LLM
+        if message_sentiment.get('crisis_flag'):
+            return _crisis_reply(current_user, message, conversation_id, message_sentiment)
+        
         # Get conversation context if conversation_id provided
         context = []
         if conversation_id:
@@ -60,12 +69,10 @@ def send_message(current_user):
         messages.append({"role": "user", "content": message})
 
         # Generate response
-        ai_response = llm_service.generate_response(messages)
+        ai_response = llm_service.generate_response(messages, purpose="chat")
 
         # Check for crisis keywords in response
-        requires_help = any(keyword in ai_response.lower() for keyword in [
-            'suicide', 'kill yourself', 'seek professional help', 'emergency services'
-        ])
+        requires_help = scan(ai_response).has("help_referral")
 
         response_data = {
             'response': ai_response,
@@ -198,41 +205,18 @@ def proactive_check_in(current_user):
     try:
         current_app.logger.info(f"Generating proactive check-in for user: {current_user._id}")
         
-        # Get recent sentiment trends
-        sentiment_records = SentimentHistory.find_by_user(str(current_user._id), limit=10, days=7)
-        
-        if not sentiment_records or len(sentiment_records) == 0:
-            # New user or no recent data
-            message = (
-                "Welcome! I'm Sereni, your mental wellness companion. "
-                "I'm here to support you on your wellness journey. "
-                "How are you feeling today?"
-            )
+        # Pre-generated overnight, or cached by today's first request
+        day = utc_day()
+        cached = CheckInMessage.find_for_day(str(current_user._id), day)
+        if cached:
+            message = cached["message"]
         else:
-            # Analyze trends and generate appropriate message
-            analyzer = get_sentiment_analyzer()
-            trend_analysis = analyzer.analyze_sentiment_trend(sentiment_records)
-            
-            # Use LLM service for proactive check-in
-            llm_service = get_llm_service()
-            if llm_service:
-                # Generate a personalized message based on trends
-                trend_message = f"Based on your recent mood patterns, you seem to be {trend_analysis.get('trend', 'stable')}. "
-                if trend_analysis.get('risk_level') == 'high':
-                    trend_message += "I'm here if you'd like to talk about what's been going on."
-                elif trend_analysis.get('trend') == 'improving':
-                    trend_message += "It's great to see things looking up! How are you feeling today?"
-                else:
-                    trend_message += "How are you doing today?"
-
-                messages = [{"role": "user", "content": trend_message}]
-                message = llm_service.generate_response(messages)
-            else:
-                message = (
-                    "Welcome! I'm Sereni, your mental wellness companion. "
-                    "I'm here to support you on your wellness journey. "
-                    "How are you feeling today?"
-                )
+            check_in = compose_check_in(
+                str(current_user._id), SentimentTrend.find_or_rebuild(str(current_user._id)), day
+            )
+            if check_in.source != "fallback":
+                CheckInMessage.bulk_create([check_in])
+            message = check_in.message
         
         return jsonify({
             "message": message,
@@ -242,3 +226,31 @@ def proactive_check_in(current_user):
     except Exception as e:
         current_app.logger.error(f"Proactive check-in error: {e}\n{traceback.format_exc()}")
         return jsonify({"message": "Internal server error"}), 500
+
+
+def _crisis_reply(current_user, message, conversation_id, message_sentiment):
+    """Crisis protocol response; the support insight and alert are written by the crisis lane."""
+    chat_log = ChatLog(
+        user_id=str(current_user._id),
+        message=message,
+        role='user',
+        ai_response=CRISIS_RESPONSE,
+        conversation_id=conversation_id
+    )
+    chat_log.sentiment = message_sentiment.get('sentiment_label', 'neutral')
+
+    get_crisis_lane().report(
+        str(current_user._id), "chat", message_sentiment.get('crisis_keywords', []),
+        reference_id=chat_log._id
+    )
+    chat_log.save()
+
+    return jsonify({
+        "conversation_id": conversation_id or chat_log.conversation_id,
+        "user_message": message,
+        "ai_response": CRISIS_RESPONSE,
+        "sentiment": chat_log.sentiment,
+        "source": "crisis_protocol",
+        "requires_professional_help": True,
+        "chat_id": str(chat_log._id)
+    }), 200
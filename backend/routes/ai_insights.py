@@ -5,8 +5,10 @@ Wellness insights and recommendations endpoints.
 
 from flask import Blueprint, request, jsonify, current_app
 from backend.decorators import token_required
-from backend.models import WellnessInsight, SentimentHistory
+from backend.models import WellnessInsight, SentimentTrend, JournalEntry
+from backend.models.ids import content_hash
 from backend.services.insights_service import get_insights_generator
+from backend.services.sentiment_service import get_sentiment_analyzer, negative_intensity
 import traceback
 
 insights_bp = Blueprint("ai_insights", __name__)
@@ -67,6 +69,26 @@ def get_urgent_insights(current_user):
         return jsonify({"message": "Internal server error"}), 500
 
 
+@insights_bp.route("/counts", methods=["GET"])
+@token_required
+def get_insight_counts(current_user):
+    """
+    Unread and urgent insight counts for badges (one counter document read).
+    GET /api/insights/counts
+    """
+    try:
+        counts = WellnessInsight.unread_counts(str(current_user._id))
+        return jsonify({
+            "unread": counts["unread"],
+            "urgent": counts["urgent"],
+            "has_urgent": counts["urgent"] > 0
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Get insight counts error: {e}\n{traceback.format_exc()}")
+        return jsonify({"message": "Internal server error"}), 500
+
+
 @insights_bp.route("/daily", methods=["GET"])
 @token_required
 def get_daily_insight(current_user):
@@ -77,44 +99,35 @@ def get_daily_insight(current_user):
     try:
         current_app.logger.info(f"Fetching daily insight for user: {current_user._id}")
         
-        # Check for existing daily insight
-        daily_insight = WellnessInsight.get_daily_insight(str(current_user._id))
-        
-        if daily_insight:
+        # Today's tip usually exists already (pre-generated or an earlier visit): one indexed read
+        existing = WellnessInsight.get_daily_insight(str(current_user._id))
+        if existing:
             return jsonify({
-                "insight": WellnessInsight.from_dict(daily_insight).to_dict(),
+                "insight": WellnessInsight.from_dict(existing).to_dict(),
                 "is_new": False
             }), 200
         
-        # Generate new daily insight
         insights_gen = get_insights_generator()
         
-        # Get recent sentiment for personalization
-        recent_sentiment = SentimentHistory.find_by_user(
-            str(current_user._id),
-            limit=5,
-            days=7
-        )
-        
+        # Personalize with the most recent sentiment of the past week
         insight_data = insights_gen.generate_daily_insight(
             str(current_user._id),
-            sentiment_history=recent_sentiment
+            sentiment_history=SentimentTrend.recent_records(SentimentTrend.find_by_user(str(current_user._id)))
         )
         
-        # Save the insight
-        new_insight = WellnessInsight(
+        # Stored only if the user has no tip for today yet; otherwise today's existing tip comes back
+        daily_insight, is_new = WellnessInsight.get_or_create_daily(WellnessInsight(
             user_id=str(current_user._id),
             insight_type=insight_data['insight_type'],
             insight_text=insight_data['insight_text'],
             recommendation=insight_data.get('recommendation'),
             activity_suggestion=insight_data.get('activity_suggestion'),
             priority=insight_data['priority']
-        )
-        new_insight.save()
+        ))
         
         return jsonify({
-            "insight": new_insight.to_dict(),
-            "is_new": True
+            "insight": WellnessInsight.from_dict(daily_insight).to_dict(),
+            "is_new": is_new
         }), 200
         
     except Exception as e:
@@ -208,30 +221,25 @@ def generate_insight(current_user):
 
         insights_gen = get_insights_generator()
 
-        # Get recent sentiment data
-        sentiment_records = SentimentHistory.find_by_user(
-            str(current_user._id),
-            limit=10,
-            days=7
-        )
+        # Recent sentiment, from the user's trend state
+        state = SentimentTrend.find_or_rebuild(str(current_user._id))
 
         insight_data = None
 
-        if insight_type == "mood_pattern" and len(sentiment_records) >= 2:
+        if insight_type == "mood_pattern":
             # Generate mood pattern insight
-            insight_data = insights_gen.analyze_mood_patterns(sentiment_records)
+            trend_analysis = get_sentiment_analyzer().trend_from_state(state, days=7)
+            insight_data = insights_gen.analyze_mood_trend(trend_analysis)
 
         elif insight_type == "wellness_recommendation":
             # Generate wellness recommendation based on most recent sentiment
-            if sentiment_records and len(sentiment_records) > 0:
-                recent = sentiment_records[0]
+            recent_records = SentimentTrend.recent_records(state)
+            if recent_records:
+                recent = recent_records[0]
                 sentiment_label = recent.get('sentiment_label', 'neutral')
-                sentiment_scores = recent.get('sentiment_scores', {})
-                score = sentiment_scores.get(sentiment_label, 0)
-
                 insight_data = insights_gen.generate_wellness_recommendation(
                     sentiment_label,
-                    score
+                    negative_intensity(recent.get('sentiment_scores'))
                 )
             else:
                 # No sentiment data, generate generic recommendation
@@ -290,31 +298,38 @@ def analyze_journal_entry(current_user):
 
         current_app.logger.info("Received journal entry for analysis")
 
+        # Same text as one of the user's entries that already has an LLM insight: reuse it
+        fingerprint = content_hash(entry_text)
+        journal_entry = JournalEntry.find_by_content_hash(str(current_user._id), fingerprint)
+        if (journal_entry and journal_entry.get("ai_insights_source") == "llm"
+                and journal_entry.get("ai_insights_hash") == fingerprint):
+            return jsonify({"insight": journal_entry["ai_insights"], "cached": True}), 200
+
         # Import LLM service
-        from backend.services.llm_service import get_llm_service
+        from backend.services.llm_service import PURPOSE_FALLBACKS, get_llm_service
         llm = get_llm_service()
+        if llm is None:
+            return jsonify({"error": "LLM service not available"}), 503
 
         # Construct the structured AI prompt
-        prompt = f"""You are Sereni, a warm, empathetic wellness companion.
-Analyze the following journal entry and provide gentle, helpful insights.
-
-Focus on:
-- The user's emotional tone and state
-- Possible underlying thoughts or stressors
-- One short motivational message
-- One practical self-care suggestion
-
-Journal Entry:
-"{entry_text}"
-"""
+        from backend.services.prompts import build_journal_analysis_prompt
+        prompt = build_journal_analysis_prompt(entry_text)
 
         # Generate insight using LLM
         messages = [{"role": "user", "content": prompt}]
-        insight = llm.generate_response(messages)
+        insight = llm.generate_response(messages, purpose="journal_analysis")
 
         current_app.logger.info("Generated insight successfully")
 
-        return jsonify({"insight": insight}), 200
+        # Remember it on the matching entry (fallback replies are not worth keeping)
+        if journal_entry and insight != PURPOSE_FALLBACKS["journal_analysis"]:
+            JournalEntry.bulk_update([(journal_entry["_id"], {
+                "ai_insights": insight,
+                "ai_insights_source": "llm",
+                "ai_insights_hash": fingerprint
+            })])
+
+        return jsonify({"insight": insight, "cached": False}), 200
 
     except Exception as e:
         current_app.logger.error(f"Error generating insight: {e}\n{traceback.format_exc()}")
@@ -5,9 +5,12 @@ Provides sentiment analysis for journal entries and mood tracking.
 
 from flask import Blueprint, request, jsonify, current_app
 from backend.decorators import token_required
-from backend.models import SentimentHistory, JournalEntry, WellnessInsight
-from backend.services.sentiment_service import get_sentiment_analyzer
+from backend.models import SentimentHistory, SentimentTrend, JournalEntry, WellnessInsight
+from backend.models.ids import content_hash
+from backend.services.crisis_lane import get_crisis_lane
+from backend.services.sentiment_service import get_sentiment_analyzer, negative_intensity
 from backend.services.insights_service import get_insights_generator
+from backend.services.prompts import is_crisis_message
 import traceback
 
 sentiment_bp = Blueprint("ai_sentiment", __name__)
@@ -28,6 +31,25 @@ def analyze_sentiment(current_user):
         if not text:
             return jsonify({"message": "Text is required"}), 400
         
+        # Unchanged text: return the stored analysis instead of scoring and saving it again.
+        # Crisis text is always analyzed so it reaches the crisis lane every time
+        fingerprint = content_hash(text)
+        if is_crisis_message(text):
+            previous = None
+        elif journal_entry_id:
+            previous = SentimentHistory.find_by_journal_entry(journal_entry_id)
+            if previous and (previous.get("content_hash") != fingerprint
+                             or str(previous.get("user_id")) != str(current_user._id)):
+                previous = None
+        else:
+            previous = SentimentHistory.find_by_content_hash(str(current_user._id), fingerprint)
+        if previous and not previous.get("crisis_flag"):
+            return jsonify({
+                "sentiment": SentimentHistory.from_dict(previous).to_dict(),
+                "insights": [],
+                "cached": True
+            }), 200
+
         current_app.logger.info(f"Analyzing sentiment for user: {current_user._id}")
         
         # Get sentiment analyzer
@@ -43,41 +65,30 @@ def analyze_sentiment(current_user):
             sentiment_label=sentiment_result['sentiment_label'],
             sentiment_scores=sentiment_result['sentiment_scores'],
             detected_emotions=sentiment_result['detected_emotions'],
-            crisis_flag=sentiment_result['crisis_flag']
+            crisis_flag=sentiment_result['crisis_flag'],
+            content_hash=fingerprint
         )
         sentiment_history.crisis_keywords = sentiment_result['crisis_keywords']
-        sentiment_history.save()
         
         # Generate insights if needed
         insights_generated = []
         insights_gen = get_insights_generator()
         
-        # Check for crisis and generate urgent insight
+        # Crisis: the urgent insight and alert go through the crisis lane, ahead of everything else
         if sentiment_result['crisis_flag']:
-            current_app.logger.warning(f"Crisis detected for user {current_user._id}")
-            
-            crisis_insight_data = insights_gen.generate_crisis_support_insight(
-                sentiment_result['crisis_keywords']
+            crisis_insight = get_crisis_lane().report(
+                str(current_user._id), "sentiment", sentiment_result['crisis_keywords'],
+                reference_id=sentiment_history._id
             )
-            
-            crisis_insight = WellnessInsight(
-                user_id=str(current_user._id),
-                insight_type=crisis_insight_data['insight_type'],
-                insight_text=crisis_insight_data['insight_text'],
-                recommendation=crisis_insight_data['recommendation'],
-                activity_suggestion=crisis_insight_data['activity_suggestion'],
-                priority=crisis_insight_data['priority']
-            )
-            crisis_insight.based_on_pattern = crisis_insight_data['based_on_pattern']
-            crisis_insight.save()
-            
             insights_generated.append(crisis_insight.to_dict())
         
+        sentiment_history.save()
+        
         # Generate wellness recommendation based on sentiment
-        elif sentiment_result['sentiment_label'] == 'negative':
+        if not sentiment_result['crisis_flag'] and sentiment_result['sentiment_label'] == 'negative':
             recommendation_data = insights_gen.generate_wellness_recommendation(
                 sentiment_result['sentiment_label'],
-                sentiment_result['sentiment_scores'].get('negative', 0)
+                negative_intensity(sentiment_result['sentiment_scores'])
             )
             
             wellness_insight = WellnessInsight(
@@ -95,7 +106,8 @@ def analyze_sentiment(current_user):
         
         return jsonify({
             "sentiment": sentiment_history.to_dict(),
-            "insights": insights_generated
+            "insights": insights_generated,
+            "cached": False
         }), 200
         
     except Exception as e:
@@ -103,6 +115,43 @@ def analyze_sentiment(current_user):
         return jsonify({"message": "Internal server error"}), 500
 
 
+@sentiment_bp.route("/analyze/batch", methods=["POST"])
+@token_required
+def analyze_sentiment_batch(current_user):
+    """
+    Analyze sentiment of many texts in one call (e.g. re-scoring journal history).
+    Results are returned in input order and are not saved to sentiment history.
+    POST /api/sentiment/analyze/batch
+    Body: { "texts": ["first entry", "second entry", ...] }
+    """
+    try:
+        data = request.get_json() or {}
+        texts = data.get("texts")
+
+        if not isinstance(texts, list) or not texts:
+            return jsonify({"message": "texts must be a non-empty list"}), 400
+        if not all(isinstance(t, str) for t in texts):
+            return jsonify({"message": "Every item in texts must be a string"}), 400
+
+        max_texts = current_app.config.get("SENTIMENT_BATCH_MAX_TEXTS", 1000)
+        if len(texts) > max_texts:
+            return jsonify({"message": f"At most {max_texts} texts per request"}), 413
+
+        current_app.logger.info(f"Batch sentiment analysis of {len(texts)} texts for user: {current_user._id}")
+
+        analyzer = get_sentiment_analyzer()
+        results = analyzer.analyze_batch(texts)
+
+        return jsonify({
+            "results": results,
+            "count": len(results)
+        }), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Batch sentiment analysis error: {e}\n{traceback.format_exc()}")
+        return jsonify({"message": "Internal server error"}), 500
+
+
 @sentiment_bp.route("/history", methods=["GET"])
 @token_required
 def get_sentiment_history(current_user):
@@ -150,34 +199,33 @@ def get_sentiment_trends(current_user):
         
         current_app.logger.info(f"Analyzing sentiment trends for user: {current_user._id}")
         
-        # Get sentiment history
-        sentiment_records = SentimentHistory.find_by_user(
-            str(current_user._id),
-            days=days
-        )
-        
-        if not sentiment_records or len(sentiment_records) < 2:
+        analyzer = get_sentiment_analyzer()
+        insights_gen = get_insights_generator()
+
+        if days <= SentimentTrend.WINDOW_DAYS:
+            # One document read instead of re-scanning the user's history
+            state = SentimentTrend.find_or_rebuild(str(current_user._id))
+            trend_analysis = analyzer.trend_from_state(state, days)
+            trends_data = SentimentTrend.distribution(state, days)
+        else:
+            sentiment_records = SentimentHistory.find_by_user(str(current_user._id), days=days)
+            trend_analysis = analyzer.analyze_sentiment_trend(sentiment_records)
+            trends_data = SentimentHistory.get_sentiment_trends(str(current_user._id), days=days)
+
+        if trend_analysis.get('total_entries', 0) < 2:
             return jsonify({
                 "message": "Not enough data for trend analysis",
                 "trend": None
             }), 200
         
-        # Analyze trends
-        analyzer = get_sentiment_analyzer()
-        trend_analysis = analyzer.analyze_sentiment_trend(sentiment_records)
-        
-        # Get aggregated data
-        trends_data = SentimentHistory.get_sentiment_trends(str(current_user._id), days=days)
-        
         # Generate pattern insight if significant pattern detected
-        insights_gen = get_insights_generator()
-        pattern_insight = insights_gen.analyze_mood_patterns(sentiment_records)
+        pattern_insight = insights_gen.analyze_mood_trend(trend_analysis)
         
         # Save pattern insight if appropriate
         if pattern_insight and trend_analysis.get('risk_level') != 'low':
-            existing_insights = WellnessInsight.find_by_user(str(current_user._id), limit=10)
+            last_generated_at = WellnessInsight.last_created_at(str(current_user._id), 'mood_pattern')
             
-            if insights_gen.should_generate_insight(existing_insights, 'mood_pattern'):
+            if insights_gen.should_generate_insight(last_generated_at, 'mood_pattern'):
                 mood_insight = WellnessInsight(
                     user_id=str(current_user._id),
                     insight_type=pattern_insight['insight_type'],
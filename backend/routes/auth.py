@@ -1,8 +1,10 @@
 # backend/routes/auth.py
 from flask import Blueprint, request, jsonify, current_app
-from backend.models import User
-from backend.decorators import token_required
-import jwt, datetime, traceback, time
+from backend.models import RefreshToken, User
+from backend.decorators import rate_limited, token_required
+from backend.services.auth_tokens import issue_session
+from backend.services.passwords import PasswordHasherBusyError
+import traceback, time
 
 auth = Blueprint("auth", __name__)
 
@@ -25,6 +27,7 @@ def _extract_email_password(data):
 
 
 @auth.route("/register", methods=["POST"])
+@rate_limited("register")
 def register():
     try:
         current_app.logger.info("Register request received")
@@ -56,6 +59,8 @@ def register():
         current_app.logger.info("User registered successfully: user_id=%s, email=%s", str(new_user._id), email)
         return jsonify({"message": "User created successfully", "user": serialize_doc(new_user.to_dict())}), 201
 
+    except PasswordHasherBusyError:
+        return jsonify({"message": "Server busy, try again shortly"}), 503, {"Retry-After": "1"}
     except Exception as e:
         current_app.logger.error("Register error for email: %s - %s\n%s", email if 'email' in locals() else 'unknown', e, traceback.format_exc())
         return jsonify({"message": "Internal server error"}), 500
@@ -80,18 +85,22 @@ def change_password(current_user):
         if len(new_password) < 8:
             return jsonify({"message": "New password must be at least 8 characters long"}), 400
 
-        # Update password
+        # Update password and end every other session
         current_user.set_password(new_password)
         current_user.update({"password_hash": current_user.password_hash})
+        RefreshToken.revoke_user(current_user._id)
 
-        return jsonify({"message": "Password changed successfully"}), 200
+        return jsonify({"message": "Password changed successfully", **issue_session(current_user._id)}), 200
 
+    except PasswordHasherBusyError:
+        return jsonify({"message": "Server busy, try again shortly"}), 503, {"Retry-After": "1"}
     except Exception as e:
         current_app.logger.error("Change password error: %s\n%s", e, traceback.format_exc())
         return jsonify({"message": "Internal server error"}), 500
 
 
 @auth.route("/login", methods=["POST"])
+@rate_limited("login")
 def login():
     try:
         data = request.get_json(silent=True) or request.form or {}
@@ -116,17 +125,67 @@ def login():
         if not password_ok:
             return jsonify({"message": "Invalid credentials"}), 401
 
-        payload = {
-            "user_id": str(user._id),
-            "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=24),
-        }
+        # Upgrade hashes made with an older BCRYPT_LOG_ROUNDS while the password is at hand
+        if user.rehash_password_if_needed(password):
+            current_app.logger.info("Password rehash with the current cost scheduled for user_id=%s", str(user._id))
 
-        token = jwt.encode(payload, current_app.config["SECRET_KEY"], algorithm="HS256")
+        # Marks the user active for the nightly pre-generation job
+        User.record_login(user_data["_id"])
+
+        session = issue_session(user_data["_id"])
 
         current_app.logger.info("User login successful: user_id=%s, email=%s, _id type=%s", str(user._id), user.email, type(user._id))
         current_app.logger.debug("User _id details: str(user._id)=%s, repr(user._id)=%s", str(user._id), repr(user._id))
-        return jsonify({"token": token, "user": serialize_doc(user.to_dict())}), 200
+        return jsonify({**session, "user": serialize_doc(user.to_dict())}), 200
 
+    except PasswordHasherBusyError:
+        return jsonify({"message": "Server busy, try again shortly"}), 503, {"Retry-After": "1"}
     except Exception as e:
         current_app.logger.error("Login error: %s\n%s", e, traceback.format_exc())
         return jsonify({"message": "Internal server error"}), 500
+
+
+@auth.route("/refresh", methods=["POST"])
+def refresh():
+    """
+    Exchange a refresh token for a new access token and refresh token,
+    without a password check. Each refresh token works once.
+    POST /api/auth/refresh  { refresh_token }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        refresh_token = data.get("refresh_token")
+        if not refresh_token:
+            return jsonify({"message": "refresh_token is required"}), 400
+
+        spent = RefreshToken.spend(refresh_token)
+        if spent is None:
+            return jsonify({"message": "Refresh token is invalid or expired"}), 401
+
+        # A refreshed session counts as activity for the nightly pre-generation job
+        User.record_login(spent["user_id"])
+
+        return jsonify(issue_session(spent["user_id"], family_id=spent["family_id"])), 200
+
+    except Exception as e:
+        current_app.logger.error("Refresh error: %s\n%s", e, traceback.format_exc())
+        return jsonify({"message": "Internal server error"}), 500
+
+
+@auth.route("/logout", methods=["POST"])
+def logout():
+    """
+    End the session of a refresh token; its access token lapses within ACCESS_TOKEN_MINUTES.
+    POST /api/auth/logout  { refresh_token }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        refresh_token = data.get("refresh_token")
+        if not refresh_token:
+            return jsonify({"message": "refresh_token is required"}), 400
+        RefreshToken.revoke(refresh_token)
+        return jsonify({"message": "Logged out"}), 200
+
+    except Exception as e:
+        current_app.logger.error("Logout error: %s\n%s", e, traceback.format_exc())
+        return jsonify({"message": "Internal server error"}), 500
@@ -1,11 +1,93 @@
-from flask import Blueprint, request, jsonify, Response
+from flask import Blueprint, request, jsonify, Response, current_app
 from backend.services.llm_service import get_llm_service
+from contextlib import closing
 import logging
+import queue
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
 chat_bp = Blueprint('chat', __name__)
 
+
+def _sse_frame(text):
+    """Format text as one SSE event; embedded newlines become extra data lines."""
+    return "".join(f"data: {line}\n" for line in text.split("\n")) + "\n"
+
+
+_END = object()
+
+
+class _UpstreamError:
+    __slots__ = ("error",)
+
+    def __init__(self, error):
+        self.error = error
+
+
+def _coalesce(chunks, max_delay, max_bytes):
+    """
+    Batch small upstream chunks into larger pieces.
+    A piece is flushed once it reaches max_bytes or max_delay seconds have
+    passed since the last flush, whichever comes first. Upstream is read on
+    a helper thread so buffered text is flushed on time even while upstream
+    stalls. The helper closes `chunks` when it finishes or when this
+    generator is closed (after the chunk it is waiting on, if any).
+    """
+    received = queue.Queue()
+    stop = threading.Event()
+
+    def pump():
+        try:
+            for chunk in chunks:
+                if stop.is_set():
+                    break
+                received.put(chunk)
+        except Exception as e:
+            received.put(_UpstreamError(e))
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+            received.put(_END)
+
+    threading.Thread(target=pump, name="chat-stream-reader", daemon=True).start()
+
+    buffer = []
+    size = 0
+    last_flush = time.monotonic()
+    try:
+        while True:
+            timeout = max(0.0, last_flush + max_delay - time.monotonic()) if buffer else None
+            try:
+                item = received.get(timeout=timeout)
+            except queue.Empty:
+                yield "".join(buffer)
+                buffer = []
+                size = 0
+                last_flush = time.monotonic()
+                continue
+            if item is _END:
+                break
+            if isinstance(item, _UpstreamError):
+                if buffer:
+                    yield "".join(buffer)
+                raise item.error
+            buffer.append(item)
+            size += len(item)
+            now = time.monotonic()
+            if size >= max_bytes or now - last_flush >= max_delay:
+                yield "".join(buffer)
+                buffer = []
+                size = 0
+                last_flush = now
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        stop.set()
+
+
 @chat_bp.route('/api/chat', methods=['POST'])
 def chat():
     """Non-streaming chat endpoint."""
@@ -45,16 +127,30 @@ def chat_stream():
         if llm_service is None:
             return jsonify({'error': 'LLM service not available'}), 503
 
+        max_delay = current_app.config.get("SSE_COALESCE_MS", 50) / 1000.0
+        max_bytes = current_app.config.get("SSE_COALESCE_BYTES", 256)
+
         def generate():
-            try:
-                for chunk in llm_service.generate_streaming_response(messages):
-                    yield f"data: {chunk}\n\n"
-                yield "data: [DONE]\n\n"
-            except Exception as e:
-                logger.error(f'Error in streaming: {e}')
-                yield f"data: Error: {str(e)}\n\n"
-
-        return Response(generate(), mimetype='text/event-stream')
+            # closing() shuts _coalesce down when the WSGI server closes this
+            # generator on client disconnect; it then closes the upstream Groq stream.
+            upstream = llm_service.generate_streaming_response(messages)
+            with closing(_coalesce(upstream, max_delay, max_bytes)) as pieces:
+                try:
+                    for piece in pieces:
+                        yield _sse_frame(piece)
+                    yield "data: [DONE]\n\n"
+                except GeneratorExit:
+                    logger.info('Client disconnected from chat stream; cancelling generation')
+                    raise
+                except Exception as e:
+                    logger.error(f'Error in streaming: {e}')
+                    yield _sse_frame(f"Error: {str(e)}")
+
+        return Response(
+            generate(),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
 
     except Exception as e:
         logger.error(f'Error in chat stream endpoint: {e}')
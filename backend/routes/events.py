@@ -0,0 +1,100 @@
+"""
+Event Stream Routes
+Server-Sent Events push channel for new insights, crisis alerts and
+check-ins (see backend/services/events.py).
+"""
+
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from backend.decorators import token_required
+from backend.models import CheckInMessage, CrisisAlert, WellnessInsight
+from backend.services.events import CLOSED, format_sse, get_event_broker
+
+events_bp = Blueprint("events", __name__)
+
+REPLAY_LIMIT = 50
+
+
+def _missed_events(user_id, last_event_id):
+    """(event, id, data) the client missed since last_event_id, oldest first."""
+    if not last_event_id or not ObjectId.is_valid(last_event_id):
+        return []
+    after_id = ObjectId(last_event_id)
+    oldest = datetime.utcnow() - timedelta(hours=current_app.config.get("EVENTS_REPLAY_HOURS", 24))
+    since = max(after_id.generation_time.replace(tzinfo=None), oldest)
+
+    missed = [("insight", doc["_id"], WellnessInsight.from_dict(doc).to_dict())
+              for doc in WellnessInsight.find_unread_since(user_id, after_id, since, REPLAY_LIMIT)]
+    missed += [("crisis_alert", doc["_id"], CrisisAlert.from_dict(doc).to_dict())
+               for doc in CrisisAlert.find_since(user_id, after_id, since, REPLAY_LIMIT)]
+    missed += [("check_in", doc["_id"], CheckInMessage.from_dict(doc).to_dict())
+               for doc in CheckInMessage.find_since(user_id, after_id, since, REPLAY_LIMIT)]
+    missed.sort(key=lambda item: item[1])
+    return [(event, str(event_id), data) for event, event_id, data in missed[-REPLAY_LIMIT:]]
+
+
+@events_bp.route("/events", methods=["GET"])
+@token_required
+def event_stream(current_user):
+    """
+    Push new insights, crisis alerts and check-ins as they are created.
+    GET /api/events   (Accept: text/event-stream)
+
+    Events: insight, crisis_alert, check_in; data is the document's JSON and
+    id its _id. On reconnect, send the last id seen as the Last-Event-ID
+    header (or ?last_event_id=) to receive what was missed.
+    """
+    broker = get_event_broker()
+    # Subscribe before replaying so nothing created in between is lost
+    subscription = broker.subscribe(current_user._id)
+    if subscription is None:
+        return jsonify({"message": "Too many open event streams, retry later"}), 503, {"Retry-After": "30"}
+
+    try:
+        last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+        missed = _missed_events(str(current_user._id), last_event_id)
+    except Exception as e:
+        broker.unsubscribe(subscription)
+        current_app.logger.error(f"Event replay error: {e}\n{traceback.format_exc()}")
+        return jsonify({"message": "Internal server error"}), 500
+
+    heartbeat = current_app.config.get("EVENTS_HEARTBEAT_SECONDS", 15)
+    max_seconds = current_app.config.get("EVENTS_MAX_STREAM_SECONDS", 1800)
+
+    def generate():
+        try:
+            # Reconnect delay for EventSource after the stream ends
+            yield f"retry: {heartbeat * 1000}\n\n"
+            sent = set()
+            for event, event_id, data in missed:
+                sent.add(event_id)
+                yield format_sse(data, event, event_id)
+
+            # Streams end after max_seconds so long-lived connections rebalance across workers
+            deadline = time.monotonic() + max_seconds
+            while time.monotonic() < deadline:
+                item = subscription.get(timeout=heartbeat)
+                if item is CLOSED:
+                    break
+                if item is None:
+                    yield ": heartbeat\n\n"
+                    continue
+                event, event_id, data = item
+                if event_id not in sent:
+                    yield format_sse(data, event, event_id)
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    # Also frees the slot if the stream is closed before generate() ever ran
+    response.call_on_close(lambda: broker.unsubscribe(subscription))
+    return response
@@ -1,6 +1,10 @@
 from flask import Blueprint, request, jsonify, current_app
 from backend.models import JournalEntry
+from backend.models.ids import content_hash
 from backend.decorators import token_required
+from backend.services.crisis_lane import get_crisis_lane
+from backend.services.enrichment import get_enrichment_pipeline
+from backend.services.keyword_engine import scan
 import traceback
 from datetime import datetime
 from bson import ObjectId
@@ -67,10 +71,14 @@ def create_entry(current_user):
             is_private=is_private
         )
         entry.save()
-        
+
+        # Sentiment, tags and insights are filled in by background workers
+        enrichment_queued = _queue_enrichment(entry._id, entry.user_id, entry.content, set_tags=True)
+
         return jsonify({
             "message": "Journal entry created successfully",
-            "entry": entry.to_dict()
+            "entry": entry.to_dict(),
+            "enrichment_queued": enrichment_queued
         }), 201
     except Exception as e:
         current_app.logger.error("Create journal entry error: %s\n%s", e, traceback.format_exc())
@@ -113,18 +121,27 @@ def update_entry(current_user, entry_id):
             update_data["title"] = data['title'].strip()
         if 'content' in data:
             update_data["content"] = data['content'].strip()
+            new_hash = content_hash(update_data["content"])
+            # Whitespace-only edits keep the content hash, so nothing is re-analyzed
+            if new_hash != (entry_data.get("content_hash") or content_hash(entry_data.get("content"))):
+                update_data["content_hash"] = new_hash
         if 'isPrivate' in data:
             update_data["is_private"] = data['isPrivate']
         if 'is_private' in data:
             update_data["is_private"] = data['is_private']
         if 'tags' in data:
             update_data["tags"] = data['tags']
+            update_data["auto_tags"] = False
 
         if update_data:
             update_data["updated_at"] = datetime.utcnow()
             entry = JournalEntry.from_dict(entry_data)
             entry.update(update_data)
 
+            if "content_hash" in update_data:
+                set_tags = 'tags' not in data and entry_data.get("auto_tags", not entry_data.get("tags"))
+                _queue_enrichment(entry._id, entry.user_id, update_data["content"], set_tags=set_tags)
+
             # Get updated entry
             updated_entry_data = JournalEntry.find_by_id(entry_id)
             updated_entry = JournalEntry.from_dict(updated_entry_data)
@@ -162,3 +179,15 @@ def delete_entry(current_user, entry_id):
     except Exception as e:
         current_app.logger.error("Delete journal entry error: %s\n%s", e, traceback.format_exc())
         return jsonify({"message": "Internal server error"}), 500
+
+def _queue_enrichment(entry_id, user_id, content, set_tags):
+    """Submit an entry for enrichment; a failure here must never fail the write."""
+    try:
+        # Crisis keywords don't wait for the enrichment queue
+        crisis_terms = scan(content).terms("crisis")
+        if crisis_terms:
+            get_crisis_lane().report(user_id, "journal", crisis_terms, reference_id=entry_id)
+        return get_enrichment_pipeline().submit(entry_id, user_id, content, set_tags=set_tags)
+    except Exception as e:
+        current_app.logger.error("Queueing journal enrichment failed: %s\n%s", e, traceback.format_exc())
+        return False
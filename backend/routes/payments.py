@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from backend.decorators import token_required
 from backend.services.flutterwave import FlutterwaveService
 from backend.services.mongo import MongoService
 from backend.config import Config
@@ -21,11 +21,11 @@ mongo_service = MongoService(
 )
 
 @payments_bp.route('/flutterwave/initialize', methods=['POST'])
-@jwt_required()
-async def initialize_flutterwave_payment():
+@token_required
+async def initialize_flutterwave_payment(current_user):
     try:
         data = request.get_json()
-        user_id = get_jwt_identity()
+        user_id = str(current_user._id)
 
         # Validate required fields
         required_fields = ['email', 'name', 'amount', 'currency', 'planId', 'redirectUrl']
@@ -87,8 +87,8 @@ async def initialize_flutterwave_payment():
         return jsonify({'error': 'Internal server error'}), 500
 
 @payments_bp.route('/paystack/initialize', methods=['POST'])
-@jwt_required()
-def initialize_paystack_payment():
+@token_required
+def initialize_paystack_payment(current_user):
     try:
         return jsonify({'error': 'Paystack integration not implemented yet'}), 501
     except Exception as e:
@@ -96,8 +96,8 @@ def initialize_paystack_payment():
         return jsonify({'error': 'Internal server error'}), 500
 
 @payments_bp.route('/stripe/initialize', methods=['POST'])
-@jwt_required()
-def initialize_stripe_payment():
+@token_required
+def initialize_stripe_payment(current_user):
     try:
         return jsonify({'error': 'Stripe integration not implemented yet'}), 501
     except Exception as e:
@@ -105,8 +105,8 @@ def initialize_stripe_payment():
         return jsonify({'error': 'Internal server error'}), 500
 
 @payments_bp.route('/mpesa/initialize', methods=['POST'])
-@jwt_required()
-def initialize_mpesa_payment():
+@token_required
+def initialize_mpesa_payment(current_user):
     try:
         return jsonify({'error': 'M-Pesa integration not implemented yet'}), 501
     except Exception as e:
@@ -114,8 +114,8 @@ def initialize_mpesa_payment():
         return jsonify({'error': 'Internal server error'}), 500
 
 @payments_bp.route('/flutterwave/verify/<transaction_id>', methods=['GET'])
-@jwt_required()
-def verify_flutterwave_payment(transaction_id):
+@token_required
+def verify_flutterwave_payment(current_user, transaction_id):
     try:
         return jsonify({
             'success': True,
@@ -127,8 +127,8 @@ def verify_flutterwave_payment(transaction_id):
         return jsonify({'error': 'Internal server error'}), 500
 
 @payments_bp.route('/paystack/verify/<transaction_id>', methods=['GET'])
-@jwt_required()
-def verify_paystack_payment(transaction_id):
+@token_required
+def verify_paystack_payment(current_user, transaction_id):
     try:
         return jsonify({'error': 'Paystack verification not implemented yet'}), 501
     except Exception as e:
@@ -136,8 +136,8 @@ def verify_paystack_payment(transaction_id):
         return jsonify({'error': 'Internal server error'}), 500
 
 @payments_bp.route('/stripe/verify/<transaction_id>', methods=['GET'])
-@jwt_required()
-def verify_stripe_payment(transaction_id):
+@token_required
+def verify_stripe_payment(current_user, transaction_id):
     try:
         return jsonify({'error': 'Stripe verification not implemented yet'}), 501
     except Exception as e:
@@ -145,8 +145,8 @@ def verify_stripe_payment(transaction_id):
         return jsonify({'error': 'Internal server error'}), 500
 
 @payments_bp.route('/mpesa/verify/<transaction_id>', methods=['GET'])
-@jwt_required()
-def verify_mpesa_payment(transaction_id):
+@token_required
+def verify_mpesa_payment(current_user, transaction_id):
     try:
         return jsonify({'error': 'M-Pesa verification not implemented yet'}), 501
     except Exception as e:
@@ -154,20 +154,20 @@ def verify_mpesa_payment(transaction_id):
         return jsonify({'error': 'Internal server error'}), 500
 
 @payments_bp.route('/history', methods=['GET'])
-@jwt_required()
-def get_payment_history():
+@token_required
+def get_payment_history(current_user):
     try:
-        user_id = get_jwt_identity()
+        user_id = str(current_user._id)
         return jsonify({'payments': []}), 200
     except Exception as e:
         logger.error(f'Error getting payment history: {e}')
         return jsonify({'error': 'Internal server error'}), 500
 
 @payments_bp.route('/subscription/cancel', methods=['POST'])
-@jwt_required()
-def cancel_subscription():
+@token_required
+def cancel_subscription(current_user):
     try:
-        user_id = get_jwt_identity()
+        user_id = str(current_user._id)
         return jsonify({'message': 'Subscription cancelled successfully'}), 200
     except Exception as e:
         logger.error(f'Error cancelling subscription: {e}')
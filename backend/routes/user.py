@@ -3,7 +3,10 @@ from backend.models.user import User
 from backend.models.user_settings import UserSettings
 from backend.models.mood_entry import MoodEntry
 from backend.models.journal_entry import JournalEntry
+from backend.models.refresh_token import RefreshToken
 from backend.decorators import token_required
+from backend.services.auth_tokens import issue_session
+from backend.services.passwords import PasswordHasherBusyError
 import traceback
 import json
 import io
@@ -153,16 +156,20 @@ def update_password(current_user):
             return jsonify({"message": "New password must be different from current password"}), 400
 
         # Hash and update new password
-        from backend.extensions import bcrypt
-        password_hash = bcrypt.generate_password_hash(new_password).decode("utf-8")
-        current_user.update({"password_hash": password_hash})
+        current_user.set_password(new_password)
+        current_user.update({"password_hash": current_user.password_hash})
+        # End every other session
+        RefreshToken.revoke_user(current_user._id)
 
         current_app.logger.info("Password updated successfully for user_id: %s", str(current_user._id))
 
         return jsonify({
-            "message": "Password updated successfully"
+            "message": "Password updated successfully",
+            **issue_session(current_user._id)
         }), 200
 
+    except PasswordHasherBusyError:
+        return jsonify({"message": "Server busy, try again shortly"}), 503, {"Retry-After": "1"}
     except Exception as e:
         current_app.logger.error("Update password error: %s\n%s", e, traceback.format_exc())
         return jsonify({"message": "Internal server error"}), 500
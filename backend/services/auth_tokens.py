@@ -0,0 +1,124 @@
+"""
+Auth Tokens
+The one place access tokens are issued and verified.
+
+Access tokens are short-lived HS256 JWTs (ACCESS_TOKEN_MINUTES, default 15)
+signed with JWT_SECRET_KEY (falls back to SECRET_KEY). While
+JWT_ACCEPT_LEGACY_SECRET is on, 24h tokens issued before this change
+(signed with SECRET_KEY) are accepted too. Sessions are renewed
+with an opaque refresh token (models/refresh_token.py) instead of a new
+password login, so bcrypt runs only when a user actually signs in.
+
+Verified tokens are kept in a small per-process LRU (TOKEN_CACHE_SIZE,
+default 10000) until they expire, so repeat requests with the same token
+skip the signature check.
+"""
+
+import datetime
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import jwt
+from flask import current_app
+
+from backend.models import RefreshToken
+
+ALGORITHM = "HS256"
+
+
+class VerifiedTokenCache:
+    """LRU of token -> (user_id, expires_at epoch seconds)."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            user_id, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return user_id
+
+    def put(self, token: str, user_id: str, expires_at: float):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (user_id, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def _get_cache() -> VerifiedTokenCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = VerifiedTokenCache(current_app.config.get("TOKEN_CACHE_SIZE", 10000))
+    return _cache
+
+
+def issue_access_token(user_id) -> Tuple[str, int]:
+    """(signed access token, lifetime in seconds) for the user."""
+    lifetime = current_app.config.get("ACCESS_TOKEN_MINUTES", 15) * 60
+    now = datetime.datetime.utcnow()
+    payload = {
+        "user_id": str(user_id),
+        "type": "access",
+        "iat": now,
+        "exp": now + datetime.timedelta(seconds=lifetime),
+    }
+    return jwt.encode(payload, current_app.config["JWT_SECRET_KEY"], algorithm=ALGORITHM), lifetime
+
+
+def verify_access_token(token: str) -> str:
+    """
+    The user id of a valid access token. Raises jwt.ExpiredSignatureError
+    or jwt.InvalidTokenError otherwise.
+    """
+    cache = _get_cache()
+    user_id = cache.get(token)
+    if user_id is not None:
+        return user_id
+
+    config = current_app.config
+    try:
+        data = jwt.decode(token, config["JWT_SECRET_KEY"], algorithms=[ALGORITHM])
+    except jwt.InvalidSignatureError:
+        # Tokens from before this module were signed with SECRET_KEY; accept
+        # those (typeless ones only) until JWT_ACCEPT_LEGACY_SECRET is turned off
+        legacy_secret = config.get("SECRET_KEY")
+        if not config.get("JWT_ACCEPT_LEGACY_SECRET") or not legacy_secret or legacy_secret == config["JWT_SECRET_KEY"]:
+            raise
+        data = jwt.decode(token, legacy_secret, algorithms=[ALGORITHM])
+        if "type" in data:
+            raise jwt.InvalidTokenError("Not a legacy token")
+    # Tokens issued before refresh tokens existed carry no type and are still accepted
+    if data.get("type", "access") != "access" or not data.get("user_id"):
+        raise jwt.InvalidTokenError("Not an access token")
+    cache.put(token, data["user_id"], data["exp"])
+    return data["user_id"]
+
+
+def issue_session(user_id, family_id=None) -> dict:
+    """Token fields of a login/refresh response: a new access token and refresh token."""
+    access_token, expires_in = issue_access_token(user_id)
+    refresh_token = RefreshToken.issue(user_id, current_app.config.get("REFRESH_TOKEN_DAYS", 30), family_id=family_id)
+    return {
+        "token": access_token,  # kept for clients written before refresh tokens
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "expires_in": expires_in
+    }
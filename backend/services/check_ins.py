@@ -0,0 +1,43 @@
+"""
+Proactive Check-ins
+Composes the check-in message for a user's sentiment trend state. Used by
+GET /api/chat/proactive-check-in and by the nightly pre-generation job.
+"""
+
+import logging
+from typing import Dict, Optional
+
+from backend.models import CheckInMessage
+from backend.services.prompts import WELCOME_CHECK_IN, build_check_in_prompt
+from backend.services.rate_limit import TokenBucket
+from backend.services.sentiment_service import get_sentiment_analyzer
+
+logger = logging.getLogger(__name__)
+
+# Trend window the check-in message is based on
+CHECK_IN_DAYS = 7
+
+
+def compose_check_in(user_id, state: Optional[Dict], day: str,
+                     limiter: Optional[TokenBucket] = None) -> CheckInMessage:
+    """
+    The check-in message for `day`. Its source is "fallback" when the LLM was
+    unavailable; those are not worth caching for the whole day.
+    `limiter`, if given, is acquired before the LLM call.
+    """
+    trend_analysis = get_sentiment_analyzer().trend_from_state(state, days=CHECK_IN_DAYS)
+    if not trend_analysis.get('total_entries'):
+        # New user or no recent data
+        return CheckInMessage(user_id, WELCOME_CHECK_IN, day)
+
+    from backend.services.llm_service import PURPOSE_FALLBACKS, get_llm_service
+    llm_service = get_llm_service()
+    if llm_service is None:
+        return CheckInMessage(user_id, WELCOME_CHECK_IN, day, source="fallback")
+
+    if limiter is not None:
+        limiter.acquire()
+    messages = [{"role": "user", "content": build_check_in_prompt(trend_analysis)}]
+    message = llm_service.generate_response(messages, purpose="check_in")
+    source = "fallback" if message == PURPOSE_FALLBACKS["check_in"] else "llm"
+    return CheckInMessage(user_id, message, day, trend=trend_analysis.get('trend'), source=source)
@@ -0,0 +1,281 @@
+"""
+Crisis Fast Lane
+When crisis keywords are detected the request answers with the crisis
+protocol right away; the urgent support insight and a CrisisAlert event are
+handed to this lane instead of being written inline. It has its own worker
+thread and queue, separate from the enrichment pipeline and the LLM bulkhead,
+so crisis writes never wait behind ordinary work. Once written, the alert
+is pushed to the user's open event streams (services/events.py).
+
+The time from detection to both documents being written is recorded as
+crisis_lane_latency_seconds; each write slower than CRISIS_LANE_SLO_MS
+(default 500) counts towards crisis_lane_slo_breaches_total.
+
+A failed write is retried CRISIS_LANE_RETRIES times (default 4) with
+backoff, then handed to the durable task queue as a high-priority
+"crisis.write_alert" task. If even that fails the event goes back on the
+lane's queue, and events still queued at shutdown are moved to the task
+queue, so a crisis event is never dropped. Writes are idempotent (ids are
+fixed at detection), so a retry never duplicates an alert, and the counter
+update and event publish after them are repeated on every attempt.
+
+CRISIS_LANE_MODE selects how events are written:
+    background - dedicated worker thread (default)
+    inline     - synchronously inside report(), useful for tests and scripts
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from typing import List, Optional
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from backend.models import CrisisAlert, WellnessInsight
+from backend.services.insights_service import get_insights_generator
+from backend.services.events import publish
+from backend.services.metrics import metrics
+from backend.services.tasks import enqueue
+
+logger = logging.getLogger(__name__)
+
+CRISIS_LANE_MODES = ("background", "inline")
+
+# Durable fallback for writes that keep failing; runs ahead of all other tasks
+CRISIS_TASK = "crisis.write_alert"
+CRISIS_TASK_PRIORITY = 100
+
+
+class CrisisEvent:
+    __slots__ = ("user_id", "source", "crisis_keywords", "reference_id", "insight", "alert_id", "detected_at")
+
+    def __init__(self, user_id, source: str, crisis_keywords: List[str], reference_id, insight: WellnessInsight,
+                 alert_id=None):
+        self.user_id = user_id
+        self.source = source
+        self.crisis_keywords = crisis_keywords
+        self.reference_id = reference_id
+        self.insight = insight
+        self.alert_id = alert_id or ObjectId()
+        # None once the event has left this process (latency is then not tracked)
+        self.detected_at = time.monotonic()
+
+    def to_payload(self) -> dict:
+        return {
+            "user_id": self.user_id,
+            "source": self.source,
+            "crisis_keywords": self.crisis_keywords,
+            "reference_id": self.reference_id,
+            "insight": self.insight.to_document(),
+            "alert_id": self.alert_id,
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "CrisisEvent":
+        event = cls(payload["user_id"], payload["source"], payload.get("crisis_keywords", []),
+                    payload.get("reference_id"), WellnessInsight.from_dict(payload["insight"]),
+                    alert_id=payload["alert_id"])
+        event.detected_at = None
+        return event
+
+
+class CrisisLane:
+    def __init__(self):
+        self.mode = os.getenv("CRISIS_LANE_MODE", "background").lower()
+        if self.mode not in CRISIS_LANE_MODES:
+            raise ValueError(f"CRISIS_LANE_MODE must be one of {', '.join(CRISIS_LANE_MODES)}, got {self.mode!r}")
+        self.slo_seconds = float(os.getenv("CRISIS_LANE_SLO_MS", 500)) / 1000.0
+        self.drain_seconds = float(os.getenv("CRISIS_LANE_DRAIN_SECONDS", 5))
+        self.retries = int(os.getenv("CRISIS_LANE_RETRIES", 4))
+        self.retry_base_seconds = 0.1
+        self.retry_max_seconds = 2.0
+
+        self._queue = queue.Queue(maxsize=int(os.getenv("CRISIS_LANE_QUEUE_SIZE", 1000)))
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    @staticmethod
+    def build_insight(user_id, crisis_keywords: List[str]) -> WellnessInsight:
+        """The urgent support insight for a detection (not saved yet)."""
+        data = get_insights_generator().generate_crisis_support_insight(crisis_keywords)
+        insight = WellnessInsight(
+            user_id=user_id,
+            insight_type=data['insight_type'],
+            insight_text=data['insight_text'],
+            recommendation=data['recommendation'],
+            activity_suggestion=data['activity_suggestion'],
+            priority=data['priority']
+        )
+        insight.based_on_pattern = data['based_on_pattern']
+        return insight
+
+    def report(self, user_id, source: str, crisis_keywords: List[str], reference_id=None,
+               insight: WellnessInsight = None) -> WellnessInsight:
+        """
+        Record a crisis detection. Returns the support insight (its _id is
+        final) without waiting for it to be written.
+        """
+        insight = insight or self.build_insight(user_id, crisis_keywords)
+        event = CrisisEvent(user_id, source, list(crisis_keywords), reference_id, insight)
+        metrics.inc("crisis_alerts_total", source=source)
+        logger.warning("Crisis detected (%s) for user %s", source, user_id)
+
+        if self.mode == "inline":
+            self._deliver(event)
+            return insight
+
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # Never drop a crisis event: write it on the caller's thread instead
+            logger.error("Crisis lane queue full, writing alert inline for user %s", user_id)
+            self._deliver(event)
+        metrics.set_gauge("crisis_lane_queue_depth", self._queue.qsize())
+        return insight
+
+    def _ensure_worker(self):
+        # Threads don't survive fork; start one in whichever process reports
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._thread = threading.Thread(target=self._run, name="crisis-lane", daemon=True)
+            self._thread.start()
+            self._pid = pid
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                event = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                if not self._deliver(event):
+                    self._requeue(event)
+            finally:
+                self._queue.task_done()
+                metrics.set_gauge("crisis_lane_queue_depth", self._queue.qsize())
+
+    def _deliver(self, event: CrisisEvent) -> bool:
+        """
+        Write the event, retrying with backoff, then fall back to a durable
+        task. False if neither worked (the event is still unwritten).
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                self.write(event)
+                return True
+            except Exception as e:
+                logger.error("Crisis alert write failed for user %s (attempt %d/%d): %s",
+                             event.user_id, attempt + 1, self.retries + 1, e)
+                if attempt < self.retries:
+                    metrics.inc("crisis_lane_retries_total")
+                    time.sleep(min(self.retry_max_seconds, self.retry_base_seconds * (2 ** attempt)))
+        return self._defer(event)
+
+    def _defer(self, event: CrisisEvent) -> bool:
+        """Hand the event to the durable task queue."""
+        try:
+            enqueue(CRISIS_TASK, event.to_payload(), priority=CRISIS_TASK_PRIORITY, max_attempts=20)
+        except Exception as e:
+            metrics.inc("crisis_lane_events_total", outcome="error")
+            logger.error("Could not queue crisis alert task for user %s: %s", event.user_id, e)
+            return False
+        metrics.inc("crisis_lane_events_total", outcome="deferred")
+        logger.warning("Crisis alert for user %s handed to the task queue", event.user_id)
+        return True
+
+    def _requeue(self, event: CrisisEvent):
+        """Put an unwritten event back on the queue, or keep retrying it here if the queue is full."""
+        try:
+            self._queue.put_nowait(event)
+            return
+        except queue.Full:
+            pass
+        delay = self.retry_base_seconds
+        while not self._stopping.is_set():
+            time.sleep(delay)
+            if self._deliver(event):
+                return
+            delay = min(self.retry_max_seconds, delay * 2)
+        logger.error("Crisis lane stopped with the alert for user %s unwritten", event.user_id)
+
+    def write(self, event: CrisisEvent):
+        """
+        Write the insight and alert, then count and announce them. Safe to
+        repeat for the same event: the writes are keyed by the ids fixed at
+        detection, and the steps after them are redone on every attempt (a
+        recount, events with the same ids), so a retry after a partial
+        failure finishes whatever the earlier attempt left undone.
+        """
+        insight = event.insight
+        try:
+            insight.save()
+        except DuplicateKeyError:
+            # Written by an earlier attempt that may have failed before counting or publishing it
+            WellnessInsight.refresh_counters([event.user_id])
+            publish(event.user_id, "insight", insight._id, insight.to_dict())
+        alert = CrisisAlert(
+            user_id=event.user_id,
+            source=event.source,
+            crisis_keywords=event.crisis_keywords,
+            reference_id=event.reference_id,
+            insight_id=insight._id
+        )
+        alert._id = event.alert_id
+        try:
+            alert.save()
+        except DuplicateKeyError:
+            pass  # written by an earlier attempt; still published below
+        publish(event.user_id, "crisis_alert", alert._id, alert.to_dict())
+
+        metrics.inc("crisis_lane_events_total", outcome="ok")
+        if event.detected_at is None:
+            return
+        latency = time.monotonic() - event.detected_at
+        metrics.observe("crisis_lane_latency_seconds", latency)
+        if latency > self.slo_seconds:
+            metrics.inc("crisis_lane_slo_breaches_total")
+            logger.warning("Crisis alert for user %s took %.0fms (SLO %.0fms)",
+                           event.user_id, latency * 1000, self.slo_seconds * 1000)
+
+    def drain(self, timeout: float = None):
+        """Give queued events up to `timeout` seconds to be written, then stop the worker."""
+        timeout = self.drain_seconds if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._stopping.set()
+        # Whatever is still queued goes to the durable task queue instead of being lost
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if self._defer(event):
+                self._queue.task_done()
+        if self._queue.unfinished_tasks:
+            logger.error("Crisis lane stopped with %d alerts unwritten", self._queue.unfinished_tasks)
+
+
+# Singleton instance
+_lane = None
+_lane_lock = threading.Lock()
+
+def get_crisis_lane() -> CrisisLane:
+    global _lane
+    if _lane is None:
+        with _lane_lock:
+            if _lane is None:
+                _lane = CrisisLane()
+                atexit.register(_lane.drain)
+    return _lane
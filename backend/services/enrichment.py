@@ -0,0 +1,244 @@
+"""
+Journal Enrichment Pipeline
+Fills in a journal entry's sentiment, tags and insight after it is written,
+off the request path. Create/update handlers submit a job and return; worker
+threads drain the queue in batches, score the whole batch with one
+SentimentAnalyzer.analyze_batch call and write the results with bulk writes:
+
+    - journal entry: sentiment label, tags (unless the user set their own), ai_insights
+    - sentiment_history: one record per entry (replaced when the entry is edited)
+
+Crisis keywords are not handled here: the journal routes report them to the
+crisis lane (services/crisis_lane.py) before the job is even queued.
+
+ENRICHMENT_MODE selects how jobs run:
+    background - worker threads (default)
+    inline     - synchronously inside submit(), useful for tests and scripts
+    queue      - durable "journal.enrich" tasks run by `python -m backend.worker`
+    off        - never enrich
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from backend.journal_service import extract_tags, generate_ai_insights
+from backend.models import JournalEntry, SentimentHistory
+from backend.models.ids import content_hash
+from backend.services.metrics import metrics
+from backend.services.prompts import build_journal_analysis_prompt
+from backend.services.sentiment_service import get_sentiment_analyzer
+
+logger = logging.getLogger(__name__)
+
+ENRICHMENT_MODES = ("background", "inline", "queue", "off")
+
+
+class EnrichmentJob:
+    __slots__ = ("entry_id", "user_id", "content", "content_hash", "set_tags", "submitted_at")
+
+    def __init__(self, entry_id, user_id, content: str, set_tags: bool = True):
+        self.entry_id = entry_id
+        self.user_id = user_id
+        self.content = content
+        self.content_hash = content_hash(content)
+        self.set_tags = set_tags
+        self.submitted_at = time.monotonic()
+
+
+class EnrichmentPipeline:
+    def __init__(self):
+        self.mode = os.getenv("ENRICHMENT_MODE", "background").lower()
+        if self.mode not in ENRICHMENT_MODES:
+            raise ValueError(f"ENRICHMENT_MODE must be one of {', '.join(ENRICHMENT_MODES)}, got {self.mode!r}")
+        self.workers = int(os.getenv("ENRICHMENT_WORKERS", 2))
+        self.batch_size = int(os.getenv("ENRICHMENT_BATCH_SIZE", 32))
+        self.batch_wait = float(os.getenv("ENRICHMENT_BATCH_WAIT_MS", 200)) / 1000.0
+        self.llm_insights = os.getenv("ENRICHMENT_LLM_INSIGHTS", "false").lower() == "true"
+        self.drain_seconds = float(os.getenv("ENRICHMENT_DRAIN_SECONDS", 5))
+
+        # One queue per worker; an entry always hashes to the same worker, so
+        # edits to it are enriched in order and a stale result never lands last
+        per_worker = max(1, int(os.getenv("ENRICHMENT_QUEUE_SIZE", 1000)) // max(1, self.workers))
+        self._queues = [queue.Queue(maxsize=per_worker) for _ in range(max(1, self.workers))]
+        self._threads: List[threading.Thread] = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def submit(self, entry_id, user_id, content: str, set_tags: bool = True) -> bool:
+        """Queue an entry for enrichment. Returns False if it was not accepted."""
+        if self.mode == "off" or not content:
+            return False
+        job = EnrichmentJob(entry_id, user_id, content, set_tags)
+        if self.mode == "inline":
+            self.process_batch([job])
+            return True
+        if self.mode == "queue":
+            from backend.services.tasks import enqueue
+            enqueue("journal.enrich", {
+                "entry_id": job.entry_id, "user_id": job.user_id, "content": content, "set_tags": set_tags
+            })
+            return True
+
+        self._ensure_workers()
+        try:
+            self._queues[hash(str(entry_id)) % len(self._queues)].put_nowait(job)
+        except queue.Full:
+            metrics.inc("enrichment_jobs_total", outcome="dropped")
+            logger.warning("Enrichment queue full, dropping job for entry %s", entry_id)
+            return False
+        metrics.set_gauge("enrichment_queue_depth", self.queue_depth())
+        return True
+
+    def queue_depth(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    def _ensure_workers(self):
+        # Threads don't survive fork; start them in whichever process submits
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._threads = []
+            for i, jobs in enumerate(self._queues):
+                thread = threading.Thread(target=self._run, args=(jobs,), name=f"enrichment-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            self._pid = pid
+            logger.info("Started %d enrichment workers (pid=%s)", len(self._threads), pid)
+
+    def _next_batch(self, jobs: queue.Queue, timeout: Optional[float]) -> List[EnrichmentJob]:
+        """Block for one job, then gather more for up to batch_wait or batch_size jobs."""
+        try:
+            batch = [jobs.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(jobs.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, jobs: queue.Queue):
+        while not self._stopping.is_set():
+            batch = self._next_batch(jobs, timeout=0.5)
+            if not batch:
+                continue
+            try:
+                self.process_batch(batch)
+            except Exception as e:
+                metrics.inc("enrichment_jobs_total", len(batch), outcome="error")
+                logger.error("Enrichment batch of %d failed: %s", len(batch), e, exc_info=True)
+            finally:
+                for _ in batch:
+                    jobs.task_done()
+                metrics.set_gauge("enrichment_queue_depth", self.queue_depth())
+
+    def process_batch(self, jobs: List[EnrichmentJob]):
+        """Enrich a batch of entries with one scoring pass and bulk writes."""
+        # An entry edited twice while queued only needs its latest content
+        latest: Dict[str, EnrichmentJob] = {}
+        for job in jobs:
+            latest[str(job.entry_id)] = job
+        jobs = list(latest.values())
+
+        # Text already analyzed for this entry (same fingerprint) needs no new work
+        analyzed = SentimentHistory.content_hashes_for_entries([job.entry_id for job in jobs])
+        fresh = [job for job in jobs if analyzed.get(str(job.entry_id)) != job.content_hash]
+        if len(fresh) < len(jobs):
+            metrics.inc("enrichment_jobs_total", len(jobs) - len(fresh), outcome="unchanged")
+        jobs = fresh
+        if not jobs:
+            return
+
+        started = time.perf_counter()
+        results = get_sentiment_analyzer().analyze_batch([job.content for job in jobs])
+
+        entry_updates = []
+        histories = []
+        for job, result in zip(jobs, results):
+            insight, insight_source = self._insight_for(job, result)
+            fields = {
+                "sentiment": result['sentiment_label'],
+                "ai_insights": insight,
+                "ai_insights_source": insight_source,
+                "ai_insights_hash": job.content_hash,
+            }
+            if job.set_tags:
+                fields["tags"] = extract_tags(job.content)
+                # Lets later edits refresh tags we chose, but never ones the user set
+                fields["auto_tags"] = True
+            entry_updates.append((job.entry_id, fields))
+
+            history = SentimentHistory(
+                user_id=job.user_id,
+                journal_entry_id=job.entry_id,
+                sentiment_label=result['sentiment_label'],
+                sentiment_scores=result['sentiment_scores'],
+                detected_emotions=result['detected_emotions'],
+                crisis_flag=result['crisis_flag'],
+                content_hash=job.content_hash
+            )
+            history.crisis_keywords = result['crisis_keywords']
+            histories.append(history)
+
+        JournalEntry.bulk_update(entry_updates)
+        SentimentHistory.bulk_upsert_for_entries(histories)
+
+        metrics.inc("enrichment_jobs_total", len(jobs), outcome="ok")
+        metrics.observe("enrichment_batch_size", len(jobs))
+        metrics.observe("enrichment_batch_seconds", time.perf_counter() - started)
+        now = time.monotonic()
+        for job in jobs:
+            metrics.observe("enrichment_lag_seconds", now - job.submitted_at)
+
+    def _insight_for(self, job: EnrichmentJob, result: Dict):
+        """(insight text, source) where source is "llm" or "canned"."""
+        if self.llm_insights and not result['crisis_flag']:
+            from backend.services.llm_service import PURPOSE_FALLBACKS, get_llm_service
+            llm = get_llm_service()
+            if llm is not None:
+                messages = [{"role": "user", "content": build_journal_analysis_prompt(job.content)}]
+                insight = llm.generate_response(messages, purpose="journal_analysis")
+                if insight != PURPOSE_FALLBACKS["journal_analysis"]:
+                    return insight, "llm"
+        return generate_ai_insights(result['sentiment_label']), "canned"
+
+    def drain(self, timeout: float = None):
+        """Give queued jobs up to `timeout` seconds to finish, then stop the workers."""
+        timeout = self.drain_seconds if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while self._unfinished() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._stopping.set()
+        if self._unfinished():
+            logger.warning("Enrichment stopped with %d jobs still queued", self._unfinished())
+
+    def _unfinished(self) -> int:
+        return sum(q.unfinished_tasks for q in self._queues)
+
+
+# Singleton instance
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+def get_enrichment_pipeline() -> EnrichmentPipeline:
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = EnrichmentPipeline()
+                atexit.register(_pipeline.drain)
+    return _pipeline
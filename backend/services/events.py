@@ -0,0 +1,136 @@
+"""
+Event Push
+In-process pub/sub behind GET /api/events (Server-Sent Events), so clients
+are told about new insights, crisis alerts and check-ins instead of polling
+/urgent, /daily and /proactive-check-in.
+
+publish() never blocks: each open stream has a bounded queue, and a stream
+that falls behind is closed so the client reconnects and catches up.
+Events are keyed by the id of the document they announce (ObjectIds are
+time-ordered), so a reconnecting client's Last-Event-ID is enough to replay
+what it missed from Mongo. That replay also covers events published in
+another process (task worker, scheduler), which this broker cannot see.
+
+EVENTS_MAX_STREAMS (default 32) caps open streams per worker process;
+each stream occupies one server thread for as long as it is open.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+from typing import Dict, Optional, Set
+
+from backend.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Returned by Subscription.get once the broker closed the stream (it fell behind)
+CLOSED = object()
+
+
+def format_sse(data, event: str = None, event_id: str = None) -> str:
+    """One SSE frame; data is JSON-encoded."""
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    __slots__ = ("user_id", "queue", "closed")
+
+    def __init__(self, user_id: str, queue_size: int):
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def get(self, timeout: float):
+        """Next (event, id, data), CLOSED, or None after `timeout` seconds without one."""
+        if self.closed:
+            return CLOSED
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return CLOSED if self.closed else None
+
+    def close(self):
+        self.closed = True
+        try:
+            # Wake a stream waiting in get()
+            self.queue.put_nowait(CLOSED)
+        except queue.Full:
+            pass
+
+
+class EventBroker:
+    def __init__(self):
+        self.max_streams = int(os.getenv("EVENTS_MAX_STREAMS", 32))
+        self.queue_size = int(os.getenv("EVENTS_QUEUE_SIZE", 100))
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._open = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id) -> Optional[Subscription]:
+        """A new subscription for the user's events, or None if this process is at EVENTS_MAX_STREAMS."""
+        user_id = str(user_id)
+        with self._lock:
+            if self._open >= self.max_streams:
+                metrics.inc("event_streams_rejected_total")
+                return None
+            subscription = Subscription(user_id, self.queue_size)
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            self._open += 1
+            metrics.set_gauge("event_streams_open", self._open)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(subscription.user_id)
+            if not subscriptions or subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[subscription.user_id]
+            self._open -= 1
+            metrics.set_gauge("event_streams_open", self._open)
+
+    def publish(self, user_id, event: str, event_id, data: dict):
+        """Hand an event to the user's open streams in this process (no-op when there are none)."""
+        with self._lock:
+            subscriptions = list(self._subscribers.get(str(user_id), ()))
+        for subscription in subscriptions:
+            try:
+                subscription.queue.put_nowait((event, str(event_id), data))
+            except queue.Full:
+                # Too far behind: end the stream; the client replays from its Last-Event-ID
+                self.unsubscribe(subscription)
+                subscription.close()
+                metrics.inc("events_dropped_total", event=event)
+                continue
+            metrics.inc("events_published_total", event=event)
+
+
+# Singleton instance
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_event_broker() -> EventBroker:
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = EventBroker()
+    return _broker
+
+
+def publish(user_id, event: str, event_id, data: dict):
+    """Publish without letting a broker failure break the write that triggered it."""
+    try:
+        get_event_broker().publish(user_id, event, event_id, data)
+    except Exception as e:
+        logger.error("Publishing %s event for user %s failed: %s", event, user_id, e)
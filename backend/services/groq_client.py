@@ -0,0 +1,98 @@
+"""
+Shared Groq Client
+One Groq client per worker process, backed by a tuned httpx connection pool
+(keep-alive, HTTP/2 when the `h2` package is installed, bounded pool size),
+so every service reuses warm TLS connections to the Groq API.
+
+LLM_BACKEND selects where requests go:
+    groq    - the real Groq API (default)
+    fake    - the local stand-in from backend.tools.fake_groq (FAKE_GROQ_URL)
+    record  - real (or fake) upstream, saving every response to LLM_CASSETTE_DIR
+    replay  - serve responses from LLM_CASSETTE_DIR only, no network
+"""
+
+import importlib.util
+import logging
+import os
+import threading
+
+import httpx
+from groq import Groq
+
+from backend.services.llm_cassettes import CassetteTransport
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_pid = None
+_lock = threading.Lock()
+
+LLM_BACKENDS = ("groq", "fake", "record", "replay")
+DEFAULT_CASSETTE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "cassettes")
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (pip install httpx[http2])."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def llm_backend() -> str:
+    backend = os.getenv("LLM_BACKEND", "groq").lower()
+    if backend not in LLM_BACKENDS:
+        raise ValueError(f"LLM_BACKEND must be one of {', '.join(LLM_BACKENDS)}, got {backend!r}")
+    return backend
+
+
+def build_http_client(backend: str = "groq") -> httpx.Client:
+    """Create the pooled httpx client used for all Groq traffic."""
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("GROQ_POOL_MAX_CONNECTIONS", 20)),
+        max_keepalive_connections=int(os.getenv("GROQ_POOL_MAX_KEEPALIVE", 10)),
+        keepalive_expiry=float(os.getenv("GROQ_POOL_KEEPALIVE_SECONDS", 120)),
+    )
+    timeout = httpx.Timeout(
+        float(os.getenv("LLM_TIMEOUT_SECONDS", 20)),
+        connect=float(os.getenv("GROQ_CONNECT_TIMEOUT_SECONDS", 5)),
+    )
+    transport = httpx.HTTPTransport(http2=http2_available(), limits=limits)
+    if backend in ("record", "replay"):
+        cassette_dir = os.getenv("LLM_CASSETTE_DIR", DEFAULT_CASSETTE_DIR)
+        transport = CassetteTransport(cassette_dir, backend, inner=transport if backend == "record" else None)
+    return httpx.Client(
+        transport=transport,
+        timeout=timeout,
+        follow_redirects=True,
+    )
+
+
+def get_groq_client() -> Groq:
+    """
+    Return the process-wide Groq client, creating it on first use.
+    Rebuilt after a fork so gunicorn workers never share sockets.
+    Raises ValueError if GROQ_API_KEY is not configured.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+
+    with _lock:
+        if _client is None or _client_pid != pid:
+            backend = llm_backend()
+            api_key = os.getenv("GROQ_API_KEY")
+            base_url = None
+            if backend == "fake" or (backend == "record" and os.getenv("FAKE_GROQ_URL")):
+                base_url = os.getenv("FAKE_GROQ_URL", "http://127.0.0.1:8001")
+            if base_url or backend == "replay":
+                # No real key needed offline
+                api_key = api_key or "offline-placeholder-key"
+            if not api_key:
+                raise ValueError("GROQ_API_KEY environment variable is not set")
+            http_client = build_http_client(backend)
+            # Retries are owned by the resilience layer in llm_service
+            _client = Groq(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+            _client_pid = pid
+            logger.info(
+                "Groq client initialized (backend=%s, http2=%s, pid=%s)", backend, http2_available(), pid
+            )
+    return _client
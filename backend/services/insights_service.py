@@ -6,9 +6,11 @@ Uses sentiment analysis and pattern detection.
 
 import logging
 import random
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 
+from backend.services.sentiment_service import NEGATIVE_HIGH_INTENSITY
+
 logger = logging.getLogger(__name__)
 
 class InsightsGenerator:
@@ -17,6 +19,14 @@ class InsightsGenerator:
     based on user's mood patterns and journal entries.
     """
     
+    # Minimum hours between two insights of the same type
+    COOLDOWN_HOURS = {
+        'daily_tip': 24,  # Once per day
+        'mood_pattern': 48,  # Every 2 days
+        'wellness_recommendation': 6,  # Every 6 hours
+        'crisis_support': 0  # No cooldown for crisis
+    }
+
     def __init__(self):
         # Daily wellness tips (general advice)
         self.daily_tips = [
@@ -126,8 +136,23 @@ class InsightsGenerator:
         # Calculate pattern metrics
         negative_count = sum(1 for s in sentiment_history if s.get('sentiment_label') == 'negative')
         positive_count = sum(1 for s in sentiment_history if s.get('sentiment_label') == 'positive')
-        total_count = len(sentiment_history)
-        
+        return self._mood_pattern_insight(negative_count, positive_count, len(sentiment_history))
+    
+    def analyze_mood_trend(self, trend_analysis: Dict) -> Dict:
+        """
+        Same as analyze_mood_patterns, from the label counts of a
+        SentimentAnalyzer trend analysis (see SentimentAnalyzer.trend_from_state).
+        """
+        total_count = trend_analysis.get('total_entries', 0)
+        if total_count < 2:
+            return None
+        return self._mood_pattern_insight(
+            trend_analysis.get('negative_count', 0),
+            trend_analysis.get('positive_count', 0),
+            total_count
+        )
+    
+    def _mood_pattern_insight(self, negative_count: int, positive_count: int, total_count: int) -> Dict:
         # Determine trend
         if negative_count > total_count * 0.6:
             trend = 'declining'
@@ -169,14 +194,14 @@ class InsightsGenerator:
         
         Args:
             sentiment: Current sentiment (positive, negative, neutral)
-            sentiment_score: Confidence score
+            sentiment_score: Negative intensity (sentiment_service.negative_intensity)
             
         Returns:
             Dict with wellness recommendation
         """
         # Determine intensity level
         if sentiment == 'negative':
-            if sentiment_score and sentiment_score > 0.8:
+            if sentiment_score and sentiment_score >= NEGATIVE_HIGH_INTENSITY:
                 level = 'negative_high'
             else:
                 level = 'negative_medium'
@@ -279,46 +304,25 @@ class InsightsGenerator:
             'priority': priority
         }
     
-    def should_generate_insight(self, existing_insights: List[Dict], 
+    def should_generate_insight(self, last_generated_at: Optional[datetime],
                                insight_type: str) -> bool:
         """
         Check if a new insight of given type should be generated.
         Prevents spam by checking recency.
         
         Args:
-            existing_insights: User's existing insights
+            last_generated_at: When the user's latest insight of this type was
+                created (WellnessInsight.last_created_at), None if never
             insight_type: Type of insight to check
             
         Returns:
             Boolean indicating if new insight should be generated
         """
-        if not existing_insights:
+        if last_generated_at is None:
             return True
         
-        # Check for recent insights of same type
-        now = datetime.utcnow()
-        cooldown_hours = {
-            'daily_tip': 24,  # Once per day
-            'mood_pattern': 48,  # Every 2 days
-            'wellness_recommendation': 6,  # Every 6 hours
-            'crisis_support': 0  # No cooldown for crisis
-        }
-        
-        cooldown = cooldown_hours.get(insight_type, 24)
-        cutoff_time = now - timedelta(hours=cooldown)
-        
-        for insight in existing_insights:
-            if insight.get('insight_type') == insight_type:
-                created_str = insight.get('created_at')
-                if created_str:
-                    try:
-                        created_at = datetime.fromisoformat(created_str.replace('Z', '+00:00'))
-                        if created_at > cutoff_time:
-                            return False
-                    except:
-                        pass
-        
-        return True
+        cooldown = self.COOLDOWN_HOURS.get(insight_type, 24)
+        return last_generated_at <= datetime.utcnow() - timedelta(hours=cooldown)
 
 
 # Singleton instance
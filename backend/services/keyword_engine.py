@@ -0,0 +1,238 @@
+"""
+Keyword Engine
+One precompiled matcher for every keyword lexicon in the app (chat intents,
+sentiment words, crisis phrases, help referrals and journal tags).
+
+All terms are compiled into a single alternation regex with word boundaries,
+so one pass over a message finds every hit in every category. Cost is linear
+in the length of the text, not in the size of the lexicons, and all modules
+agree on what matched. Crisis terms are stems matched anywhere in the text
+(like the substring check they replaced) by a second precompiled regex.
+"""
+
+import re
+from typing import Dict, Iterable, List
+
+# === Lexicons (category -> terms) ===
+# Crisis terms are stems: each matches wherever it appears and runs to the end
+# of the word ("suicid" -> suicidality, "self harm" -> self-harms), so recall
+# is never lower than a plain substring check. CRISIS_MUST_FLAG below guards
+# it (check with `python -m backend.tools.crisis_recall`).
+CRISIS_KEYWORDS = [
+    'suicid',
+    'kill myself', 'killing myself', 'killed myself',
+    'end it all', 'ending it all', 'end my life', 'ending my life', 'ended my life',
+    'take my own life', 'taking my own life', 'took my own life', 'take my life', 'taking my life',
+    'want to die', 'wanted to die', 'wanting to die', 'wanna die', 'feel like dying',
+    'wish i was dead', 'wish i were dead', 'better off dead', 'no reason to live', 'not worth living',
+    'self harm', 'selfharm', 'self injur',
+    'harm myself', 'harming myself', 'harmed myself',
+    'hurt myself', 'hurting myself',
+    'cut myself', 'cutting myself',
+    'overdos',
+]
+
+# Messages that must be flagged as crisis / must not be (regression table)
+CRISIS_MUST_FLAG = [
+    "I want to kill myself",
+    "thinking of killing myself",
+    "I overdosed last night",
+    "I keep thinking about overdosing",
+    "I keep self-harming",
+    "self harming again",
+    "I've been cutting myself",
+    "I keep hurting myself",
+    "I feel suicidal",
+    "I just want to end it all",
+    "I want to end my life",
+    "everyone would be better off dead without me",
+    "I have no reason to live",
+    "I wanna die",
+    "I think about suicidality",
+    "he self-harms",
+    "selfharming again",
+    "I wanted to die",
+    "I feel like dying",
+]
+CRISIS_MUST_NOT_FLAG = [
+    "I killed it at work today",
+    "this deadline is killing me",
+    "I cut my hair",
+    "I'm reading a book about skill building",
+]
+
+LEXICONS = {
+    # Chat intents with canned replies (llm_service)
+    "intent:fatigue": ["tired", "exhausted", "fatigued", "burnt out", "drained"],
+    "intent:sadness": ["sad", "down", "depressed", "hopeless", "lonely"],
+    "intent:anger": ["angry", "mad", "furious", "irritated", "upset"],
+
+    # Sentiment words (sentiment_service)
+    "sentiment:positive": [
+        'happy', 'good', 'great', 'fantastic', 'joy', 'joyful', 'glad', 'pleased', 'love', 'excited'
+    ],
+    "sentiment:negative": [
+        'sad', 'down', 'depressed', 'unhappy', 'angry', 'annoyed', 'tired', 'anxious', 'stressed', 'lonely'
+    ],
+
+    # Crisis detection (sentiment_service, llm_service, ai_chat); stems, see PREFIX_CATEGORIES
+    "crisis": CRISIS_KEYWORDS,
+
+    # Phrases in an AI reply that mean it referred the user to help (ai_chat)
+    "help_referral": ['suicide', 'kill yourself', 'seek professional help', 'emergency services'],
+
+    # Journal tags (backend/journal_service.py)
+    "tag:work": ['work', 'working', 'worked', 'job', 'office'],
+    "tag:family": ['family', 'families'],
+    "tag:health": ['health', 'healthy'],
+    "tag:stress": ['stress', 'stressed', 'stressful'],
+    "tag:happiness": ['happiness'],
+    "tag:goals": ['goal', 'goals'],
+    "tag:relationships": ['relationship', 'relationships'],
+    "tag:anxiety": ['anxiety'],
+    "tag:accomplishment": ['accomplishment', 'accomplishments', 'accomplished'],
+}
+
+# Categories whose terms are stems matched anywhere in a word, not whole words
+PREFIX_CATEGORIES = ("crisis",)
+
+
+_SEPARATORS = re.compile(r"[\s-]+")
+
+
+def _normalize(term: str) -> str:
+    return " ".join(_SEPARATORS.split(term))
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """
+    One regex for all terms, with shared prefixes factored out ("self harm",
+    "self harming" -> self[\\s-]+harm(?:ing)?), which the re engine scans
+    several times faster than a flat alternation. Longer continuations are
+    tried first, so multi-word phrases win over their prefixes; words in a
+    phrase may be split by any whitespace or hyphens ("self-harm").
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for i, word in enumerate(term.split()):
+            if i:
+                node = node.setdefault(" ", {})
+            for char in word:
+                node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node):
+        branches = [(r"[\s-]+" if key == " " else re.escape(key)) + emit(child)
+                    for key, child in sorted(node.items()) if key]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            return "(?:" + body + ")?" if len(branches) > 1 or len(body) > 1 else body + "?"
+        return body
+
+    return "(?:" + emit(trie) + ")"
+
+
+class KeywordHits:
+    """Result of one scan: matched terms (in order of first appearance) and counts per category."""
+
+    __slots__ = ("terms_by_category", "counts")
+
+    def __init__(self):
+        self.terms_by_category: Dict[str, List[str]] = {}
+        self.counts: Dict[str, int] = {}
+
+    def has(self, category: str) -> bool:
+        return category in self.counts
+
+    def terms(self, category: str) -> List[str]:
+        return self.terms_by_category.get(category, [])
+
+    def count(self, category: str) -> int:
+        return self.counts.get(category, 0)
+
+    def categories(self, prefix: str = "") -> List[str]:
+        """Matched categories starting with prefix, in order of first appearance."""
+        return [c for c in self.terms_by_category if c.startswith(prefix)]
+
+
+class KeywordMatcher:
+    def __init__(self, lexicons: Dict[str, Iterable[str]], prefix_categories: Iterable[str] = ()):
+        prefix_categories = set(prefix_categories)
+        self._categories: Dict[str, tuple] = {}
+        self._stem_categories: Dict[str, tuple] = {}
+        for category, terms in lexicons.items():
+            index = self._stem_categories if category in prefix_categories else self._categories
+            for term in terms:
+                key = " ".join(term.lower().split())
+                index[key] = index.get(key, ()) + (category,)
+
+        self.terms: List[str] = sorted(self._categories, key=len, reverse=True)
+        self.term_index: Dict[str, int] = {term: i for i, term in enumerate(self.terms)}
+        self._pattern = re.compile(r"(?<!\w)" + _trie_pattern(self.terms) + r"(?!\w)")
+        self._stem_pattern = None
+        if self._stem_categories:
+            self._stem_pattern = re.compile("(" + _trie_pattern(self._stem_categories) + r")\w*")
+
+    def categories_of(self, term: str) -> tuple:
+        return self._categories.get(term, ())
+
+    def find_terms(self, text: str) -> List[str]:
+        """
+        Every lexicon term found in text, normalized: whole-word terms in order
+        of appearance, then stem matches as the full words matched.
+        """
+        return [term for term, _ in self._find(text)]
+
+    def _find(self, text: str) -> List[tuple]:
+        """(term, categories) for every hit in text."""
+        if not text:
+            return []
+        lower = text.lower()
+        index = self.term_index
+        categories = self._categories
+        found = []
+        for t in self._pattern.findall(lower):
+            # Only phrases written with extra spaces or hyphens need normalizing
+            term = t if t in index else _normalize(t)
+            found.append((term, categories[term]))
+        if self._stem_pattern is not None:
+            stems = self._stem_categories
+            for match in self._stem_pattern.finditer(lower):
+                found.append((_normalize(match.group(0)), stems[_normalize(match.group(1))]))
+        return found
+
+    def scan(self, text: str) -> KeywordHits:
+        return self._hits(self._find(text))
+
+    def scan_many(self, texts: List[str]) -> List[KeywordHits]:
+        """scan() for every text, in order."""
+        return [self._hits(self._find(text)) for text in texts]
+
+    @staticmethod
+    def _hits(found: List[tuple]) -> KeywordHits:
+        hits = KeywordHits()
+        for term, categories in found:
+            for category in categories:
+                hits.counts[category] = hits.counts.get(category, 0) + 1
+                seen = hits.terms_by_category.setdefault(category, [])
+                if term not in seen:
+                    seen.append(term)
+        return hits
+
+
+# Singleton instance
+_keyword_matcher = None
+
+def get_keyword_matcher() -> KeywordMatcher:
+    global _keyword_matcher
+    if _keyword_matcher is None:
+        _keyword_matcher = KeywordMatcher(LEXICONS, PREFIX_CATEGORIES)
+    return _keyword_matcher
+
+
+def scan(text: str) -> KeywordHits:
+    """Scan text with the shared matcher."""
+    return get_keyword_matcher().scan(text)
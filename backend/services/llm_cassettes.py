@@ -0,0 +1,93 @@
+"""
+LLM Record/Replay Cassettes
+An httpx transport that records Groq responses to JSON files and replays
+them later, so tests and benchmarks can run offline against real outputs.
+
+Requests are keyed by method, path and the canonical JSON body; each
+recorded exchange is one file in the cassette directory.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Headers worth keeping in a cassette; everything else is connection noise
+_KEPT_HEADERS = ("content-type", "retry-after", "retry-after-ms")
+
+
+class CassetteMissError(httpx.TransportError):
+    """Raised in replay mode when no recording exists for a request."""
+
+
+class CassetteTransport(httpx.BaseTransport):
+    def __init__(self, cassette_dir: str, mode: str, inner: httpx.BaseTransport = None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if mode == "record" and inner is None:
+            raise ValueError("record mode needs an inner transport")
+        self.cassette_dir = cassette_dir
+        self.mode = mode
+        self.inner = inner
+        os.makedirs(cassette_dir, exist_ok=True)
+
+    @staticmethod
+    def request_key(request: httpx.Request) -> str:
+        body = request.content or b""
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True).encode("utf-8")
+        except ValueError:
+            pass
+        digest = hashlib.sha256()
+        digest.update(request.method.encode("utf-8"))
+        digest.update(request.url.path.encode("utf-8"))
+        digest.update(body)
+        return digest.hexdigest()[:32]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cassette_dir, f"{key}.json")
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = self.request_key(request)
+        path = self._path(key)
+
+        if self.mode == "replay":
+            if not os.path.exists(path):
+                raise CassetteMissError(f"No cassette for {request.method} {request.url.path} ({key})", request=request)
+            with open(path, "r", encoding="utf-8") as f:
+                recorded = json.load(f)
+            return httpx.Response(
+                status_code=recorded["status_code"],
+                headers=recorded["headers"],
+                content=base64.b64decode(recorded["body"]),
+                request=request,
+            )
+
+        response = self.inner.handle_request(request)
+        content = response.read()
+        recorded = {
+            "request": {"method": request.method, "path": request.url.path},
+            "status_code": response.status_code,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() in _KEPT_HEADERS},
+            "body": base64.b64encode(content).decode("ascii"),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(recorded, f, indent=2)
+        logger.info("Recorded cassette %s for %s %s", key, request.method, request.url.path)
+        headers = {k: v for k, v in response.headers.items()
+                   if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")}
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=headers,
+            content=content,
+            request=request,
+        )
+
+    def close(self):
+        if self.inner is not None:
+            self.inner.close()
@@ -0,0 +1,179 @@
+"""
+LLM Resilience Helpers
+Per-call deadlines, bounded retries with jittered backoff (honoring Retry-After)
+and a circuit breaker for calls to the Groq API.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+import groq
+import httpx
+
+from backend.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is rejected because the circuit breaker is open."""
+
+
+class DeadlineExceededError(RuntimeError):
+    """Raised when the per-call deadline runs out before a response arrives."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    closed -> open after `failure_threshold` failures in a row; open -> half_open
+    once `reset_timeout` seconds have passed; a single trial call in half_open
+    either closes the breaker again or re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._publish()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if a call may go upstream right now."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Circuit breaker %s closed after successful trial call", self.name)
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+            self._publish()
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(
+                        "Circuit breaker %s opened after %d consecutive failures",
+                        self.name, self._failures
+                    )
+                    metrics.inc("llm_breaker_opened_total", breaker=self.name)
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._publish()
+
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+            self._publish()
+
+    def _publish(self):
+        metrics.set_gauge("llm_breaker_state", self._STATE_VALUES[self._state], breaker=self.name)
+        metrics.set_gauge("llm_breaker_consecutive_failures", self._failures, breaker=self.name)
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Timeouts, connection errors, 429 and 5xx responses are worth retrying."""
+    if isinstance(exc, (groq.APITimeoutError, groq.APIConnectionError)):
+        return True
+    if isinstance(exc, groq.APIStatusError):
+        return exc.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+
+def is_upstream_failure(exc: Exception) -> bool:
+    """
+    Whether an error says Groq itself is unhealthy (timeouts, connection
+    errors, 429 and 5xx) and should count towards opening the breaker.
+    Other 4xx responses mean our request was bad, not that Groq is down.
+    Streams that break mid-way raise httpx transport errors directly.
+    """
+    if isinstance(exc, (DeadlineExceededError, groq.APITimeoutError, groq.APIConnectionError,
+                        httpx.TransportError)):
+        return True
+    if isinstance(exc, groq.APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """Read a numeric Retry-After header from an API error, if present."""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = response.headers.get("retry-after")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None
+    return None
+
+
+def call_with_retries(fn: Callable[[float], object], deadline_seconds: float, max_retries: int,
+                      base_delay: float = 0.5, max_delay: float = 8.0, sleep=time.sleep):
+    """
+    Call fn(timeout) until it succeeds, a non-retryable error occurs, retries
+    run out or the overall deadline would be exceeded. `timeout` is the time
+    left before the deadline and should be passed on to the HTTP call.
+    """
+    deadline = time.monotonic() + deadline_seconds
+    attempt = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceededError(f"LLM call exceeded {deadline_seconds:.1f}s deadline")
+        try:
+            return fn(remaining)
+        except Exception as e:
+            if not is_retryable(e) or attempt >= max_retries:
+                raise
+            delay = retry_after_seconds(e)
+            if delay is None:
+                # Full jitter: spread retries so workers don't stampede together
+                delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            if time.monotonic() + delay >= deadline:
+                raise
+            attempt += 1
+            metrics.inc("llm_retries_total")
+            logger.info("Retrying Groq call in %.2fs (attempt %d/%d): %s", delay, attempt, max_retries, e)
+            sleep(delay)
@@ -6,37 +6,125 @@ Uses Groq API exclusively for all AI-powered chat and insights functionality.
 
 import os
 import logging
-from groq import Groq
+import threading
+import time
+
+from backend.services.groq_client import get_groq_client
+from backend.services.keyword_engine import scan
+from backend.services.llm_resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    call_with_retries,
+    is_upstream_failure,
+)
+from backend.services.metrics import metrics
+from backend.services.prompts import (
+    CRISIS_RESPONSE,
+    SERENI_SYSTEM_PROMPT,
+    build_conversation_prompt,
+    is_crisis_message,
+)
+
+logger = logging.getLogger("backend.llm_service")
+
+
+# === Canned replies served for detected intents, and while Groq is unavailable ===
+# Checked in this order; keywords live in keyword_engine.LEXICONS ("intent:<name>")
+INTENTS = ("fatigue", "sadness", "anger")
+
+GREETINGS = ["hi", "hello", "hey", "yo", "sup", "hiya", "hi there"]
+
+INTENT_REPLIES = {
+    "fatigue": (
+        "I hear you — exhaustion can really take a toll, both mentally and physically. "
+        "Do you want to talk about what's been wearing you down lately, or would you prefer "
+        "some quick ways to recharge right now?"
+    ),
+    "sadness": (
+        "That sounds really heavy 💭 — thank you for opening up about it. "
+        "Would you like to talk about what's been making you feel this way, or would you prefer "
+        "some gentle mood-lifting activities?"
+    ),
+    "anger": (
+        "Anger's totally valid — it's your mind's way of saying something's not right. "
+        "Do you want to unpack what triggered it, or should I walk you through a grounding technique first?"
+    ),
+    "fallback": (
+        "Thanks for sharing that with me — I'm here and listening. "
+        "Could you tell me a little more about what's on your mind?"
+    ),
+}
+
+
+# === Purpose-based model routing ===
+# Each purpose gets its own model, token budget, temperature and deadline.
+# Any field can be overridden with LLM_ROUTE_<PURPOSE>_<FIELD>, e.g.
+# LLM_ROUTE_JOURNAL_ANALYSIS_MODEL=llama-3.3-70b-versatile
+DEFAULT_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+
+ROUTE_DEFAULTS = {
+    "chat": {"model": DEFAULT_MODEL, "max_tokens": 512, "temperature": 0.7, "timeout": 20.0},
+    "check_in": {"model": DEFAULT_MODEL, "max_tokens": 160, "temperature": 0.8, "timeout": 10.0},
+    "journal_analysis": {"model": DEFAULT_MODEL, "max_tokens": 700, "temperature": 0.6, "timeout": 30.0},
+    "summary": {"model": DEFAULT_MODEL, "max_tokens": 256, "temperature": 0.3, "timeout": 20.0},
+}
+
+# Replies used for non-chat purposes when Groq is unavailable
+PURPOSE_FALLBACKS = {
+    "check_in": "Hi, it's Sereni 🌿 Just checking in — how are you feeling today?",
+    "journal_analysis": (
+        "Thank you for taking the time to write this down — reflecting on your feelings is a real act of self-care. "
+        "Be gentle with yourself today, and consider a few slow, deep breaths or a short walk to reset."
+    ),
+    "summary": "[Summary unavailable right now.]",
+}
+
+
+def load_routes():
+    """Build the routing table from ROUTE_DEFAULTS plus environment overrides."""
+    casts = {"model": str, "max_tokens": int, "temperature": float, "timeout": float}
+    routes = {}
+    for purpose, defaults in ROUTE_DEFAULTS.items():
+        route = dict(defaults)
+        for field, cast in casts.items():
+            value = os.getenv(f"LLM_ROUTE_{purpose.upper()}_{field.upper()}")
+            if value:
+                route[field] = cast(value)
+        routes[purpose] = route
+    return routes
 
 
 class LLMService:
     def __init__(self):
         """Initialize Groq-only LLM service."""
-        self.groq_key = os.getenv("GROQ_API_KEY")
-        if not self.groq_key:
-            raise ValueError("GROQ_API_KEY environment variable is not set")
-        
-        self.client = Groq(api_key=self.groq_key)
+        # === Resilience settings ===
+        # Retries are handled here (with jitter and a deadline), not by the SDK
+        self.TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 20))
+        self.MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+        self.MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+        self.breaker = CircuitBreaker(
+            "groq",
+            failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", 5)),
+            reset_timeout=float(os.getenv("LLM_BREAKER_RESET_SECONDS", 30)),
+        )
+        # Bulkhead: cap concurrent upstream calls so a slow Groq can't hold every worker
+        self._slots = threading.BoundedSemaphore(self.MAX_CONCURRENCY)
+
+        # Shared, pooled client (raises ValueError if GROQ_API_KEY is missing)
+        self.client = get_groq_client()
+        self.routes = load_routes()
+        if "LLM_ROUTE_CHAT_TIMEOUT" not in os.environ:
+            self.routes["chat"]["timeout"] = self.TIMEOUT_SECONDS
         
         # === Short-term memory for Sereni ===
         self.chat_history = []
         self.last_intent = None
 
         # === Sereni system personality prompt ===
-        self.SERENI_SYSTEM_PROMPT = (
-            "You are Sereni — a calm, kind, emotionally intelligent mental wellness companion. "
-            "You speak naturally, like a caring friend who truly listens. "
-            "Always show empathy, understanding, and warmth. "
-            "You help users reflect, ground themselves, and find calm without sounding robotic or overbearing. "
-            "Avoid medical advice. Focus on comfort, perspective, and emotional clarity. "
-            "Use soft, human-like tone and short, mindful sentences."
-        )
+        self.SERENI_SYSTEM_PROMPT = SERENI_SYSTEM_PROMPT
 
-        # Generation parameters
-        self.MAX_NEW_TOKENS = 512
-        self.TEMPERATURE = 0.7
+        # Generation parameters (model, max_tokens and temperature come from self.routes)
         self.TOP_P = 0.9
-        self.MODEL = "llama-3.1-8b-instant"
 
     # =====================================================
     # === RESPONSE GENERATION WITH MEMORY & INTENT ===
@@ -46,6 +134,8 @@ class LLMService:
         Generates a response using Groq API.
         Adds memory context, intent detection, and greeting handling.
         messages: [{"role": "user", "content": "text"}]
+        purpose: routing key ("chat", "check_in", "journal_analysis", "summary");
+        only "chat" uses conversation memory and canned intent replies.
         """
         # Safety checks
         if not hasattr(self, "chat_history"):
@@ -55,16 +145,24 @@ class LLMService:
         if not messages or "content" not in messages[-1]:
             return "[Invalid input — expected a list of chat messages.]"
 
+        if purpose != "chat":
+            return self._generate_task_response(messages[-1]["content"].strip(), purpose)
+
         user_message = messages[-1]["content"].strip()
-        self.chat_history.append(user_message)
-        # Keep last 10 messages
-        self.chat_history = self.chat_history[-10:]
+        user_input = build_conversation_prompt(self.chat_history[-6:], user_message)
+        self._remember("user", user_message)
 
         user_lower = user_message.lower()
 
+        # Crisis messages get the crisis protocol at once, never a queued Groq call
+        if is_crisis_message(user_message):
+            metrics.inc("llm_crisis_bypass_total")
+            self.last_intent = "crisis"
+            return CRISIS_RESPONSE
+
         # ===== Intent detection =====
         # Greeting intent
-        if user_lower in ["hi", "hello", "hey", "yo", "sup", "hiya", "hi there"]:
+        if user_lower in GREETINGS:
             if self.last_intent == "greeting":
                 self.last_intent = "followup"
                 return "Hey again 😊 How've you been holding up since we last chatted?"
@@ -72,93 +170,200 @@ class LLMService:
                 self.last_intent = "greeting"
                 return "Hey there 👋 It's really good to see you. How are you feeling today?"
 
-        # Fatigue intent
-        if any(word in user_lower for word in ["tired", "exhausted", "fatigued", "burnt out", "drained"]):
-            self.last_intent = "fatigue"
-            return (
-                "I hear you — exhaustion can really take a toll, both mentally and physically. "
-                "Do you want to talk about what's been wearing you down lately, or would you prefer "
-                "some quick ways to recharge right now?"
-            )
-
-        # Sadness intent
-        if any(word in user_lower for word in ["sad", "down", "depressed", "hopeless", "lonely"]):
-            self.last_intent = "sadness"
-            return (
-                "That sounds really heavy 💭 — thank you for opening up about it. "
-                "Would you like to talk about what's been making you feel this way, or would you prefer "
-                "some gentle mood-lifting activities?"
-            )
-
-        # Anger intent
-        if any(word in user_lower for word in ["angry", "mad", "furious", "irritated", "upset"]):
-            self.last_intent = "anger"
-            return (
-                "Anger's totally valid — it's your mind's way of saying something's not right. "
-                "Do you want to unpack what triggered it, or should I walk you through a grounding technique first?"
-            )
+        # Fatigue / sadness / anger intents
+        intent = self._detect_intent(user_lower)
+        if intent:
+            self.last_intent = intent
+            return INTENT_REPLIES[intent]
 
         # Default fallback
         self.last_intent = "chat"
-        context_prompt = "\n".join(self.chat_history[-6:])
-        user_input = f"Conversation so far:\n{context_prompt}\n\nUser: {user_message}\nSereni:"
 
         # ===== Call Groq API =====
         try:
-            completion = self.client.chat.completions.create(
-                model=self.MODEL,
+            completion = self._call_groq(
+                "chat",
                 messages=[
                     {"role": "system", "content": self.SERENI_SYSTEM_PROMPT},
                     {"role": "user", "content": user_input}
                 ],
-                temperature=self.TEMPERATURE,
-                max_tokens=self.MAX_NEW_TOKENS,
                 top_p=self.TOP_P,
                 stream=False,
             )
-            response = completion.choices[0].message.content.strip()
-            if response:
-                self.chat_history.append(response)
-                return response
-            return "[Empty response from Groq model.]"
         except Exception as e:
-            raise RuntimeError(f"Groq API error: {e}")
+            logger.error("Groq API error, serving canned reply: %s", e)
+            return self._fallback_reply(user_lower)
+
+        response = completion.choices[0].message.content.strip()
+        if response:
+            self._remember("assistant", response)
+            return response
+        return "[Empty response from Groq model.]"
+
+    def _generate_task_response(self, prompt, purpose):
+        """One-shot generation for non-chat purposes (no memory, no intents)."""
+        if purpose not in self.routes:
+            logger.warning("Unknown LLM purpose %r, using chat route", purpose)
+        try:
+            completion = self._call_groq(
+                purpose,
+                messages=[
+                    {"role": "system", "content": self.SERENI_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                top_p=self.TOP_P,
+                stream=False,
+            )
+        except Exception as e:
+            logger.error("Groq API error for purpose %s, serving canned reply: %s", purpose, e)
+            metrics.inc("llm_fallback_total")
+            return PURPOSE_FALLBACKS.get(purpose, INTENT_REPLIES["fallback"])
+
+        response = completion.choices[0].message.content.strip()
+        return response or "[Empty response from Groq model.]"
+
+    # =====================================================
+    # === RESILIENT GROQ CALLS ===
+    # =====================================================
+    def _call_groq(self, purpose, **params):
+        """
+        Call chat.completions.create with the route for `purpose`, behind the
+        circuit breaker and bulkhead, retrying 429/5xx/timeouts within the
+        route's per-call deadline (which includes waiting for a slot).
+
+        For stream=True the outcome is only known once the stream ends, so
+        the caller must report it with _record_outcome.
+        """
+        route = self.routes.get(purpose, self.routes["chat"])
+        deadline = time.monotonic() + route["timeout"]
+        if self.breaker.state == CircuitBreaker.OPEN:
+            metrics.inc("llm_calls_total", outcome="rejected_open")
+            raise CircuitOpenError("Groq circuit breaker is open")
+
+        if not self._slots.acquire(timeout=route["timeout"]):
+            metrics.inc("llm_calls_total", outcome="rejected_busy")
+            raise CircuitOpenError("Too many concurrent Groq calls")
+        try:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                metrics.inc("llm_calls_total", outcome="rejected_busy")
+                raise CircuitOpenError("No Groq slot free before the deadline")
+            # Re-checked under the slot so only one half-open trial goes through
+            if not self.breaker.allow_request():
+                metrics.inc("llm_calls_total", outcome="rejected_open")
+                raise CircuitOpenError("Groq circuit breaker is open")
+            try:
+                result = call_with_retries(
+                    lambda remaining: self.client.chat.completions.create(
+                        model=route["model"],
+                        max_tokens=route["max_tokens"],
+                        temperature=route["temperature"],
+                        timeout=remaining,
+                        **params
+                    ),
+                    deadline_seconds=remaining,
+                    max_retries=self.MAX_RETRIES,
+                )
+            except Exception as e:
+                self._record_outcome(purpose, e)
+                raise
+        finally:
+            self._slots.release()
+
+        if not params.get("stream"):
+            self._record_outcome(purpose)
+        return result
+
+    def _record_outcome(self, purpose, error=None):
+        """Feed a finished call into the breaker and llm_calls_total."""
+        if error is not None and is_upstream_failure(error):
+            self.breaker.record_failure()
+        else:
+            # Groq answered, even if it rejected the request itself
+            self.breaker.record_success()
+        metrics.inc("llm_calls_total", outcome="error" if error is not None else "ok", purpose=purpose)
+
+    def _remember(self, role, content):
+        """Append a turn to short-term memory, keeping the last 10."""
+        self.chat_history.append({"role": role, "content": content})
+        self.chat_history = self.chat_history[-10:]
+
+    def _detect_intent(self, user_lower):
+        hits = scan(user_lower)
+        for intent in INTENTS:
+            if hits.has(f"intent:{intent}"):
+                return intent
+        return None
+
+    def _fallback_reply(self, user_lower):
+        """Rule-based reply used when Groq is failing or the breaker is open."""
+        metrics.inc("llm_fallback_total")
+        return INTENT_REPLIES[self._detect_intent(user_lower) or "fallback"]
 
     def generate_streaming_response(self, messages):
         """
         Generates a streaming response using Groq API.
         Yields chunks of the response for real-time updates.
+
+        The upstream stream is closed as soon as this generator is closed
+        (e.g. the client disconnected and the WSGI server called close()),
+        so Groq stops generating tokens nobody will read.
         """
         if not messages or "content" not in messages[-1]:
             yield "[Invalid input — expected a list of chat messages.]"
             return
 
         user_message = messages[-1]["content"].strip()
-        self.chat_history.append(user_message)
-        self.chat_history = self.chat_history[-10:]
+        user_input = build_conversation_prompt(self.chat_history[-6:], user_message)
+        self._remember("user", user_message)
 
-        context_prompt = "\n".join(self.chat_history[-6:])
-        user_input = f"Conversation so far:\n{context_prompt}\n\nUser: {user_message}\nSereni:"
+        if is_crisis_message(user_message):
+            metrics.inc("llm_crisis_bypass_total")
+            yield CRISIS_RESPONSE
+            return
 
         try:
-            with self.client.chat.completions.create(
-                model=self.MODEL,
+            stream = self._call_groq(
+                "chat",
                 messages=[
                     {"role": "system", "content": self.SERENI_SYSTEM_PROMPT},
                     {"role": "user", "content": user_input}
                 ],
-                temperature=self.TEMPERATURE,
-                max_tokens=self.MAX_NEW_TOKENS,
                 top_p=self.TOP_P,
                 stream=True,
-            ) as stream:
-                full_response = ""
-                for text in stream.text_stream:
-                    full_response += text
+            )
+        except Exception as e:
+            logger.error("Groq streaming error, serving canned reply: %s", e)
+            yield self._fallback_reply(user_message.lower())
+            return
+
+        # Collect pieces in a list and join once instead of growing a string
+        parts = []
+        completed = False
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if text:
+                    parts.append(text)
                     yield text
-                self.chat_history.append(full_response)
+            completed = True
+            self._record_outcome("chat")
+        except GeneratorExit:
+            logger.info(
+                "Streaming consumer went away after %d chunks; closing Groq stream", len(parts)
+            )
+            # Groq was streaming fine; only the client left
+            self._record_outcome("chat")
+            raise
         except Exception as e:
+            self._record_outcome("chat", e)
             yield f"[Groq streaming error: {e}]"
+        finally:
+            stream.close()
+            if completed and parts:
+                self._remember("assistant", "".join(parts))
 
 
 # === GLOBAL SINGLETON ACCESS ===
@@ -173,9 +378,7 @@ def get_llm_service():
         except Exception as e:
             # Fail gracefully: log a helpful error and return None so callers
             # can respond with a 503 (service unavailable) instead of crashing
-            logging.getLogger("backend.llm_service").error(
-                "Failed to initialize LLMService: %s", e, exc_info=True
-            )
+            logger.error("Failed to initialize LLMService: %s", e, exc_info=True)
             _llm_service = None
     return _llm_service
 
@@ -0,0 +1,56 @@
+"""
+Maintenance Jobs
+Periodic housekeeping run by the scheduler (backend/services/scheduler.py):
+
+    auto_read_stale_insights - marks unread insights older than
+        INSIGHT_AUTO_READ_DAYS (default 7) as read, INSIGHT_AUTO_READ_BATCH_SIZE
+        (1000) at a time, so the unread set behind get_urgent_insights and
+        find_by_user(unread_only=True) stays small.
+    apply_retention_policies - rolls sentiment_history months older than
+        SENTIMENT_HISTORY_RETENTION_DAYS (400) up into monthly summaries and
+        deletes them, RETENTION_BATCH_SIZE (500) months per write. Chat turns
+        expire through a TTL index (CHAT_LOG_RETENTION_DAYS, 180); this job
+        only removes legacy turns with string dates, which TTL skips.
+"""
+
+import logging
+import os
+import time
+
+from backend.models import ChatLog, SentimentHistory, WellnessInsight
+from backend.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def auto_read_stale_insights(days: int = None) -> int:
+    """Mark stale unread insights of all users as read. Returns how many were marked."""
+    days = days if days is not None else int(os.getenv("INSIGHT_AUTO_READ_DAYS", 7))
+    batch_size = int(os.getenv("INSIGHT_AUTO_READ_BATCH_SIZE", 1000))
+
+    started = time.perf_counter()
+    marked = WellnessInsight.mark_stale_as_read(days=days, batch_size=batch_size)
+    elapsed = time.perf_counter() - started
+    metrics.observe("maintenance_seconds", elapsed, job="auto_read_stale_insights")
+    metrics.inc("insights_auto_read_total", marked)
+    logger.info("Marked %d insights older than %d days as read in %.1fs", marked, days, elapsed)
+    return marked
+
+
+def apply_retention_policies() -> dict:
+    """Archive expired sentiment history and delete expired legacy chat turns. Returns counts."""
+    batch_size = int(os.getenv("RETENTION_BATCH_SIZE", 500))
+
+    started = time.perf_counter()
+    months, records = SentimentHistory.archive_expired(batch_size=batch_size)
+    stats = {
+        "sentiment_months_archived": months,
+        "sentiment_records_deleted": records,
+        "legacy_chat_logs_deleted": ChatLog.delete_expired_legacy(),
+    }
+    elapsed = time.perf_counter() - started
+    metrics.observe("maintenance_seconds", elapsed, job="apply_retention_policies")
+    for key, value in stats.items():
+        metrics.inc("retention_items_total", value, kind=key)
+    logger.info("Applied retention policies in %.1fs: %s", elapsed, stats)
+    return stats
@@ -0,0 +1,93 @@
+"""
+In-process Metrics Registry
+Counters, gauges and latency summaries kept per worker process.
+Exposed as JSON on /api/metrics so dashboards and load tests can scrape them.
+"""
+
+import threading
+from collections import deque
+from typing import Dict
+
+
+class Metrics:
+    """Thread-safe store for counters, gauges and timing samples."""
+
+    # Number of recent samples kept per timing series for percentiles
+    MAX_SAMPLES = 512
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._timings = {}
+
+    @staticmethod
+    def _key(name: str, labels: Dict) -> str:
+        if not labels:
+            return name
+        rendered = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+        return f"{name}{{{rendered}}}"
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Increment a counter."""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        """Set a gauge to an absolute value."""
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record one timing/size sample."""
+        key = self._key(name, labels)
+        with self._lock:
+            series = self._timings.get(key)
+            if series is None:
+                series = {"count": 0, "sum": 0.0, "max": 0.0, "samples": deque(maxlen=self.MAX_SAMPLES)}
+                self._timings[key] = series
+            series["count"] += 1
+            series["sum"] += value
+            series["max"] = max(series["max"], value)
+            series["samples"].append(value)
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(self._key(name, labels), 0)
+
+    def gauge(self, name: str, **labels):
+        with self._lock:
+            return self._gauges.get(self._key(name, labels))
+
+    def snapshot(self) -> Dict:
+        """Return a JSON-serializable copy of every series."""
+        with self._lock:
+            timings = {}
+            for key, series in self._timings.items():
+                samples = sorted(series["samples"])
+                timings[key] = {
+                    "count": series["count"],
+                    "avg": round(series["sum"] / series["count"], 3) if series["count"] else 0.0,
+                    "max": round(series["max"], 3),
+                    "p50": round(_percentile(samples, 0.50), 3),
+                    "p95": round(_percentile(samples, 0.95), 3),
+                    "p99": round(_percentile(samples, 0.99), 3),
+                }
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timings": timings,
+            }
+
+
+def _percentile(sorted_samples, fraction):
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+    return float(sorted_samples[index])
+
+
+# Singleton instance
+metrics = Metrics()
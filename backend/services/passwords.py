@@ -0,0 +1,128 @@
+"""
+Password Hashing
+bcrypt is deliberately slow CPU work (tens to hundreds of ms per call), so
+hashing and checking run on a small bounded executor instead of directly on
+request threads: at most PASSWORD_HASH_CONCURRENCY (default: CPU count)
+hashes run at once, and at most PASSWORD_HASH_MAX_PENDING (4x that) are
+running or waiting. A caller that can't get a slot within
+PASSWORD_HASH_WAIT_SECONDS (2) gets PasswordHasherBusyError, which the
+routes answer with 503 + Retry-After, so a login storm queues briefly and
+then sheds load instead of tying up every worker.
+
+The cost comes from BCRYPT_LOG_ROUNDS (pick it with
+`python -m backend.tools.bcrypt_cost`). Hashes made with another cost are
+upgraded after the next successful login (see needs_rehash), in the
+background and only when the pool has a free slot.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.extensions import bcrypt
+from backend.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusyError(RuntimeError):
+    """Too many password hashes are already running or waiting."""
+
+
+class PasswordHasher:
+    def __init__(self):
+        self.concurrency = int(os.getenv("PASSWORD_HASH_CONCURRENCY", os.cpu_count() or 2))
+        self.max_pending = int(os.getenv("PASSWORD_HASH_MAX_PENDING", self.concurrency * 4))
+        self.wait_seconds = float(os.getenv("PASSWORD_HASH_WAIT_SECONDS", 2))
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Executor threads don't survive fork; build one per process
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="bcrypt")
+                    self._pid = pid
+        return self._executor
+
+    def _run(self, operation: str, fn, *args):
+        if not self._slots.acquire(timeout=self.wait_seconds):
+            metrics.inc("password_hash_rejected_total", operation=operation)
+            raise PasswordHasherBusyError("Password hashing is at capacity")
+        started = time.perf_counter()
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+            metrics.observe("password_hash_seconds", time.perf_counter() - started, operation=operation)
+
+    @property
+    def rounds(self) -> int:
+        return bcrypt._log_rounds
+
+    def hash(self, password: str) -> str:
+        return self._run("hash", bcrypt.generate_password_hash, password).decode("utf-8")
+
+    def hash_in_background(self, password: str, on_done) -> bool:
+        """
+        Hash without waiting and call on_done(hash) on the pool thread. Only
+        takes a slot that is free right now: returns False (and does nothing)
+        when the pool is busy, so optional work never delays or fails a request.
+        """
+        if not self._slots.acquire(blocking=False):
+            metrics.inc("password_hash_rejected_total", operation="background_hash")
+            return False
+        started = time.perf_counter()
+
+        def finish(future):
+            self._slots.release()
+            metrics.observe("password_hash_seconds", time.perf_counter() - started, operation="background_hash")
+            try:
+                on_done(future.result().decode("utf-8"))
+            except Exception as e:
+                logger.error("Background password hash failed: %s", e)
+
+        try:
+            self._get_executor().submit(bcrypt.generate_password_hash, password).add_done_callback(finish)
+        except Exception:
+            self._slots.release()
+            raise
+        return True
+
+    def check(self, password_hash: str, password: str) -> bool:
+        if not password_hash:
+            return False
+        return self._run("check", bcrypt.check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """True when the hash was made with a cost other than BCRYPT_LOG_ROUNDS."""
+        # Modular crypt format: $2b$<cost>$<salt+hash>
+        parts = (password_hash or "").split("$")
+        if len(parts) < 4 or not parts[2].isdigit():
+            return False
+        return int(parts[2]) != self.rounds
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+# Singleton instance
+_hasher = None
+_hasher_lock = threading.Lock()
+
+def get_password_hasher() -> PasswordHasher:
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher()
+                atexit.register(_hasher.shutdown)
+    return _hasher
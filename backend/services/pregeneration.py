@@ -0,0 +1,88 @@
+"""
+Nightly Pre-generation
+Creates each active user's daily tip and proactive check-in message ahead
+of time, so the morning's first app open is a cached read instead of a
+burst of Groq calls and Mongo writes.
+
+Active users (logged in within PREGENERATION_ACTIVE_DAYS, default 7) are
+read with a batched cursor PREGENERATION_BATCH_SIZE (500) ids at a time.
+Per batch: one query each for trend states and already generated tips and
+check-ins, then one bulk_write for tips and one for check-ins. Check-in LLM
+calls are paced by a token bucket (PREGENERATION_LLM_RATE per second, burst
+PREGENERATION_LLM_BURST). Writes are upserts keyed by (user_id, day), so a
+rerun, or a user opening the app mid-run, never produces a second copy.
+"""
+
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+from backend.models import CheckInMessage, SentimentTrend, User, WellnessInsight
+from backend.models.ids import utc_day
+from backend.services.check_ins import compose_check_in
+from backend.services.insights_service import get_insights_generator
+from backend.services.metrics import metrics
+from backend.services.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+def pregenerate_daily_content(day: str = None) -> dict:
+    """Generate missing daily tips and check-ins for `day` (default today, UTC). Returns counts."""
+    day = day or utc_day()
+    active_days = int(os.getenv("PREGENERATION_ACTIVE_DAYS", 7))
+    batch_size = int(os.getenv("PREGENERATION_BATCH_SIZE", 500))
+    limiter = TokenBucket(
+        rate=float(os.getenv("PREGENERATION_LLM_RATE", 2)),
+        capacity=float(os.getenv("PREGENERATION_LLM_BURST", 5)),
+    )
+    insights_gen = get_insights_generator()
+
+    started = time.perf_counter()
+    stats = {"users": 0, "daily_tips": 0, "check_ins": 0, "check_in_fallbacks": 0}
+    since = datetime.utcnow() - timedelta(days=active_days)
+
+    for user_ids in User.iter_active_ids(since, batch_size=batch_size):
+        states = SentimentTrend.find_by_users(user_ids)
+        have_tip = WellnessInsight.users_with_daily(user_ids, day)
+        have_check_in = CheckInMessage.users_with_day(user_ids, day)
+
+        tips = []
+        check_ins = []
+        for user_id in user_ids:
+            state = states.get(user_id)
+            if user_id not in have_tip:
+                data = insights_gen.generate_daily_insight(
+                    str(user_id), sentiment_history=SentimentTrend.recent_records(state)
+                )
+                insight = WellnessInsight(
+                    user_id=user_id,
+                    insight_type=data['insight_type'],
+                    insight_text=data['insight_text'],
+                    recommendation=data.get('recommendation'),
+                    activity_suggestion=data.get('activity_suggestion'),
+                    priority=data['priority']
+                )
+                insight.day = day
+                tips.append(insight)
+            if user_id not in have_check_in:
+                check_in = compose_check_in(user_id, state, day, limiter=limiter)
+                if check_in.source == "fallback":
+                    # LLM unavailable: leave it to the user's first request
+                    stats["check_in_fallbacks"] += 1
+                else:
+                    check_ins.append(check_in)
+
+        WellnessInsight.bulk_create_daily(tips)
+        CheckInMessage.bulk_create(check_ins)
+        stats["users"] += len(user_ids)
+        stats["daily_tips"] += len(tips)
+        stats["check_ins"] += len(check_ins)
+
+    elapsed = time.perf_counter() - started
+    metrics.observe("pregeneration_seconds", elapsed)
+    for key in ("daily_tips", "check_ins", "check_in_fallbacks"):
+        metrics.inc("pregeneration_items_total", stats[key], kind=key)
+    logger.info("Pre-generated daily content for %s in %.1fs: %s", day, elapsed, stats)
+    return stats
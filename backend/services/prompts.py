@@ -0,0 +1,83 @@
+"""
+Sereni Prompts
+System prompt, crisis protocol text and conversation-context formatting
+used by the chat service (llm_service) and the chat routes.
+"""
+
+from typing import Dict, List, Optional
+
+from backend.services.keyword_engine import scan
+
+SERENI_SYSTEM_PROMPT = (
+    "You are Sereni — a calm, kind, emotionally intelligent mental wellness companion. "
+    "You speak naturally, like a caring friend who truly listens. "
+    "Always show empathy, understanding, and warmth. "
+    "You help users reflect, ground themselves, and find calm without sounding robotic or overbearing. "
+    "Avoid medical advice. Focus on comfort, perspective, and emotional clarity. "
+    "Use soft, human-like tone and short, mindful sentences. "
+    "If someone is in crisis, gently remind them to seek professional help immediately."
+)
+
+CRISIS_RESPONSE = (
+    "I'm really concerned about what you're sharing. Please know that you're not alone, "
+    "and there are people who want to help. I strongly encourage you to seek immediate help if you're in danger."
+)
+
+
+WELCOME_CHECK_IN = (
+    "Welcome! I'm Sereni, your mental wellness companion. "
+    "I'm here to support you on your wellness journey. "
+    "How are you feeling today?"
+)
+
+
+def is_crisis_message(message: str) -> bool:
+    return scan(message).has("crisis")
+
+
+def build_check_in_prompt(trend_analysis: Dict) -> str:
+    """Prompt for a proactive check-in, from a SentimentAnalyzer trend analysis."""
+    prompt = f"Based on your recent mood patterns, you seem to be {trend_analysis.get('trend', 'stable')}. "
+    if trend_analysis.get('risk_level') == 'high':
+        prompt += "I'm here if you'd like to talk about what's been going on."
+    elif trend_analysis.get('trend') == 'improving':
+        prompt += "It's great to see things looking up! How are you feeling today?"
+    else:
+        prompt += "How are you doing today?"
+    return prompt
+
+
+def build_conversation_prompt(turns: List[Dict], user_message: str,
+                              note: Optional[str] = None) -> str:
+    """
+    Format recent turns plus the new message into a single user prompt.
+    turns: [{"role": "user" | "assistant", "content": "..."}]
+    """
+    lines = []
+    if turns:
+        lines.append("Conversation so far:")
+        for turn in turns:
+            speaker = "User" if turn.get("role", "user") == "user" else "Sereni"
+            lines.append(f"{speaker}: {turn.get('content', '')}")
+        lines.append("")
+    if note:
+        lines.append(f"({note})")
+    lines.append(f"User: {user_message}")
+    lines.append("Sereni:")
+    return "\n".join(lines)
+
+
+def build_journal_analysis_prompt(entry_text: str) -> str:
+    """Prompt asking for gentle insights on a journal entry."""
+    return f"""You are Sereni, a warm, empathetic wellness companion.
+Analyze the following journal entry and provide gentle, helpful insights.
+
+Focus on:
+- The user's emotional tone and state
+- Possible underlying thoughts or stressors
+- One short motivational message
+- One practical self-care suggestion
+
+Journal Entry:
+"{entry_text}"
+"""
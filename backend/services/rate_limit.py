@@ -0,0 +1,166 @@
+"""
+Rate Limiting
+Token bucket used to pace outbound work (e.g. LLM calls from scheduled jobs),
+and per-key buckets that throttle inbound auth requests.
+
+Login and registration are limited per client IP and per email before any
+database or bcrypt work (backend.decorators.rate_limited). Buckets live in
+process memory by default; RATE_LIMIT_STORE=mongo shares them across workers
+and instances through the rate_limits collection. Limits, as requests per
+minute and burst size:
+
+    AUTH_RATE_LIMIT_IP_PER_MINUTE / _IP_BURST        (default 10 / 20)
+    AUTH_RATE_LIMIT_EMAIL_PER_MINUTE / _EMAIL_BURST  (default 3 / 5)
+
+AUTH_RATE_LIMIT_ENABLED=false turns the auth limits off.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from backend.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: holds up to `capacity` tokens and refills at
+    `rate` tokens per second.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> Tuple[bool, float]:
+        """Take tokens if available. Returns (acquired, seconds until they would be)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True, 0.0
+            return False, (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """Block until tokens are available, or `timeout` seconds pass (False)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            acquired, wait = self.try_acquire(tokens)
+            if acquired:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining < wait:
+                    return False
+            time.sleep(wait)
+
+
+class KeyedTokenBuckets:
+    """One TokenBucket per key (client IP, email, ...), keeping the max_keys most recently used."""
+
+    def __init__(self, rate: float, capacity: float, max_keys: int = 10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, key: str, tokens: float = 1) -> Tuple[bool, float]:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity)
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+        return bucket.try_acquire(tokens)
+
+
+class MongoTokenBuckets:
+    """KeyedTokenBuckets kept in Mongo (RateLimitBucket), shared by all processes."""
+
+    def __init__(self, scope: str, rate: float, capacity: float):
+        self.scope = scope
+        self.rate = rate
+        self.capacity = capacity
+        # Used while Mongo is unreachable, so auth keeps a per-process limit
+        self._fallback = KeyedTokenBuckets(rate, capacity)
+
+    def try_acquire(self, key: str, tokens: float = 1) -> Tuple[bool, float]:
+        from backend.models import RateLimitBucket
+        try:
+            return RateLimitBucket.take(f"{self.scope}:{key}", self.rate, self.capacity, tokens)
+        except Exception as e:
+            logger.warning("Shared rate limit store failed, using in-process buckets: %s", e)
+            return self._fallback.try_acquire(key, tokens)
+
+
+class AuthRateLimiter:
+    def __init__(self):
+        self.enabled = os.getenv("AUTH_RATE_LIMIT_ENABLED", "true").lower() == "true"
+        self.store = os.getenv("RATE_LIMIT_STORE", "memory").lower()
+        if self.store not in ("memory", "mongo"):
+            raise ValueError(f"RATE_LIMIT_STORE must be memory or mongo, got {self.store!r}")
+        self.limits = {
+            "ip": (float(os.getenv("AUTH_RATE_LIMIT_IP_PER_MINUTE", 10)) / 60,
+                   float(os.getenv("AUTH_RATE_LIMIT_IP_BURST", 20))),
+            "email": (float(os.getenv("AUTH_RATE_LIMIT_EMAIL_PER_MINUTE", 3)) / 60,
+                      float(os.getenv("AUTH_RATE_LIMIT_EMAIL_BURST", 5))),
+        }
+        self._buckets: Dict[Tuple[str, str], object] = {}
+        self._lock = threading.Lock()
+
+    def _buckets_for(self, action: str, limit: str):
+        key = (action, limit)
+        with self._lock:
+            if key not in self._buckets:
+                rate, capacity = self.limits[limit]
+                if self.store == "mongo":
+                    self._buckets[key] = MongoTokenBuckets(f"{action}:{limit}", rate, capacity)
+                else:
+                    self._buckets[key] = KeyedTokenBuckets(rate, capacity)
+            return self._buckets[key]
+
+    def check(self, action: str, ip: Optional[str], email: Optional[str] = None) -> float:
+        """Count one `action` attempt. Returns 0 if allowed, else seconds to wait before retrying."""
+        if not self.enabled:
+            return 0.0
+        checks = [("ip", ip or "unknown")]
+        if email:
+            checks.append(("email", str(email).strip().lower()))
+        # IP first, so a limited IP does not also spend the email's tokens
+        for limit, key in checks:
+            acquired, wait = self._buckets_for(action, limit).try_acquire(key)
+            if not acquired:
+                metrics.inc("auth_rate_limited_total", action=action, limit=limit)
+                return max(wait, 0.001)
+        metrics.inc("auth_rate_limit_allowed_total", action=action)
+        return 0.0
+
+
+# Singleton instance
+_auth_limiter = None
+_auth_limiter_lock = threading.Lock()
+
+def get_auth_limiter() -> AuthRateLimiter:
+    global _auth_limiter
+    if _auth_limiter is None:
+        with _auth_limiter_lock:
+            if _auth_limiter is None:
+                _auth_limiter = AuthRateLimiter()
+    return _auth_limiter
@@ -0,0 +1,115 @@
+"""
+Scheduled Jobs
+APScheduler background scheduler for periodic work:
+
+    pregenerate_daily_content - daily at PREGENERATION_HOUR:00 UTC (default 4)
+    auto_read_stale_insights  - daily at MAINTENANCE_HOUR:00 UTC (default 3)
+    apply_retention_policies  - daily at MAINTENANCE_HOUR:30 UTC
+
+create_app starts it when SCHEDULER_ENABLED=true. Every process may run a
+scheduler: each job run first takes a cluster-wide JobLock (heartbeat
+renewed every third of JOB_LOCK_TTL_SECONDS, default 60) and is skipped if
+another process holds it or completed it within the job's min_interval, so
+each job runs once per schedule across all workers and instances.
+"""
+
+import atexit
+import functools
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from backend.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_scheduler = None
+
+
+def _exclusive(app, job, min_interval: timedelta):
+    """Wrap `job` to run in an app context, holding its JobLock, at most once per min_interval."""
+    name = job.__name__
+    ttl = int(os.getenv("JOB_LOCK_TTL_SECONDS", 60))
+
+    @functools.wraps(job)
+    def run():
+        from backend.models import JobLock
+        owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        lock = JobLock.acquire(name, owner, ttl)
+        if lock is None:
+            metrics.inc("scheduled_jobs_total", job=name, outcome="skipped_locked")
+            return
+        last_completed = lock.get("last_completed_at")
+        if last_completed and last_completed > datetime.utcnow() - min_interval:
+            JobLock.release(name, owner)
+            metrics.inc("scheduled_jobs_total", job=name, outcome="skipped_recent")
+            return
+
+        stop_heartbeat = threading.Event()
+
+        def heartbeat():
+            while not stop_heartbeat.wait(ttl / 3):
+                if not JobLock.renew(name, owner, ttl):
+                    logger.warning("Lost job lock %s while running; another process may start it", name)
+                    return
+
+        threading.Thread(target=heartbeat, name=f"job-lock-{name}", daemon=True).start()
+        completed = False
+        try:
+            with app.app_context():
+                job()
+            completed = True
+            metrics.inc("scheduled_jobs_total", job=name, outcome="ok")
+        except Exception as e:
+            metrics.inc("scheduled_jobs_total", job=name, outcome="error")
+            logger.error("Scheduled job %s failed: %s", name, e, exc_info=True)
+        finally:
+            stop_heartbeat.set()
+            JobLock.release(name, owner, completed=completed)
+    return run
+
+
+def init_scheduler(app):
+    """Start the background scheduler once per process and register the jobs."""
+    global _scheduler
+    if _scheduler is not None:
+        return _scheduler
+
+    # Imported here so web workers without the scheduler never load APScheduler
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.triggers.cron import CronTrigger
+    from backend.services.maintenance import apply_retention_policies, auto_read_stale_insights
+    from backend.services.pregeneration import pregenerate_daily_content
+
+    scheduler = BackgroundScheduler(
+        timezone="UTC",
+        # A run missed while the process was down happens once on start, within the hour
+        job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": 3600},
+    )
+    scheduler.add_job(
+        _exclusive(app, pregenerate_daily_content, min_interval=timedelta(hours=20)),
+        CronTrigger(hour=app.config.get("PREGENERATION_HOUR", 4), minute=0, timezone="UTC"),
+        id="pregenerate_daily_content",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        _exclusive(app, auto_read_stale_insights, min_interval=timedelta(hours=20)),
+        CronTrigger(hour=app.config.get("MAINTENANCE_HOUR", 3), minute=0, timezone="UTC"),
+        id="auto_read_stale_insights",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        _exclusive(app, apply_retention_policies, min_interval=timedelta(hours=20)),
+        CronTrigger(hour=app.config.get("MAINTENANCE_HOUR", 3), minute=30, timezone="UTC"),
+        id="apply_retention_policies",
+        replace_existing=True,
+    )
+    scheduler.start()
+    atexit.register(lambda: scheduler.running and scheduler.shutdown(wait=False))
+    logger.info("Scheduler started with jobs: %s", ", ".join(job.id for job in scheduler.get_jobs()))
+
+    _scheduler = scheduler
+    return scheduler
@@ -0,0 +1,132 @@
+"""
+Weighted Sentiment Lexicon
+Term valences for the sentiment scorer, held in a compact array-backed table:
+a sorted tuple of terms plus a parallel array('f') of weights (4 bytes each),
+looked up with bisect. Loaded once per process; with gunicorn --preload the
+table is built before forking and shared copy-on-write by the workers.
+
+The built-in lexicon lives in data/sentiment_lexicon.tsv. Set
+SENTIMENT_LEXICON_PATH to a VADER-format file (term<TAB>valence[<TAB>...])
+to use a larger one.
+"""
+
+import logging
+import os
+import re
+from array import array
+from bisect import bisect_left
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(__file__), "data", "sentiment_lexicon.tsv")
+
+# Words that flip the valence of the next NEGATION_WINDOW tokens
+NEGATORS = frozenset([
+    "not", "no", "never", "none", "nobody", "nothing", "neither", "nor", "nowhere",
+    "cannot", "without", "hardly", "barely", "rarely", "seldom",
+])
+NEGATION_WINDOW = 3
+# Multiplier applied to a negated term ("not happy" is mildly negative, not the mirror of "happy")
+NEGATION_SCALAR = -0.74
+
+# Multipliers for the term that follows
+INTENSIFIERS = {
+    "very": 1.3, "really": 1.3, "so": 1.25, "extremely": 1.5, "incredibly": 1.5,
+    "totally": 1.3, "completely": 1.4, "absolutely": 1.4, "deeply": 1.4, "truly": 1.3,
+    "super": 1.3, "too": 1.2, "most": 1.3, "especially": 1.25, "utterly": 1.5,
+    "slightly": 0.6, "somewhat": 0.7, "kinda": 0.7, "little": 0.7, "bit": 0.7,
+    "almost": 0.8, "fairly": 0.85, "pretty": 1.1, "quite": 1.1,
+}
+
+# Tokens are words (with inner apostrophes/hyphens) or clause-ending punctuation
+TOKEN_PATTERN = re.compile(r"[a-z]+(?:['\-][a-z]+)*|[.,!?;:]")
+CLAUSE_BREAKS = frozenset(".,!?;:")
+
+
+def is_negator(token: str) -> bool:
+    return token in NEGATORS or token.endswith("n't")
+
+
+class WeightedLexicon:
+    def __init__(self, entries):
+        """entries: iterable of (term, valence); later duplicates win."""
+        merged = {}
+        for term, valence in entries:
+            merged[term] = valence
+        self.terms = tuple(sorted(merged))
+        self.weights = array("f", (merged[t] for t in self.terms))
+
+    def __len__(self):
+        return len(self.terms)
+
+    def index_of(self, term: str) -> int:
+        """Position of term in the table, or -1 if it is not in the lexicon."""
+        i = bisect_left(self.terms, term)
+        if i < len(self.terms) and self.terms[i] == term:
+            return i
+        return -1
+
+    def valence(self, term: str) -> Optional[float]:
+        i = self.index_of(term)
+        return self.weights[i] if i >= 0 else None
+
+    @classmethod
+    def load(cls, path: str) -> "WeightedLexicon":
+        entries = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) < 2:
+                    continue
+                term = parts[0].strip().lower()
+                # Single tokens only; the scorer never sees multi-word terms
+                if not term or " " in term or not TOKEN_PATTERN.fullmatch(term):
+                    continue
+                try:
+                    entries.append((term, float(parts[1])))
+                except ValueError:
+                    continue
+        lexicon = cls(entries)
+        logger.info("Loaded sentiment lexicon with %d terms from %s", len(lexicon), path)
+        return lexicon
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def term_multipliers(tokens: List[str]):
+    """
+    Yield (position, multiplier) for every word token, applying negation
+    windows and intensifiers from the tokens before it. Clause punctuation
+    ends a negation window.
+    """
+    negate_left = 0
+    boost = 1.0
+    for pos, token in enumerate(tokens):
+        if token in CLAUSE_BREAKS:
+            negate_left = 0
+            boost = 1.0
+            continue
+        if is_negator(token):
+            negate_left = NEGATION_WINDOW
+            continue
+        multiplier = boost
+        if negate_left:
+            multiplier *= NEGATION_SCALAR
+            negate_left -= 1
+        boost = INTENSIFIERS.get(token, 1.0)
+        yield pos, multiplier
+
+
+# Singleton instance
+_lexicon = None
+
+def get_lexicon() -> WeightedLexicon:
+    global _lexicon
+    if _lexicon is None:
+        _lexicon = WeightedLexicon.load(os.getenv("SENTIMENT_LEXICON_PATH") or DEFAULT_LEXICON_PATH)
+    return _lexicon
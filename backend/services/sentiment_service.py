@@ -6,82 +6,299 @@ transformers/torch in the project.
 """
 
 import logging
-from typing import Dict, List
+import math
+import os
+from itertools import chain
+from typing import Dict, List, Optional
+
+from backend.services.keyword_engine import LEXICONS, get_keyword_matcher
+from backend.services.sentiment_lexicon import (
+    CLAUSE_BREAKS,
+    INTENSIFIERS,
+    NEGATION_SCALAR,
+    NEGATION_WINDOW,
+    get_lexicon,
+    is_negator,
+    term_multipliers,
+    tokenize,
+)
 
 logger = logging.getLogger(__name__)
 
+# compound = s / sqrt(s^2 + alpha) maps a raw valence sum into (-1, 1)
+COMPOUND_ALPHA = 15.0
+# |compound| below this is labelled neutral
+COMPOUND_THRESHOLD = 0.05
+# Negative intensity (-compound) at or above which a negative text counts as
+# strongly negative ("so sad and hopeless" ~0.79, "a bit sad" ~0.34)
+NEGATIVE_HIGH_INTENSITY = 0.75
+
+
+def negative_intensity(sentiment_scores: Optional[Dict]) -> float:
+    """
+    How negative a result is, in [0, 1): -compound for negative texts, else 0.
+    The 'negative' score is a share of all words (diluted by neutral ones),
+    so thresholds and averages use this instead. Records saved without a
+    compound fall back to their 'negative' share.
+    """
+    scores = sentiment_scores or {}
+    compound = scores.get('compound')
+    if compound is None:
+        return float(scores.get('negative', 0) or 0)
+    return max(0.0, -float(compound))
+
 
 class SentimentAnalyzer:
     def __init__(self):
-        # Simple keyword lists
-        self.positive_words = set([
-            'happy', 'good', 'great', 'fantastic', 'joy', 'joyful', 'glad', 'pleased', 'love', 'excited'
-        ])
-        self.negative_words = set([
-            'sad', 'down', 'depressed', 'unhappy', 'angry', 'annoyed', 'tired', 'anxious', 'stressed', 'lonely'
-        ])
+        # Keyword lists live in keyword_engine.LEXICONS; one compiled scan covers them all
+        self.matcher = get_keyword_matcher()
+        # Weighted valences for scoring (negation and intensifiers aware)
+        self.lexicon = get_lexicon()
+        # Longer texts are truncated so every call stays within a fixed CPU budget
+        self.max_chars = int(os.getenv("SENTIMENT_MAX_CHARS", 20000))
+        self._weights = None
+        # Emotion words reported in detected_emotions (keyword_engine.LEXICONS)
+        self._emotions = {term: 'negative' for term in LEXICONS['sentiment:negative']}
+        for term in LEXICONS['sentiment:positive']:
+            self._emotions.setdefault(term, 'positive')
 
-        self.crisis_keywords = [
-            'suicide', 'suicidal', 'kill myself', 'end it all', 'want to die', 'hurt myself', 'overdose'
-        ]
-
-        logger.info("SentimentAnalyzer initialized (lightweight)")
+        logger.info("SentimentAnalyzer initialized (%d lexicon terms)", len(self.lexicon))
 
     def analyze_sentiment(self, text: str) -> Dict:
         if not text or len(text.strip()) < 3:
-            return {
-                'sentiment_label': 'neutral',
-                'sentiment_scores': {'negative': 0.33, 'neutral': 0.34, 'positive': 0.33},
-                'detected_emotions': [],
-                'crisis_flag': False,
-                'crisis_keywords': []
-            }
-
-        txt = text.lower()
-        words = txt.split()
-        pos = sum(1 for w in words if w.strip(".,!?\"')(") in self.positive_words)
-        neg = sum(1 for w in words if w.strip(".,!?\"')(") in self.negative_words)
-
-        # Basic scoring
-        total = max(1, pos + neg)
-        pos_score = pos / total
-        neg_score = neg / total
-        neu_score = max(0.0, 1.0 - (pos_score + neg_score))
-
-        if pos > neg:
+            return self._neutral_result()
+
+        text = text[:self.max_chars]
+        plus, minus, neutral, emotions = self._term_multipliers(text)
+
+        # Each negated (minus) hit contributes to the opposite side
+        weights = self.lexicon.weights
+        plus_pos = sum(m * max(weights[i], 0.0) for i, m in plus.items())
+        plus_neg = sum(m * max(-weights[i], 0.0) for i, m in plus.items())
+        minus_pos = sum(m * max(weights[i], 0.0) for i, m in minus.items())
+        minus_neg = sum(m * max(-weights[i], 0.0) for i, m in minus.items())
+        pos_sum = plus_pos + minus_neg
+        neg_sum = plus_neg + minus_pos
+
+        total = pos_sum + neg_sum + neutral
+        if total == 0:
+            pos_score, neg_score, neu_score = 0.0, 0.0, 1.0
+        else:
+            pos_score, neg_score, neu_score = pos_sum / total, neg_sum / total, neutral / total
+
+        compound = self._compound(pos_sum - neg_sum)
+        if compound >= COMPOUND_THRESHOLD:
             label = 'positive'
-        elif neg > pos:
+        elif compound <= -COMPOUND_THRESHOLD:
             label = 'negative'
         else:
             label = 'neutral'
 
-        detected = []
-        for w in list(self.negative_words):
-            if w in txt:
-                detected.append(w)
-        for w in list(self.positive_words):
-            if w in txt and w not in detected:
-                detected.append(w)
+        hits = self.matcher.scan(text)
+        result = self._build_result(
+            label, neg_score, neu_score, pos_score, compound,
+            emotions['negative'], emotions['positive'], hits.terms('crisis')
+        )
+
+        if result['crisis_flag']:
+            logger.warning(f"Crisis keywords detected: {result['crisis_keywords']}")
+
+        return result
+
+    def analyze_batch(self, texts: List[str]) -> List[Dict]:
+        """
+        Score many texts at once; returns the same dicts as analyze_sentiment, in order.
+
+        The whole batch is tokenized into one flat token array and the
+        negation windows, intensifiers and lexicon weights are applied with
+        array operations, so the per-token work happens in numpy rather than
+        in a Python loop. Crisis terms come from KeywordMatcher.scan_many.
+        """
+        # Imported lazily: only batch callers pay for numpy
+        import numpy as np
+
+        if not texts:
+            return []
+
+        n = len(texts)
+        skipped = [not text or len(text.strip()) < 3 for text in texts]
+        clipped = ["" if skip else text[:self.max_chars] for text, skip in zip(texts, skipped)]
+        pos_sum, neg_sum, neutral, emotions = self._batch_sums(np, clipped)
+
+        total = pos_sum + neg_sum + neutral
+        empty = total == 0
+        safe_total = np.where(empty, 1.0, total)
+        pos_scores = np.where(empty, 0.0, pos_sum / safe_total)
+        neg_scores = np.where(empty, 0.0, neg_sum / safe_total)
+        neu_scores = np.where(empty, 1.0, neutral / safe_total)
+        diff = pos_sum - neg_sum
+        compound = diff / np.sqrt(diff * diff + COMPOUND_ALPHA)
+        labels = np.where(compound >= COMPOUND_THRESHOLD, 'positive',
+                          np.where(compound <= -COMPOUND_THRESHOLD, 'negative', 'neutral'))
+
+        all_hits = self.matcher.scan_many(clipped)
+        results = []
+        crisis_count = 0
+        for i in range(n):
+            if skipped[i]:
+                results.append(self._neutral_result())
+                continue
+            result = self._build_result(
+                str(labels[i]), float(neg_scores[i]), float(neu_scores[i]), float(pos_scores[i]),
+                float(compound[i]),
+                emotions[i]['negative'], emotions[i]['positive'], all_hits[i].terms('crisis')
+            )
+            crisis_count += result['crisis_flag']
+            results.append(result)
+
+        if crisis_count:
+            logger.warning(f"Crisis keywords detected in {crisis_count} of {len(texts)} batch texts")
+
+        return results
+
+    def _batch_sums(self, np, texts: List[str]):
+        """
+        (positive sums, negative sums, neutral word counts, emotions) per
+        text; the sums are arrays and emotions a list of
+        {'negative': [...], 'positive': [...]}. The vectorized equivalent of
+        _term_multipliers plus the weighting in analyze_sentiment.
+        """
+        n = len(texts)
+        emotions = [{'negative': [], 'positive': []} for _ in range(n)]
+        token_lists = [tokenize(text) for text in texts]
+        lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=n)
+        flat = list(chain.from_iterable(token_lists))
+        if not flat:
+            return np.zeros(n), np.zeros(n), np.zeros(n), emotions
 
-        crisis_found = [k for k in self.crisis_keywords if k in txt]
+        # Per distinct token: lexicon index, negator / clause-break flags, intensifier
+        vocabulary = {token: i for i, token in enumerate(dict.fromkeys(flat))}
+        distinct = list(vocabulary)
+        index_of = self.lexicon.index_of
+        lex_index = np.fromiter((index_of(t) for t in distinct), dtype=np.int64, count=len(distinct))
+        negator = np.fromiter((is_negator(t) for t in distinct), dtype=bool, count=len(distinct))
+        clause = np.fromiter((t in CLAUSE_BREAKS for t in distinct), dtype=bool, count=len(distinct))
+        boost_of = np.fromiter((INTENSIFIERS.get(t, 1.0) for t in distinct), dtype=np.float64,
+                               count=len(distinct))
 
-        result = {
+        ids = np.fromiter(map(vocabulary.__getitem__, flat), dtype=np.int64, count=len(flat))
+        doc = np.repeat(np.arange(n), lengths)
+        positions = np.arange(len(flat))
+        is_negator_token = negator[ids]
+        is_clause = clause[ids]
+        is_word = ~(is_negator_token | is_clause)
+
+        # Negation and boosts never reach past a clause break or the start of the text
+        doc_start = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        last_break = np.maximum(np.maximum.accumulate(np.where(is_clause, positions, -1)), doc_start - 1)
+        last_negator = np.maximum.accumulate(np.where(is_negator_token, positions, -1))
+        words_so_far = np.cumsum(is_word)
+        # A negator flips the next NEGATION_WINDOW words in its clause
+        negated = (last_negator > last_break) & (
+            words_so_far - words_so_far[np.maximum(last_negator, 0)] <= NEGATION_WINDOW
+        )
+        # Each word's multiplier is set by the word before it (negators are skipped)
+        last_word = np.maximum.accumulate(np.where(is_word, positions, -1))
+        previous_word = np.concatenate(([-1], last_word[:-1]))
+        boost = np.where(previous_word > last_break, boost_of[ids[np.maximum(previous_word, 0)]], 1.0)
+        multiplier = np.where(negated, boost * NEGATION_SCALAR, boost)
+
+        # Emotion words, unless negated ("not happy" is not happiness)
+        emotion_of = [self._emotions.get(t) for t in distinct]
+        is_emotion = np.fromiter((e is not None for e in emotion_of), dtype=bool, count=len(distinct))
+        reported = np.flatnonzero(is_emotion[ids] & is_word & ~negated)
+        for i, token_id in zip(doc[reported].tolist(), ids[reported].tolist()):
+            found = emotions[i][emotion_of[token_id]]
+            if distinct[token_id] not in found:
+                found.append(distinct[token_id])
+
+        term = lex_index[ids]
+        scored = is_word & (term >= 0)
+        neutral = np.bincount(doc[is_word & (term < 0)], minlength=n).astype(np.float64)
+
+        weights = self._weight_columns(np)
+        m = multiplier[scored]
+        w_pos = weights[term[scored], 0]
+        w_neg = weights[term[scored], 1]
+        # Negated hits contribute to the opposite side
+        pos = np.where(m > 0, m * w_pos, -m * w_neg)
+        neg = np.where(m > 0, m * w_neg, -m * w_pos)
+        scored_doc = doc[scored]
+        return (np.bincount(scored_doc, weights=pos, minlength=n),
+                np.bincount(scored_doc, weights=neg, minlength=n),
+                neutral, emotions)
+
+    def _term_multipliers(self, text: str):
+        """
+        Tokenize text and collect lexicon hits as {term index: summed |multiplier|},
+        split into plain (plus) and negated (minus) hits, plus the count of
+        non-lexicon words and the emotion words that were not negated
+        ({'negative': [...], 'positive': [...]}, first appearance order).
+        """
+        tokens = tokenize(text)
+        index_of = self.lexicon.index_of
+        emotion_of = self._emotions.get
+        plus = {}
+        minus = {}
+        neutral = 0
+        emotions = {'negative': [], 'positive': []}
+        for pos, multiplier in term_multipliers(tokens):
+            token = tokens[pos]
+            emotion = emotion_of(token)
+            if emotion and multiplier > 0 and token not in emotions[emotion]:
+                emotions[emotion].append(token)
+            i = index_of(token)
+            if i < 0:
+                neutral += 1
+            elif multiplier > 0:
+                plus[i] = plus.get(i, 0.0) + multiplier
+            else:
+                minus[i] = minus.get(i, 0.0) - multiplier
+        return plus, minus, neutral, emotions
+
+    def _weight_columns(self, np):
+        """Term x (positive, negative) magnitude matrix from the lexicon, built once."""
+        if self._weights is None:
+            valences = np.frombuffer(self.lexicon.weights, dtype=np.float32).astype(np.float64)
+            self._weights = np.column_stack((np.maximum(valences, 0.0), np.maximum(-valences, 0.0)))
+        return self._weights
+
+    @staticmethod
+    def _compound(diff: float) -> float:
+        """Normalize a raw valence sum into (-1, 1)."""
+        return diff / math.sqrt(diff * diff + COMPOUND_ALPHA)
+
+    @staticmethod
+    def _neutral_result() -> Dict:
+        return {
+            'sentiment_label': 'neutral',
+            'sentiment_scores': {'negative': 0.33, 'neutral': 0.34, 'positive': 0.33, 'compound': 0.0},
+            'detected_emotions': [],
+            'crisis_flag': False,
+            'crisis_keywords': []
+        }
+
+    @staticmethod
+    def _build_result(label: str, neg_score: float, neu_score: float, pos_score: float, compound: float,
+                      negative_terms: List[str], positive_terms: List[str], crisis_terms: List[str]) -> Dict:
+        detected = list(negative_terms)
+        for w in positive_terms:
+            if w not in detected:
+                detected.append(w)
+
+        return {
             'sentiment_label': label,
             'sentiment_scores': {
                 'negative': round(neg_score, 3),
                 'neutral': round(neu_score, 3),
-                'positive': round(pos_score, 3)
+                'positive': round(pos_score, 3),
+                'compound': round(compound, 3)
             },
             'detected_emotions': detected[:5],
-            'crisis_flag': len(crisis_found) > 0,
-            'crisis_keywords': crisis_found
+            'crisis_flag': len(crisis_terms) > 0,
+            'crisis_keywords': list(crisis_terms)
         }
 
-        if result['crisis_flag']:
-            logger.warning(f"Crisis keywords detected: {crisis_found}")
-
-        return result
-
     def analyze_sentiment_trend(self, sentiments: List[Dict]) -> Dict:
         if not sentiments:
             return {'trend': 'neutral', 'average_negative_score': 0.0, 'consecutive_negative': 0, 'risk_level': 'low'}
@@ -98,27 +315,50 @@ class SentimentAnalyzer:
             else:
                 current = 0
 
-        if negative_count > len(sentiments) * 0.6:
+        avg_neg = sum(negative_intensity(s.get('sentiment_scores')) for s in sentiments) / len(sentiments)
+        return self._classify_trend(len(sentiments), negative_count, positive_count, consecutive_negative, avg_neg)
+
+    def trend_from_state(self, state: Optional[Dict], days: int) -> Dict:
+        """
+        Same analysis as analyze_sentiment_trend, read from a SentimentTrend
+        state document instead of the raw records. consecutive_negative is the
+        user's current negative streak.
+        """
+        from backend.models.sentiment_trend import SentimentTrend
+        counts = SentimentTrend.window_counts(state, days)
+        total = sum(c['count'] for c in counts.values())
+        if not total:
+            return {'trend': 'neutral', 'average_negative_score': 0.0, 'consecutive_negative': 0, 'risk_level': 'low'}
+
+        avg_neg = sum(c['negative_sum'] for c in counts.values()) / total
+        analysis = self._classify_trend(
+            total, counts['negative']['count'], counts['positive']['count'],
+            state.get('consecutive_negative', 0), avg_neg
+        )
+        analysis['ewma_negative_score'] = state.get('ewma_negative', 0.0)
+        return analysis
+
+    @staticmethod
+    def _classify_trend(total, negative_count, positive_count, consecutive_negative, avg_neg) -> Dict:
+        if negative_count > total * 0.6:
             trend = 'declining'
-        elif positive_count > len(sentiments) * 0.6:
+        elif positive_count > total * 0.6:
             trend = 'improving'
         else:
             trend = 'stable'
 
         risk = 'low'
-        if consecutive_negative >= 5 or negative_count > len(sentiments) * 0.8:
+        if consecutive_negative >= 5 or negative_count > total * 0.8:
             risk = 'high'
-        elif consecutive_negative >= 3 or negative_count > len(sentiments) * 0.6:
+        elif consecutive_negative >= 3 or negative_count > total * 0.6:
             risk = 'medium'
 
-        avg_neg = sum(s.get('sentiment_scores', {}).get('negative', 0) for s in sentiments) / len(sentiments)
-
         return {
             'trend': trend,
             'average_negative_score': avg_neg,
             'consecutive_negative': consecutive_negative,
             'risk_level': risk,
-            'total_entries': len(sentiments),
+            'total_entries': total,
             'negative_count': negative_count,
             'positive_count': positive_count
         }
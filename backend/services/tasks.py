@@ -0,0 +1,71 @@
+"""
+Background Tasks
+Handlers for tasks in the Mongo-backed queue (models/task.py), run by
+`python -m backend.worker`. Register a handler with @task("name"); it gets
+the task's payload dict. Raising marks the attempt failed: it is retried
+with backoff, then dead-lettered after max_attempts.
+
+Queue work from request handlers with enqueue("name", {...}).
+"""
+
+import logging
+from typing import Callable, Dict
+
+from backend.models import Task
+
+logger = logging.getLogger(__name__)
+
+HANDLERS: Dict[str, Callable[[Dict], None]] = {}
+
+
+def task(name: str):
+    """Register the decorated function as the handler for task `name`."""
+    def register(handler):
+        if name in HANDLERS:
+            raise ValueError(f"Task handler {name!r} is already registered")
+        HANDLERS[name] = handler
+        return handler
+    return register
+
+
+def enqueue(name: str, payload: Dict = None, **options):
+    """Queue task `name` (options: priority, delay_seconds, max_attempts, dedupe_key)."""
+    if name not in HANDLERS:
+        raise ValueError(f"Unknown task {name!r}")
+    return Task.enqueue(name, payload, **options)
+
+
+@task("journal.enrich")
+def enrich_journal_entry(payload: Dict):
+    """Enrichment of one journal entry (ENRICHMENT_MODE=queue)."""
+    from backend.services.enrichment import EnrichmentJob, get_enrichment_pipeline
+    job = EnrichmentJob(payload["entry_id"], payload["user_id"], payload["content"], payload.get("set_tags", True))
+    get_enrichment_pipeline().process_batch([job])
+
+
+@task("insights.pregenerate_daily")
+def pregenerate_daily(payload: Dict):
+    """Nightly daily-tip and check-in pre-generation, e.g. triggered manually for a day."""
+    from backend.services.pregeneration import pregenerate_daily_content
+    pregenerate_daily_content(payload.get("day"))
+
+
+@task("insights.auto_read_stale")
+def auto_read_stale(payload: Dict):
+    """Mark stale unread insights as read outside the nightly schedule."""
+    from backend.services.maintenance import auto_read_stale_insights
+    auto_read_stale_insights(payload.get("days"))
+
+
+@task("maintenance.apply_retention")
+def apply_retention(payload: Dict):
+    """Archive expired sentiment history and legacy chat turns outside the nightly schedule."""
+    from backend.services.maintenance import apply_retention_policies
+    apply_retention_policies()
+
+
+@task("crisis.write_alert")
+def write_crisis_alert(payload: Dict):
+    """A crisis alert the crisis lane could not write itself (services/crisis_lane.py)."""
+    from backend.services.crisis_lane import CrisisEvent, get_crisis_lane
+    get_crisis_lane().write(CrisisEvent.from_payload(payload))
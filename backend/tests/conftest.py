@@ -0,0 +1,37 @@
+"""
+Test setup: the app runs against an in-memory mongomock client, created
+before any model module is imported (models bind their collections at import).
+
+Run from the repository root:
+    python -m pytest
+"""
+
+import mongomock
+import mongomock.collection
+import pytest
+
+import backend
+
+# Recent pymongo passes sort= to bulk updates, which mongomock 4.3 does not accept yet
+_add_update = mongomock.collection.BulkOperationBuilder.add_update
+mongomock.collection.BulkOperationBuilder.add_update = (
+    lambda self, *args, sort=None, **kwargs: _add_update(self, *args, **kwargs)
+)
+
+_client = mongomock.MongoClient()
+backend.MongoClient = lambda *args, **kwargs: _client
+_app = backend.create_app()
+_app.config["TESTING"] = True
+
+
+@pytest.fixture
+def app():
+    with _app.app_context():
+        yield _app
+
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    yield
+    for name in _client.mindbuddy.list_collection_names():
+        _client.mindbuddy[name].delete_many({})
@@ -0,0 +1,224 @@
+import datetime
+import time
+
+import jwt
+import pytest
+
+from backend.models import RefreshToken
+from backend.services import auth_tokens
+from backend.services.auth_tokens import VerifiedTokenCache, issue_access_token, verify_access_token
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def separate_jwt_key(app, monkeypatch):
+    monkeypatch.setitem(app.config, "JWT_SECRET_KEY", "jwt-key-separate-from-secret-key-0123456789")
+    monkeypatch.setitem(app.config, "SECRET_KEY", "old-secret-key-that-signed-24h-tokens-0123")
+    return app.config
+
+
+def sign(payload, key, hours=1):
+    payload = dict(payload, exp=datetime.datetime.utcnow() + datetime.timedelta(hours=hours))
+    return jwt.encode(payload, key, algorithm="HS256")
+
+
+def login(client, email="user@example.com", password="password123"):
+    client.post("/api/auth/register", json={"firstName": "A", "lastName": "B", "email": email, "password": password})
+    response = client.post("/api/auth/login", json={"email": email, "password": password})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def refresh(client, token):
+    return client.post("/api/auth/refresh", json={"refresh_token": token})
+
+
+# --- Refresh tokens ---
+
+def test_refresh_token_is_single_use_and_rotates(app, monkeypatch):
+    monkeypatch.setattr(RefreshToken, "REUSE_GRACE_SECONDS", 0)
+    first = RefreshToken.issue("u1", 30)
+
+    spent = RefreshToken.spend(first)
+    successor = RefreshToken.issue(spent["user_id"], 30, family_id=spent["family_id"])
+
+    assert spent["user_id"] == "u1"
+    assert successor != first
+    assert RefreshToken.spend(successor)["family_id"] == spent["family_id"]
+
+
+def test_reuse_after_grace_window_revokes_the_family(app, monkeypatch):
+    monkeypatch.setattr(RefreshToken, "REUSE_GRACE_SECONDS", 0)
+    first = RefreshToken.issue("u1", 30)
+    spent = RefreshToken.spend(first)
+    successor = RefreshToken.issue("u1", 30, family_id=spent["family_id"])
+    other_login = RefreshToken.issue("u1", 30)
+
+    assert RefreshToken.spend(first) is None
+    assert RefreshToken.spend(successor) is None
+    assert RefreshToken.spend(other_login) is not None
+
+
+def test_one_replay_within_grace_window_is_allowed(app):
+    first = RefreshToken.issue("u1", 30)
+    spent = RefreshToken.spend(first)
+    successor = RefreshToken.issue("u1", 30, family_id=spent["family_id"])
+
+    replay = RefreshToken.spend(first)
+
+    assert replay["family_id"] == spent["family_id"]
+    assert RefreshToken.spend(successor) is not None
+
+
+def test_second_replay_within_grace_window_revokes_the_family(app):
+    first = RefreshToken.issue("u1", 30)
+    spent = RefreshToken.spend(first)
+    successor = RefreshToken.issue("u1", 30, family_id=spent["family_id"])
+    RefreshToken.spend(first)
+
+    assert RefreshToken.spend(first) is None
+    assert RefreshToken.spend(successor) is None
+
+
+def test_expired_unknown_and_revoked_refresh_tokens_are_rejected(app):
+    expired = RefreshToken.issue("u1", -1)
+    revoked = RefreshToken.issue("u1", 30)
+    RefreshToken.revoke(revoked)
+
+    assert RefreshToken.spend(expired) is None
+    assert RefreshToken.spend("not-a-token") is None
+    assert RefreshToken.spend(revoked) is None
+
+
+def test_refresh_route_rotates_and_rejects_theft(client, monkeypatch):
+    monkeypatch.setattr(RefreshToken, "REUSE_GRACE_SECONDS", 0)
+    session = login(client)
+
+    renewed = refresh(client, session["refresh_token"])
+    assert renewed.status_code == 200
+    assert renewed.get_json()["refresh_token"] != session["refresh_token"]
+
+    assert refresh(client, session["refresh_token"]).status_code == 401
+    assert refresh(client, renewed.get_json()["refresh_token"]).status_code == 401
+
+
+def test_parallel_refresh_within_grace_window_keeps_the_session(client):
+    session = login(client)
+
+    first = refresh(client, session["refresh_token"])
+    second = refresh(client, session["refresh_token"])
+
+    assert first.status_code == second.status_code == 200
+    assert refresh(client, first.get_json()["refresh_token"]).status_code == 200
+    assert refresh(client, second.get_json()["refresh_token"]).status_code == 200
+
+
+def test_password_change_ends_every_other_session(client):
+    phone = login(client)
+    laptop = client.post("/api/auth/login", json={"email": "user@example.com", "password": "password123"}).get_json()
+
+    changed = client.put(
+        "/api/auth/change-password",
+        json={"currentPassword": "password123", "newPassword": "new-password-456"},
+        headers={"Authorization": f"Bearer {laptop['access_token']}"},
+    )
+
+    assert changed.status_code == 200
+    assert refresh(client, phone["refresh_token"]).status_code == 401
+    assert refresh(client, laptop["refresh_token"]).status_code == 401
+    assert refresh(client, changed.get_json()["refresh_token"]).status_code == 200
+
+
+# --- Access tokens ---
+
+def test_access_token_round_trip(app):
+    token, lifetime = issue_access_token("u1")
+
+    assert verify_access_token(token) == "u1"
+    assert lifetime == app.config["ACCESS_TOKEN_MINUTES"] * 60
+
+
+def test_expired_access_token_is_rejected(app):
+    token = sign({"user_id": "u1", "type": "access"}, app.config["JWT_SECRET_KEY"], hours=-1)
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        verify_access_token(token)
+
+
+def test_refresh_typed_token_is_not_an_access_token(app):
+    token = sign({"user_id": "u1", "type": "refresh"}, app.config["JWT_SECRET_KEY"])
+
+    with pytest.raises(jwt.InvalidTokenError):
+        verify_access_token(token)
+
+
+def test_legacy_token_signed_with_secret_key_is_accepted(separate_jwt_key):
+    token = sign({"user_id": "u1"}, separate_jwt_key["SECRET_KEY"])
+
+    assert verify_access_token(token) == "u1"
+
+
+def test_legacy_secret_is_rejected_once_switched_off(separate_jwt_key, monkeypatch):
+    monkeypatch.setitem(separate_jwt_key, "JWT_ACCEPT_LEGACY_SECRET", False)
+    token = sign({"user_id": "u2"}, separate_jwt_key["SECRET_KEY"])
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        verify_access_token(token)
+
+
+def test_typed_token_signed_with_legacy_secret_is_rejected(separate_jwt_key):
+    token = sign({"user_id": "u3", "type": "access"}, separate_jwt_key["SECRET_KEY"])
+
+    with pytest.raises(jwt.InvalidTokenError):
+        verify_access_token(token)
+
+
+def test_token_signed_with_unknown_key_is_rejected(separate_jwt_key):
+    token = sign({"user_id": "u4"}, "some-other-key-entirely-0123456789abcdef")
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        verify_access_token(token)
+
+
+def test_verified_tokens_are_cached(app, monkeypatch):
+    token, _ = issue_access_token("u5")
+    verify_access_token(token)
+    monkeypatch.setattr(auth_tokens.jwt, "decode", lambda *args, **kwargs: pytest.fail("decoded again"))
+
+    assert verify_access_token(token) == "u5"
+
+
+# --- VerifiedTokenCache ---
+
+def test_cache_drops_expired_entries():
+    cache = VerifiedTokenCache(10)
+    cache.put("live", "u1", time.time() + 60)
+    cache.put("expired", "u2", time.time() - 1)
+
+    assert cache.get("live") == "u1"
+    assert cache.get("expired") is None
+    assert "expired" not in cache._entries
+
+
+def test_cache_evicts_least_recently_used():
+    cache = VerifiedTokenCache(2)
+    expires_at = time.time() + 60
+    cache.put("a", "u1", expires_at)
+    cache.put("b", "u2", expires_at)
+    cache.get("a")
+    cache.put("c", "u3", expires_at)
+
+    assert cache.get("a") == "u1"
+    assert cache.get("b") is None
+    assert cache.get("c") == "u3"
+
+
+def test_cache_of_size_zero_stores_nothing():
+    cache = VerifiedTokenCache(0)
+    cache.put("a", "u1", time.time() + 60)
+
+    assert cache.get("a") is None
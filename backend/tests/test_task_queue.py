@@ -0,0 +1,197 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.models import Task
+
+
+@pytest.fixture(autouse=True)
+def _app(app):
+    yield
+
+
+def expire_lease(task_id):
+    Task.collection.update_one({"_id": task_id}, {"$set": {"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)}})
+
+
+def stored(task_id):
+    return Task.collection.find_one({"_id": task_id})
+
+
+def test_claim_takes_highest_priority_first():
+    low = Task.enqueue("t.low", priority=0)
+    high = Task.enqueue("t.high", priority=100)
+
+    assert Task.claim("w1", 60)["_id"] == high
+    assert Task.claim("w1", 60)["_id"] == low
+
+
+def test_a_task_is_claimed_by_one_worker_only():
+    task_id = Task.enqueue("t")
+
+    first = Task.claim("w1", 60)
+    second = Task.claim("w2", 60)
+
+    assert first["_id"] == task_id
+    assert first["status"] == Task.RUNNING and first["attempts"] == 1
+    assert second is None
+
+
+def test_delayed_task_is_not_claimed_early():
+    Task.enqueue("t", delay_seconds=60)
+
+    assert Task.claim("w1", 60) is None
+
+
+def test_task_is_reclaimed_after_its_lease_expires():
+    task_id = Task.enqueue("t")
+    Task.claim("w1", 60)
+    assert Task.claim("w2", 60) is None
+
+    expire_lease(task_id)
+    reclaimed = Task.claim("w2", 60)
+
+    assert reclaimed["_id"] == task_id
+    assert reclaimed["worker"] == "w2"
+    assert reclaimed["attempts"] == 2
+
+
+def test_extended_lease_is_not_reclaimed():
+    task_id = Task.enqueue("t")
+    claimed = Task.claim("w1", 1)
+    expire_lease(task_id)
+
+    assert Task.extend_lease(claimed, 60)
+    assert Task.claim("w2", 60) is None
+
+
+def test_stale_worker_cannot_complete_fail_or_renew_a_reclaimed_task():
+    task_id = Task.enqueue("t")
+    stale = Task.claim("w1", 60)
+    expire_lease(task_id)
+    Task.claim("w2", 60)
+
+    assert not Task.extend_lease(stale, 60)
+    Task.complete(stale)
+    assert stored(task_id)["status"] == Task.RUNNING
+    Task.fail(stale, RuntimeError("late"))
+    assert stored(task_id)["status"] == Task.RUNNING
+    assert stored(task_id)["worker"] == "w2"
+    assert stored(task_id)["last_error"] is None
+
+
+def test_same_worker_cannot_finish_an_earlier_claim():
+    task_id = Task.enqueue("t")
+    earlier = Task.claim("w1", 60)
+    expire_lease(task_id)
+    Task.claim("w1", 60)
+
+    Task.complete(earlier)
+
+    assert stored(task_id)["status"] == Task.RUNNING
+
+
+def test_complete_marks_task_done():
+    task_id = Task.enqueue("t")
+
+    Task.complete(Task.claim("w1", 60))
+
+    assert stored(task_id)["status"] == Task.DONE
+    assert Task.claim("w1", 60) is None
+
+
+def test_failure_is_retried_after_backoff():
+    task_id = Task.enqueue("t", max_attempts=3)
+
+    status = Task.fail(Task.claim("w1", 60), RuntimeError("boom"))
+
+    doc = stored(task_id)
+    assert status == Task.QUEUED
+    assert doc["last_error"] == "boom"
+    assert doc["run_at"] > datetime.utcnow()
+    assert Task.claim("w1", 60) is None
+
+
+def test_failure_on_last_attempt_dead_letters():
+    task_id = Task.enqueue("t", max_attempts=2)
+    Task.fail(Task.claim("w1", 60), RuntimeError("first"))
+    Task.collection.update_one({"_id": task_id}, {"$set": {"run_at": datetime.utcnow()}})
+
+    status = Task.fail(Task.claim("w1", 60), RuntimeError("second"))
+
+    assert status == Task.DEAD
+    assert stored(task_id)["status"] == Task.DEAD
+    assert stored(task_id)["attempts"] == 2
+
+
+def test_lease_expiring_on_last_attempt_dead_letters():
+    task_id = Task.enqueue("t", max_attempts=1)
+    Task.claim("w1", 60)
+    expire_lease(task_id)
+
+    assert Task.claim("w2", 60) is None
+    doc = stored(task_id)
+    assert doc["status"] == Task.DEAD
+    assert doc["last_error"] == "Lease expired on the final attempt"
+
+
+def test_dead_letter_does_not_block_the_next_task():
+    dead = Task.enqueue("t", priority=10, max_attempts=1)
+    Task.claim("w1", 60)
+    expire_lease(dead)
+    other = Task.enqueue("t", priority=0)
+
+    assert Task.claim("w2", 60)["_id"] == other
+    assert stored(dead)["status"] == Task.DEAD
+
+
+def test_requeue_dead_gives_fresh_attempts():
+    task_id = Task.enqueue("t", max_attempts=1)
+    Task.fail(Task.claim("w1", 60), RuntimeError("boom"))
+
+    Task.requeue_dead(task_id)
+
+    claimed = Task.claim("w1", 60)
+    assert claimed["_id"] == task_id and claimed["attempts"] == 1
+
+
+def test_dedupe_key_queues_once_while_pending():
+    first = Task.enqueue("t", dedupe_key="user:1")
+    second = Task.enqueue("t", dedupe_key="user:1")
+
+    assert first == second
+    assert Task.collection.count_documents({"name": "t"}) == 1
+
+
+def test_dedupe_key_is_released_when_done_or_dead():
+    done = Task.enqueue("t", dedupe_key="k")
+    Task.complete(Task.claim("w1", 60))
+    again = Task.enqueue("t", dedupe_key="k")
+    assert again != done
+
+    Task.fail(Task.claim("w1", 60), RuntimeError("boom"))  # attempt 1 of 5: still pending
+    assert Task.enqueue("t", dedupe_key="k") == again
+
+    Task.collection.update_one({"_id": again}, {"$set": {"max_attempts": 1}})
+    Task.collection.update_one({"_id": again}, {"$set": {"run_at": datetime.utcnow()}})
+    claimed = Task.claim("w1", 60)
+    assert claimed is None  # attempts 2 > max_attempts 1: dead-lettered on claim
+    assert stored(again)["status"] == Task.DEAD
+    assert Task.enqueue("t", dedupe_key="k") not in (done, again)
+
+
+def test_worker_writes_a_deferred_crisis_alert(app):
+    from bson import ObjectId
+    from backend.models import CrisisAlert
+    from backend.services.crisis_lane import CrisisEvent, CrisisLane, CRISIS_TASK
+    from backend.services.tasks import enqueue
+    from backend.worker import Worker
+
+    user_id = ObjectId()
+    event = CrisisEvent(user_id, "chat", ["suicidal"], None, CrisisLane.build_insight(user_id, ["suicidal"]))
+    task_id = enqueue(CRISIS_TASK, event.to_payload(), priority=100)
+
+    Worker(app).run_task(Task.claim("w1", 60))
+
+    assert stored(task_id)["status"] == Task.DONE
+    assert CrisisAlert.collection.find_one({"_id": event.alert_id})["user_id"] == user_id
@@ -0,0 +1,66 @@
+"""
+bcrypt Cost Calibration
+Times bcrypt hashing on this machine for increasing costs and recommends
+the highest BCRYPT_LOG_ROUNDS whose median hash time stays within the
+target, so login latency is predictable on our hardware. Run it on the
+production instance type; each +1 doubles the time.
+
+Run:
+    python -m backend.tools.bcrypt_cost --target-ms 250
+
+Existing hashes are upgraded to the new cost on each user's next login.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+
+import bcrypt
+
+
+def time_cost(rounds, samples):
+    """Median milliseconds to hash one password at this cost."""
+    timings = []
+    for _ in range(samples):
+        salt = bcrypt.gensalt(rounds=rounds)
+        started = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", salt)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick BCRYPT_LOG_ROUNDS for a target hash latency.")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="longest acceptable time for one hash")
+    parser.add_argument("--min-rounds", type=int, default=10, help="never recommend less than this")
+    parser.add_argument("--max-rounds", type=int, default=16)
+    parser.add_argument("--samples", type=int, default=5, help="hashes timed per cost")
+    args = parser.parse_args()
+
+    results = {}
+    for rounds in range(4, args.max_rounds + 1):
+        results[rounds] = round(time_cost(rounds, args.samples), 2)
+        if results[rounds] > args.target_ms * 2:
+            break  # higher costs only get slower
+
+    within = [rounds for rounds, ms in results.items() if ms <= args.target_ms]
+    recommended = max(within) if within else None
+    report = {
+        "target_ms": args.target_ms,
+        "median_ms_by_rounds": results,
+        "recommended_rounds": recommended,
+        "hashes_per_second_per_core": round(1000 / results[recommended], 1) if recommended else None,
+    }
+    print(json.dumps(report, indent=2))
+
+    if recommended is None or recommended < args.min_rounds:
+        print(f"WARNING: no cost >= {args.min_rounds} fits {args.target_ms}ms on this machine; "
+              f"raise the target or use faster hardware", file=sys.stderr)
+        sys.exit(1)
+    print(f"BCRYPT_LOG_ROUNDS={recommended}")
+
+
+if __name__ == "__main__":
+    main()
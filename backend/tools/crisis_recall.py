@@ -0,0 +1,34 @@
+"""
+Crisis Recall Check
+Runs the crisis detector over the regression table in keyword_engine
+(CRISIS_MUST_FLAG / CRISIS_MUST_NOT_FLAG) and fails if any phrase that
+must start the crisis protocol is missed, or a harmless one is flagged.
+Run it after editing CRISIS_KEYWORDS.
+
+Run:
+    python -m backend.tools.crisis_recall
+"""
+
+import json
+import sys
+
+from backend.services.keyword_engine import CRISIS_MUST_FLAG, CRISIS_MUST_NOT_FLAG
+from backend.services.prompts import is_crisis_message
+
+
+def main():
+    missed = [text for text in CRISIS_MUST_FLAG if not is_crisis_message(text)]
+    false_alarms = [text for text in CRISIS_MUST_NOT_FLAG if is_crisis_message(text)]
+    print(json.dumps({
+        "must_flag": len(CRISIS_MUST_FLAG),
+        "missed": missed,
+        "must_not_flag": len(CRISIS_MUST_NOT_FLAG),
+        "false_alarms": false_alarms,
+    }, indent=2))
+    if missed or false_alarms:
+        print("FAIL: crisis lexicon regression", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
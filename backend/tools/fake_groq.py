@@ -0,0 +1,206 @@
+"""
+Fake Groq Server
+A local stand-in for the Groq (OpenAI-compatible) chat completions API, for
+exercising the chat pipeline, load tests and CI benchmarks without a real key.
+
+Run:
+    python -m backend.tools.fake_groq --port 8001 --latency-ms 300 \
+        --tokens-per-sec 60 --error-rate 0.05
+
+Then point the backend at it with LLM_BACKEND=fake (and FAKE_GROQ_URL if the
+port differs from the default http://127.0.0.1:8001).
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import uuid
+
+from flask import Flask, Response, jsonify, request
+
+FILLER_WORDS = (
+    "I hear you, and it makes sense that you feel this way. Let's take a slow breath together "
+    "and notice what your body needs right now. You're doing better than you think, and small "
+    "steps still count. What feels most important to talk about today?"
+).split()
+
+
+class FakeGroqSettings:
+    """Behaviour knobs; every field can also be set through FAKE_GROQ_* env vars."""
+
+    def __init__(self, latency_ms=None, tokens_per_sec=None, reply_tokens=None,
+                 error_rate=None, error_status=None, retry_after=None, seed=None):
+        self.latency_ms = _pick(latency_ms, "FAKE_GROQ_LATENCY_MS", 200, float)
+        self.tokens_per_sec = _pick(tokens_per_sec, "FAKE_GROQ_TOKENS_PER_SEC", 80, float)
+        self.reply_tokens = _pick(reply_tokens, "FAKE_GROQ_REPLY_TOKENS", 40, int)
+        self.error_rate = _pick(error_rate, "FAKE_GROQ_ERROR_RATE", 0.0, float)
+        self.error_status = _pick(error_status, "FAKE_GROQ_ERROR_STATUS", 503, int)
+        self.retry_after = _pick(retry_after, "FAKE_GROQ_RETRY_AFTER", None, float)
+        self.seed = _pick(seed, "FAKE_GROQ_SEED", None, int)
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+def _pick(value, env_name, default, cast):
+    if value is not None:
+        return value
+    raw = os.getenv(env_name)
+    return cast(raw) if raw not in (None, "") else default
+
+
+def create_fake_groq_app(settings: FakeGroqSettings = None) -> Flask:
+    settings = settings or FakeGroqSettings()
+    app = Flask(__name__)
+    rng = random.Random(settings.seed)
+    rng_lock = threading.Lock()
+    stats = {"requests": 0, "streams": 0, "errors_injected": 0, "in_flight": 0, "max_in_flight": 0}
+    stats_lock = threading.Lock()
+
+    def _roll_error():
+        with rng_lock:
+            return rng.random() < settings.error_rate
+
+    def _reply_tokens(prompt):
+        # Deterministic for a given prompt so cassettes and benchmarks are stable
+        words = []
+        offset = sum(ord(ch) for ch in prompt) % len(FILLER_WORDS)
+        for i in range(settings.reply_tokens):
+            words.append(FILLER_WORDS[(offset + i) % len(FILLER_WORDS)])
+        return [w + " " for w in words[:-1]] + [words[-1]] if words else []
+
+    def _track(delta):
+        with stats_lock:
+            stats["in_flight"] += delta
+            stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+
+    @app.route("/openai/v1/chat/completions", methods=["POST"])
+    def chat_completions():
+        body = request.get_json(silent=True) or {}
+        with stats_lock:
+            stats["requests"] += 1
+
+        if _roll_error():
+            with stats_lock:
+                stats["errors_injected"] += 1
+            headers = {}
+            if settings.retry_after is not None:
+                headers["retry-after"] = str(settings.retry_after)
+            payload = {"error": {"message": "Injected failure from fake Groq", "type": "fake_error"}}
+            return Response(json.dumps(payload), status=settings.error_status,
+                            headers=headers, mimetype="application/json")
+
+        messages = body.get("messages") or [{"content": ""}]
+        prompt = str(messages[-1].get("content", ""))
+        model = body.get("model", "fake-model")
+        max_tokens = body.get("max_tokens") or settings.reply_tokens
+        tokens = _reply_tokens(prompt)[:max_tokens]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        token_delay = 1.0 / settings.tokens_per_sec if settings.tokens_per_sec > 0 else 0.0
+        usage = {
+            "prompt_tokens": len(prompt.split()),
+            "completion_tokens": len(tokens),
+            "total_tokens": len(prompt.split()) + len(tokens),
+        }
+
+        if body.get("stream"):
+            with stats_lock:
+                stats["streams"] += 1
+
+            def generate():
+                _track(1)
+                try:
+                    time.sleep(settings.latency_ms / 1000.0)
+                    for token in tokens:
+                        chunk = {
+                            "id": completion_id, "object": "chat.completion.chunk", "created": created,
+                            "model": model,
+                            "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                        }
+                        yield f"data: {json.dumps(chunk)}\n\n"
+                        time.sleep(token_delay)
+                    final = {
+                        "id": completion_id, "object": "chat.completion.chunk", "created": created,
+                        "model": model,
+                        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                        "x_groq": {"usage": usage},
+                    }
+                    yield f"data: {json.dumps(final)}\n\n"
+                    yield "data: [DONE]\n\n"
+                finally:
+                    _track(-1)
+
+            return Response(generate(), mimetype="text/event-stream")
+
+        _track(1)
+        try:
+            time.sleep(settings.latency_ms / 1000.0 + token_delay * len(tokens))
+        finally:
+            _track(-1)
+        return jsonify({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+    @app.route("/openai/v1/models", methods=["GET"])
+    def list_models():
+        return jsonify({"object": "list", "data": [{"id": "llama-3.1-8b-instant", "object": "model"}]})
+
+    @app.route("/_fake/stats", methods=["GET"])
+    def fake_stats():
+        with stats_lock:
+            return jsonify({"stats": dict(stats), "settings": settings.to_dict()})
+
+    @app.route("/_fake/settings", methods=["PUT"])
+    def update_settings():
+        """Change behaviour at runtime, e.g. to simulate a brownout mid-test."""
+        data = request.get_json(silent=True) or {}
+        for key, value in data.items():
+            if hasattr(settings, key):
+                setattr(settings, key, value)
+        return jsonify({"settings": settings.to_dict()})
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake Groq API server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=None, help="time to first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=None, help="generation speed")
+    parser.add_argument("--reply-tokens", type=int, default=None, help="tokens per reply")
+    parser.add_argument("--error-rate", type=float, default=None, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=None, help="HTTP status for injected failures")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After seconds on failures")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    settings = FakeGroqSettings(
+        latency_ms=args.latency_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        reply_tokens=args.reply_tokens,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    app = create_fake_groq_app(settings)
+    print(f"Fake Groq listening on http://{args.host}:{args.port} with {settings.to_dict()}")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Task Worker
+Runs queued background tasks (backend/services/tasks.py) in their own
+process, so slow work stays out of the web workers.
+
+Run:
+    python -m backend.worker --concurrency 4
+    python -m backend.worker --with-scheduler   # also run the scheduled jobs here
+
+SIGTERM/SIGINT stop claiming new tasks and wait for running ones to finish.
+Leases are renewed every lease/3 seconds while a task runs. A worker that
+dies mid-task leaves its lease to expire; the task is then claimed again,
+or dead-lettered if that was its last attempt.
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+
+from backend import create_app
+
+logger = logging.getLogger("backend.worker")
+
+
+class Worker:
+    def __init__(self, app, concurrency=2, lease_seconds=300, poll_seconds=1.0, names=None):
+        self.app = app
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.names = names
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def run(self):
+        """Start the worker threads and block until stop() is called and they are done."""
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._loop, args=(i,), name=f"task-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info("Task worker started with %d threads", self.concurrency)
+        while not self._stopping.wait(1.0):
+            pass
+        for thread in self._threads:
+            thread.join()
+        logger.info("Task worker stopped")
+
+    def stop(self, *_):
+        self._stopping.set()
+
+    def _loop(self, index):
+        with self.app.app_context():
+            self._claim_loop(f"{socket.gethostname()}:{os.getpid()}:{index}")
+
+    def _claim_loop(self, worker_id):
+        from backend.models import Task
+        while not self._stopping.is_set():
+            try:
+                claimed = Task.claim(worker_id, self.lease_seconds, names=self.names)
+            except Exception as e:
+                logger.error("Claiming a task failed: %s", e)
+                claimed = None
+            if claimed is None:
+                self._stopping.wait(self.poll_seconds)
+                continue
+            try:
+                self.run_task(claimed)
+            except Exception as e:
+                # e.g. Mongo down while recording the outcome; the lease expires and the task is retried
+                logger.error("Task %s bookkeeping failed: %s", claimed["_id"], e, exc_info=True)
+
+    def run_task(self, claimed):
+        from backend.models import Task
+        from backend.services.metrics import metrics
+        from backend.services.tasks import HANDLERS
+
+        name = claimed["name"]
+        started = time.perf_counter()
+        stop_heartbeat = threading.Event()
+
+        def heartbeat():
+            # Renew the lease so a long task is not claimed and run a second time
+            while not stop_heartbeat.wait(self.lease_seconds / 3):
+                try:
+                    if not Task.extend_lease(claimed, self.lease_seconds):
+                        logger.warning("Lost the lease on task %s (%s) while running", name, claimed["_id"])
+                        return
+                except Exception as e:
+                    logger.error("Renewing the lease on task %s failed: %s", claimed["_id"], e)
+
+        threading.Thread(target=heartbeat, name=f"task-lease-{claimed['_id']}", daemon=True).start()
+        try:
+            handler = HANDLERS.get(name)
+            if handler is None:
+                raise LookupError(f"No handler registered for task {name!r}")
+            handler(claimed.get("payload") or {})
+        except Exception as e:
+            status = Task.fail(claimed, e)
+            metrics.inc("tasks_total", task=name, outcome="dead" if status == Task.DEAD else "retry")
+            logger.error("Task %s (%s) attempt %d failed: %s", name, claimed["_id"], claimed["attempts"], e,
+                         exc_info=True)
+        else:
+            Task.complete(claimed)
+            metrics.inc("tasks_total", task=name, outcome="ok")
+        finally:
+            stop_heartbeat.set()
+            metrics.observe("task_seconds", time.perf_counter() - started, task=name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued background tasks.")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("WORKER_CONCURRENCY", 2)))
+    parser.add_argument("--lease-seconds", type=int, default=int(os.getenv("TASK_LEASE_SECONDS", 300)),
+                        help="how long a claimed task is reserved before another worker may retry it")
+    parser.add_argument("--poll-seconds", type=float, default=1.0, help="idle wait between claim attempts")
+    parser.add_argument("--task", action="append", dest="names", help="only run tasks with this name (repeatable)")
+    parser.add_argument("--with-scheduler", action="store_true", help="also run the scheduled jobs in this process")
+    args = parser.parse_args()
+
+    app = create_app()
+    if args.with_scheduler:
+        from backend.services.scheduler import init_scheduler
+        init_scheduler(app)
+
+    worker = Worker(app, args.concurrency, args.lease_seconds, args.poll_seconds, args.names)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()